@@ -1,124 +1,122 @@
 import json
 import os
-from dotenv import load_dotenv
-import google.generativeai as genai
-import google.generativeai.types as genai_types
-import time
-
-# Load environment variables - explicitly load from backend directory
-backend_dir = os.path.dirname(os.path.abspath(__file__))
-env_path = os.path.join(backend_dir, '.env')
-
-# Try multiple ways to load the .env file
-if os.path.exists(env_path):
-    load_dotenv(env_path, override=True)
-    print(f"[ENV] Loaded .env from: {env_path}")
-else:
-    print(f"[ENV] .env not found at: {env_path}, trying current directory")
-    load_dotenv(override=True)
-
-# Also try loading from current directory as fallback
-load_dotenv(override=True)
-
-# Initialize Gemini client
-gemini_key = os.getenv("GEMINI_API_KEY")
-
-# If still not found, try reading directly from .env file
-if not gemini_key and os.path.exists(env_path):
+import re
+from concurrent.futures import ThreadPoolExecutor
+from cache import transcript_cache
+from llm import client
+from retrieval import split_sentences
+from scheduler import priority_override, current_priority_override, flight_scope, current_flight
+
+# Long-lecture episode generation: transcripts over EPISODE_CHUNK_CHARS are split into
+# chunks that are segmented in parallel (map) and merged into one plan (reduce)
+EPISODE_CHUNK_CHARS = int(os.getenv("EPISODE_CHUNK_CHARS", "8000"))
+EPISODE_MAP_CONCURRENCY = int(os.getenv("EPISODE_MAP_CONCURRENCY", "4"))
+EPISODE_MAX_COUNT = int(os.getenv("EPISODE_MAX_COUNT", "12"))
+
+# Bump a version whenever its prompt changes so cached study materials are regenerated
+PROMPT_VERSIONS = {
+    "flashcards": "v2",
+    "quiz": "v2",
+    "slides": "v2",
+    "tutor_primer": "v1",
+}
+
+class FallbackList(list):
+    """Placeholder result returned when generation failed - callers should not cache it"""
+    pass
+
+class TutorErrorAnswer(str):
+    """Apology text returned when the tutor call failed - callers should not cache it"""
+    pass
+
+def parse_json_array(content: str):
+    """Parse a JSON array from model output, tolerating markdown fences and surrounding text"""
+    # Extract JSON if wrapped in markdown
+    if content.startswith("```"):
+        parts = content.split("```")
+        if len(parts) > 1:
+            content = parts[1]
+            if content.startswith("json"):
+                content = content[4:]
+        content = content.strip()
+    
     try:
-        with open(env_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and 'GEMINI_API_KEY' in line:
-                    if '=' in line:
-                        gemini_key = line.split('=', 1)[1].strip().strip('"').strip("'").strip()
-                        if gemini_key:
-                            print("[ENV] Loaded GEMINI_API_KEY directly from .env file")
-                            # Set it in environment for future use
-                            os.environ['GEMINI_API_KEY'] = gemini_key
-                            break
-    except Exception as e:
-        print(f"[ENV] Error reading .env directly: {e}")
-
-if not gemini_key or len(gemini_key) < 10:
-    raise ValueError(f"GEMINI_API_KEY not found in environment variables. Please set it in .env file. Current value: {gemini_key[:10] if gemini_key else 'None'}...")
-
-# Configure Gemini
-genai.configure(api_key=gemini_key)
-
-# Use the working model name (tested and confirmed)
-model_name = 'gemini-2.5-flash-preview-05-20'
-model = genai.GenerativeModel(model_name)
-
-# Safety settings - disable all blocking for demo/educational purposes
-import google.generativeai.types as genai_types
-
-SAFETY_SETTINGS = [
-    {
-        "category": genai_types.HarmCategory.HARM_CATEGORY_HARASSMENT,
-        "threshold": genai_types.HarmBlockThreshold.BLOCK_NONE
-    },
-    {
-        "category": genai_types.HarmCategory.HARM_CATEGORY_HATE_SPEECH,
-        "threshold": genai_types.HarmBlockThreshold.BLOCK_NONE
-    },
-    {
-        "category": genai_types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
-        "threshold": genai_types.HarmBlockThreshold.BLOCK_NONE
-    },
-    {
-        "category": genai_types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
-        "threshold": genai_types.HarmBlockThreshold.BLOCK_NONE
-    },
-]
-
-print(f"[GEMINI] Using Gemini API for all AI operations (Model: {model_name}, Key: {gemini_key[:20]}...)")
-print(f"[GEMINI] Safety filters disabled for demo purposes")
+        return json.loads(content)
+    except json.JSONDecodeError:
+        # Fallback: try to find JSON array in the response
+        json_match = re.search(r'\[.*\]', content, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group())
+        return None
 
-def transcribe_audio(file_path: str) -> str:
-    """Transcribe audio file using Gemini 1.5 (supports audio directly)"""
+def parse_json_object(content: str):
+    """Parse a JSON object from model output, tolerating markdown fences and surrounding text"""
+    if content.startswith("```"):
+        parts = content.split("```")
+        if len(parts) > 1:
+            content = parts[1]
+            if content.startswith("json"):
+                content = content[4:]
+        content = content.strip()
+    
     try:
-        # Upload audio file to Gemini
-        audio_file = genai.upload_file(path=file_path)
-        
-        # Wait for file to be processed
-        while audio_file.state.name == "PROCESSING":
-            time.sleep(2)
-            audio_file = genai.get_file(audio_file.name)
-        
-        if audio_file.state.name == "FAILED":
-            raise Exception("File processing failed")
-        
-        # Create model with safety disabled
-        model_with_safety = genai.GenerativeModel(model_name, safety_settings=SAFETY_SETTINGS)
-        
-        # Generate transcript with safety settings disabled
-        response = model_with_safety.generate_content(
-            [
-                "Transcribe this audio file word-for-word. Return only the transcript text, no additional commentary, no timestamps, just the spoken words.",
-                audio_file
-            ]
+        parsed = json.loads(content)
+    except json.JSONDecodeError:
+        json_match = re.search(r'\{.*\}', content, re.DOTALL)
+        if not json_match:
+            return None
+        try:
+            parsed = json.loads(json_match.group())
+        except json.JSONDecodeError:
+            return None
+    return parsed if isinstance(parsed, dict) else None
+
+def validate_flashcards(cards) -> bool:
+    return isinstance(cards, list) and len(cards) > 0 and all(
+        isinstance(c, dict) and isinstance(c.get("front"), str) and isinstance(c.get("back"), str)
+        for c in cards
+    )
+
+def validate_quiz(quiz) -> bool:
+    return isinstance(quiz, list) and len(quiz) > 0 and all(
+        isinstance(q, dict)
+        and isinstance(q.get("question"), str)
+        and isinstance(q.get("options"), list) and len(q["options"]) >= 2
+        and isinstance(q.get("correct_index"), int) and 0 <= q["correct_index"] < len(q["options"])
+        for q in quiz
+    )
+
+def validate_slides(slides) -> bool:
+    return isinstance(slides, list) and len(slides) > 0 and all(
+        isinstance(sl, dict) and isinstance(sl.get("title"), str) and isinstance(sl.get("bullets"), list)
+        for sl in slides
+    )
+
+STUDY_VALIDATORS = {
+    "flashcards": validate_flashcards,
+    "quiz": validate_quiz,
+    "slides": validate_slides,
+}
+
+def transcribe_audio(file_path: str, content_hash: str = None) -> str:
+    """Transcribe audio file using Gemini 1.5 (supports audio directly).
+    
+    When content_hash (sha256 of the audio bytes) is given, a cached transcript
+    for the same audio and model is returned without calling Gemini.
+    """
+    if content_hash:
+        cached = transcript_cache.get(content_hash, client.model_name)
+        if cached is not None:
+            print(f"[CACHE] Transcript cache hit for {content_hash[:12]}")
+            return cached
+    try:
+        transcript = client.transcribe(
+            file_path,
+            "Transcribe this audio file word-for-word. Return only the transcript text, no additional commentary, no timestamps, just the spoken words."
         )
         
-        # Handle response format
-        if hasattr(response, 'text') and response.text:
-            transcript = response.text.strip()
-        elif hasattr(response, 'candidates') and response.candidates:
-            text_parts = []
-            for candidate in response.candidates:
-                if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                    for part in candidate.content.parts:
-                        if hasattr(part, 'text'):
-                            text_parts.append(part.text)
-            transcript = ' '.join(text_parts).strip() if text_parts else str(response)
-        else:
-            transcript = str(response).strip()
-        
-        # Clean up uploaded file
-        try:
-            genai.delete_file(audio_file.name)
-        except:
-            pass  # Ignore cleanup errors
+        if content_hash and transcript:
+            transcript_cache.put(content_hash, client.model_name, transcript)
         
         return transcript
     except Exception as e:
@@ -136,7 +134,17 @@ def transcribe_audio(file_path: str) -> str:
         raise Exception(f"Transcription failed: {error_msg}")
 
 def generate_episodes_from_transcript(transcript: str, course_title: str) -> list:
-    """Break transcript into Netflix-style episodes using Gemini"""
+    """Break transcript into Netflix-style episodes using Gemini.
+
+    Short transcripts go through a single prompt; longer ones are segmented
+    chunk by chunk in parallel and then merged into an episode plan.
+    """
+    if len(transcript) > EPISODE_CHUNK_CHARS:
+        return generate_episodes_map_reduce(transcript, course_title)
+    return generate_episodes_single_pass(transcript, course_title)
+
+def generate_episodes_single_pass(transcript: str, course_title: str) -> list:
+    """Break a short transcript into episodes with one Gemini call"""
     # Add generation config for faster responses
     
     generation_config = {
@@ -146,9 +154,6 @@ def generate_episodes_from_transcript(transcript: str, course_title: str) -> lis
         "max_output_tokens": 8192,
     }
     
-    # Truncate transcript to avoid token limits
-    transcript_snippet = transcript[:8000] if len(transcript) > 8000 else transcript
-    
     prompt = f"""You are an educational content creator. Break this lecture transcript into 4-6 educational episodes.
 
 Return a JSON array with this exact structure:
@@ -164,7 +169,7 @@ Return a JSON array with this exact structure:
 Course: {course_title}
 
 Transcript:
-{transcript_snippet}
+{transcript}
 
 Requirements:
 - Create 4-6 episodes
@@ -174,65 +179,7 @@ Requirements:
 """
 
     try:
-        # Create model instance with safety settings explicitly disabled
-        model_with_safety = genai.GenerativeModel(
-            model_name,
-            safety_settings=SAFETY_SETTINGS
-        )
-        
-        response = model_with_safety.generate_content(
-            prompt, 
-            generation_config=generation_config
-        )
-        
-        # Handle different response formats from Gemini
-        content = None
-        
-        # Check for finish_reason issues
-        if hasattr(response, 'candidates') and response.candidates:
-            for candidate in response.candidates:
-                if hasattr(candidate, 'finish_reason'):
-                    finish_reason = candidate.finish_reason
-                    if finish_reason == 2:  # SAFETY (blocked)
-                        raise Exception("Content was blocked by safety filters. Please try with different content or adjust the prompt.")
-                    elif finish_reason == 3:  # RECITATION (copyright)
-                        raise Exception("Content was blocked due to potential copyright issues.")
-                    elif finish_reason == 4:  # OTHER
-                        raise Exception("Content generation was stopped for an unknown reason.")
-                
-                # Try to extract text from candidate
-                if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                    for part in candidate.content.parts:
-                        if hasattr(part, 'text') and part.text:
-                            if content is None:
-                                content = part.text
-                            else:
-                                content += ' ' + part.text
-        
-        # Fallback to response.text if available
-        if not content and hasattr(response, 'text') and response.text:
-            content = response.text.strip()
-        
-        # Fallback to direct parts access
-        if not content and hasattr(response, 'parts'):
-            text_parts = []
-            for part in response.parts:
-                if hasattr(part, 'text') and part.text:
-                    text_parts.append(part.text)
-            if text_parts:
-                content = ' '.join(text_parts).strip()
-        
-        if not content:
-            # Check if there's any error information
-            error_msg = "No text content in response"
-            if hasattr(response, 'candidates') and response.candidates:
-                for candidate in response.candidates:
-                    if hasattr(candidate, 'finish_reason'):
-                        error_msg += f" (finish_reason: {candidate.finish_reason})"
-                    if hasattr(candidate, 'safety_ratings'):
-                        error_msg += f" (safety_ratings: {candidate.safety_ratings})"
-            raise Exception(error_msg)
-            
+        content = client.generate(prompt, generation_config=generation_config, task="episodes")
     except Exception as e:
         error_msg = str(e)
         print(f"Error generating episodes: {error_msg}")
@@ -251,44 +198,204 @@ Requirements:
         
         raise Exception(f"Error generating episodes: {error_msg}")
     
-    # Try to extract JSON if wrapped in markdown code blocks
-    if content.startswith("```"):
-        content = content.split("```")[1]
-        if content.startswith("json"):
-            content = content[4:]
-        content = content.strip()
-    
-    try:
-        episodes = json.loads(content)
+    episodes = parse_json_array(content)
+    if episodes is not None:
         return episodes
-    except json.JSONDecodeError:
-        # Fallback: try to find JSON array in the response
-        import re
-        json_match = re.search(r'\[.*\]', content, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
-        # If all else fails, create a single episode
-        return [{
-            "title": f"{course_title} - Episode 1",
-            "summary": "AI-generated episode from lecture transcript",
-            "key_points": ["Key concept 1", "Key concept 2"],
-            "transcript": transcript[:1000] if len(transcript) > 1000 else transcript
-        }]
+    # If all else fails, create a single episode
+    return [{
+        "title": f"{course_title} - Episode 1",
+        "summary": "AI-generated episode from lecture transcript",
+        "key_points": ["Key concept 1", "Key concept 2"],
+        "transcript": transcript[:1000] if len(transcript) > 1000 else transcript
+    }]
+
+def chunk_sentences(sentences: list, max_chars: int) -> list:
+    """Group consecutive sentence indexes into chunks of at most max_chars characters"""
+    chunks = []
+    current = []
+    size = 0
+    for i, sentence in enumerate(sentences):
+        if current and size + len(sentence) + 1 > max_chars:
+            chunks.append(current)
+            current = []
+            size = 0
+        current.append(i)
+        size += len(sentence) + 1
+    if current:
+        chunks.append(current)
+    return chunks
+
+def segment_chunk(sentences: list, indexes: list, course_title: str) -> list:
+    """Map step: find topic sections in one chunk; returns [{"start", "title", "summary", "key_points"}]"""
+    numbered = "\n".join(f"[{i}] {sentences[i]}" for i in indexes)
+    prompt = f"""You are an educational content creator. This is part of a longer lecture transcript, with each sentence numbered.
+Split it into 1-3 sections that each cover one topic.
 
-def ask_ai_tutor(episode: dict, question: str) -> str:
-    """Generate AI tutor response based on episode content using Gemini"""
+Course: {course_title}
+
+Transcript part:
+{numbered}
+
+Return ONLY a JSON array, no markdown, no explanations:
+[
+  {{
+    "start": <number of the first sentence of the section>,
+    "title": "Topic name",
+    "summary": "1-2 sentence summary",
+    "key_points": ["Key point 1", "Key point 2"]
+  }}
+]
+"""
+    generation_config = {
+        "temperature": 0.4,
+        "top_p": 0.8,
+        "top_k": 40,
+        "max_output_tokens": 1024,
+    }
+    sections = None
     try:
-        transcript_text = episode.get('transcript', '')
-        if len(transcript_text) < 100:
-            transcript_text = f"{episode.get('summary', '')} {', '.join(episode.get('key_points', []))}"
-        
-        prompt = f"""
+        sections = parse_json_array(client.generate(prompt, generation_config=generation_config, task="episode_sections"))
+    except Exception as e:
+        print(f"Error segmenting transcript chunk {indexes[0]}-{indexes[-1]}: {str(e)}")
+
+    valid = []
+    for section in sections or []:
+        if isinstance(section, dict) and isinstance(section.get("start"), int) and indexes[0] <= section["start"] <= indexes[-1]:
+            valid.append(section)
+    if not valid:
+        # Fallback: the whole chunk becomes one untitled section
+        valid = [{"start": indexes[0], "title": "", "summary": "", "key_points": []}]
+    valid.sort(key=lambda section: section["start"])
+    valid[0]["start"] = indexes[0]
+    return valid
+
+def plan_episodes(sections: list, course_title: str, target_episodes: int) -> list:
+    """Reduce step: group contiguous sections into episodes; returns [{"title", "summary", "key_points", "sections"}]"""
+    outline = "\n".join(
+        f"Section {i}: {section.get('title', '')} - {section.get('summary', '')}"
+        for i, section in enumerate(sections)
+    )
+    prompt = f"""You are an educational content creator planning a Netflix-style series from a lecture.
+Below is an ordered outline of the lecture's sections. Group consecutive sections into {target_episodes} episodes (at least 4).
+Every section must belong to exactly one episode, in order.
+
+Course: {course_title}
+
+Outline:
+{outline}
+
+Return ONLY a JSON array, no markdown, no explanations:
+[
+  {{
+    "title": "Episode 1: [Topic Name]",
+    "summary": "Brief 2-3 sentence summary",
+    "key_points": ["Key point 1", "Key point 2", "Key point 3"],
+    "sections": [0, 1, 2]
+  }}
+]
+"""
+    generation_config = {
+        "temperature": 0.7,
+        "top_p": 0.8,
+        "top_k": 40,
+        "max_output_tokens": 4096,
+    }
+    try:
+        plan = parse_json_array(client.generate(prompt, generation_config=generation_config, task="episode_plan"))
+    except Exception as e:
+        print(f"Error planning episodes: {str(e)}")
+        plan = None
+
+    # Keep only episodes that name their sections, then accept the plan only if
+    # they cover every section exactly once, in order
+    if isinstance(plan, list):
+        plan = [
+            ep for ep in plan
+            if isinstance(ep, dict) and isinstance(ep.get("sections"), list) and ep["sections"]
+            and all(isinstance(i, int) and not isinstance(i, bool) and 0 <= i < len(sections) for i in ep["sections"])
+        ]
+        covered = [i for ep in plan for i in ep["sections"]]
+        if plan and covered == list(range(len(sections))):
+            return plan
+
+    # Fallback: split sections evenly
+    count = max(1, min(target_episodes, len(sections)))
+    size = -(-len(sections) // count)
+    plan = []
+    for n, start in enumerate(range(0, len(sections), size)):
+        group = list(range(start, min(start + size, len(sections))))
+        first = sections[group[0]]
+        plan.append({
+            "title": f"Episode {n + 1}: {first.get('title') or course_title}",
+            "summary": " ".join(sections[i].get("summary", "") for i in group).strip(),
+            "key_points": [kp for i in group for kp in sections[i].get("key_points", [])][:5],
+            "sections": group,
+        })
+    return plan
+
+def generate_episodes_map_reduce(transcript: str, course_title: str) -> list:
+    """Segment transcript chunks in parallel, then merge the sections into an episode plan"""
+    sentences = split_sentences(transcript, max_len=EPISODE_CHUNK_CHARS // 2)
+    chunks = chunk_sentences(sentences, EPISODE_CHUNK_CHARS)
+
+    # Priority and flight are thread-local: carry the caller's into the pool's threads
+    priority, flight = current_priority_override(), current_flight()
+
+    def segment(indexes):
+        with priority_override(priority), flight_scope(flight):
+            return segment_chunk(sentences, indexes, course_title)
+
+    with ThreadPoolExecutor(max_workers=EPISODE_MAP_CONCURRENCY) as pool:
+        chunk_sections = list(pool.map(segment, chunks))
+    sections = [section for group in chunk_sections for section in group]
+
+    # Sentence range of each section: from its start up to the next section's start
+    starts = [section["start"] for section in sections] + [len(sentences)]
+    section_text = [" ".join(sentences[starts[i]:starts[i + 1]]) for i in range(len(sections))]
+
+    # Roughly one episode per 15k characters, at least 4
+    target_episodes = max(4, min(EPISODE_MAX_COUNT, len(transcript) // 15000))
+    plan = plan_episodes(sections, course_title, target_episodes)
+    print(f"[EPISODES] {len(transcript)} chars -> {len(chunks)} chunks, {len(sections)} sections, {len(plan)} episodes")
+
+    return [
+        {
+            "title": ep.get("title", f"Episode {n + 1}"),
+            "summary": ep.get("summary", ""),
+            "key_points": ep.get("key_points", []),
+            "transcript": " ".join(section_text[i] for i in ep["sections"]),
+        }
+        for n, ep in enumerate(plan)
+    ]
+
+# Default question answered ahead of time for every new episode
+TUTOR_PRIMER_QUESTION = "Can you give me an overview of the main ideas in this episode?"
+
+# Add generation config for faster responses
+TUTOR_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.8,
+    "top_k": 40,
+    "max_output_tokens": 1024,
+}
+
+def episode_context(episode: dict) -> str:
+    """Transcript text for a prompt: retrieved passages when provided, else the opening 2000 chars"""
+    transcript_text = episode.get('transcript', '')
+    if len(transcript_text) < 100:
+        return f"{episode.get('summary', '')} {', '.join(episode.get('key_points', []))}"
+    return episode.get('context') or transcript_text[:2000]
+
+def build_tutor_prompt(episode: dict, question: str) -> str:
+    transcript_text = episode_context(episode)
+    
+    return f"""
 You are a friendly AI tutor helping a student understand this episode.
 
 Episode Title: {episode.get('title', 'Unknown')}
 Episode Summary: {episode.get('summary', '')}
 Key Points: {', '.join(episode.get('key_points', []))}
-Transcript: {transcript_text[:2000]}
+Transcript: {transcript_text}
 
 Student Question: {question}
 
@@ -297,57 +404,32 @@ Keep it conversational and educational. Only answer based on the episode content
 If the question is not related to the episode content, politely redirect the student to ask about the episode.
 """
 
-        # Add generation config for faster responses
-        generation_config = {
-            "temperature": 0.7,
-            "top_p": 0.8,
-            "top_k": 40,
-            "max_output_tokens": 1024,
-        }
-        
-        model_with_safety = genai.GenerativeModel(model_name, safety_settings=SAFETY_SETTINGS)
-        response = model_with_safety.generate_content(
-            prompt,
-            generation_config=generation_config
-        )
-        
-        # Handle different response formats from Gemini
-        if hasattr(response, 'text') and response.text:
-            return response.text.strip()
-        elif hasattr(response, 'candidates') and response.candidates:
-            # Extract text from candidates
-            text_parts = []
-            for candidate in response.candidates:
-                if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                    for part in candidate.content.parts:
-                        if hasattr(part, 'text'):
-                            text_parts.append(part.text)
-            if text_parts:
-                return ' '.join(text_parts).strip()
-        elif hasattr(response, 'parts'):
-            # Direct parts access
-            text_parts = []
-            for part in response.parts:
-                if hasattr(part, 'text'):
-                    text_parts.append(part.text)
-            if text_parts:
-                return ' '.join(text_parts).strip()
-        
-        # Fallback: try to get string representation
-        return str(response).strip()
+def ask_ai_tutor(episode: dict, question: str) -> str:
+    """Generate AI tutor response based on episode content using Gemini"""
+    try:
+        prompt = build_tutor_prompt(episode, question)
+        return client.generate(prompt, generation_config=TUTOR_GENERATION_CONFIG, task="tutor")
     except Exception as e:
         print(f"Error in ask_ai_tutor: {str(e)}")
         error_msg = str(e)
         if "timeout" in error_msg.lower() or "429" in error_msg:
-            return "The AI service is currently busy. Please try again in a moment."
-        return f"I apologize, but I encountered an error while processing your question. Please try again. Error: {error_msg[:100]}"
+            return TutorErrorAnswer("The AI service is currently busy. Please try again in a moment.")
+        return TutorErrorAnswer(f"I apologize, but I encountered an error while processing your question. Please try again. Error: {error_msg[:100]}")
+
+def generate_tutor_primer(episode: dict) -> str:
+    """Answer TUTOR_PRIMER_QUESTION ahead of time (errors propagate so failures aren't cached)"""
+    prompt = build_tutor_prompt(episode, TUTOR_PRIMER_QUESTION)
+    return client.generate(prompt, generation_config=TUTOR_GENERATION_CONFIG, task="tutor")
+
+def stream_ai_tutor(episode: dict, question: str):
+    """Stream the AI tutor response as text chunks (errors propagate to the caller)"""
+    prompt = build_tutor_prompt(episode, question)
+    return client.stream(prompt, generation_config=TUTOR_GENERATION_CONFIG, task="tutor")
 
 def generate_flashcards(episode: dict) -> list:
     """Generate flashcards for an episode using Gemini"""
     try:
-        transcript_text = episode.get('transcript', '')
-        if len(transcript_text) < 100:
-            transcript_text = f"{episode.get('summary', '')} {', '.join(episode.get('key_points', []))}"
+        transcript_text = episode_context(episode)
         
         prompt = f"""
 You are creating study flashcards for this episode.
@@ -355,7 +437,7 @@ You are creating study flashcards for this episode.
 Episode Title: {episode.get('title', 'Unknown')}
 Episode Summary: {episode.get('summary', '')}
 Key Points: {', '.join(episode.get('key_points', []))}
-Transcript: {transcript_text[:2000]}
+Transcript: {transcript_text}
 
 Create 8-10 concise flashcards that help students study this episode.
 Return ONLY a valid JSON array in this exact format:
@@ -381,63 +463,28 @@ Return ONLY the JSON array, no other text.
             "max_output_tokens": 2048,
         }
         
-        model_with_safety = genai.GenerativeModel(model_name, safety_settings=SAFETY_SETTINGS)
-        response = model_with_safety.generate_content(prompt, generation_config=generation_config)
-        
-        # Handle different response formats
-        if hasattr(response, 'text') and response.text:
-            content = response.text.strip()
-        elif hasattr(response, 'candidates') and response.candidates:
-            text_parts = []
-            for candidate in response.candidates:
-                if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                    for part in candidate.content.parts:
-                        if hasattr(part, 'text'):
-                            text_parts.append(part.text)
-            content = ' '.join(text_parts).strip() if text_parts else str(response)
-        else:
-            content = str(response).strip()
-        
-        # Extract JSON if wrapped in markdown
-        if content.startswith("```"):
-            parts = content.split("```")
-            if len(parts) > 1:
-                content = parts[1]
-                if content.startswith("json"):
-                    content = content[4:]
-            content = content.strip()
-        
-        try:
-            flashcards = json.loads(content)
-            if isinstance(flashcards, list) and len(flashcards) > 0:
-                return flashcards
-        except json.JSONDecodeError:
-            import re
-            json_match = re.search(r'\[.*\]', content, re.DOTALL)
-            if json_match:
-                flashcards = json.loads(json_match.group())
-                if isinstance(flashcards, list) and len(flashcards) > 0:
-                    return flashcards
+        content = client.generate(prompt, generation_config=generation_config, task="flashcards")
+        flashcards = parse_json_array(content)
+        if validate_flashcards(flashcards):
+            return flashcards
         
         # Fallback
-        return [
+        return FallbackList([
             {"front": "What is the main topic of this episode?", "back": episode.get('summary', 'N/A')},
             {"front": episode.get('key_points', [])[0] if episode.get('key_points') else "Key concept?", "back": episode.get('summary', 'N/A')}
-        ]
+        ])
     except Exception as e:
         print(f"Error generating flashcards: {str(e)}")
         # Return fallback flashcards
-        return [
+        return FallbackList([
             {"front": "What is the main topic?", "back": episode.get('summary', 'N/A')},
             {"front": "Key concept?", "back": episode.get('key_points', [])[0] if episode.get('key_points') else 'N/A'}
-        ]
+        ])
 
 def generate_quiz(episode: dict) -> list:
     """Generate quiz questions for an episode using Gemini"""
     try:
-        transcript_text = episode.get('transcript', '')
-        if len(transcript_text) < 100:
-            transcript_text = f"{episode.get('summary', '')} {', '.join(episode.get('key_points', []))}"
+        transcript_text = episode_context(episode)
         
         prompt = f"""
 You are creating a quiz for this episode.
@@ -445,7 +492,7 @@ You are creating a quiz for this episode.
 Episode Title: {episode.get('title', 'Unknown')}
 Episode Summary: {episode.get('summary', '')}
 Key Points: {', '.join(episode.get('key_points', []))}
-Transcript: {transcript_text[:2000]}
+Transcript: {transcript_text}
 
 Create 5 multiple choice questions that test understanding of this episode.
 Return ONLY a valid JSON array in this exact format:
@@ -475,66 +522,31 @@ Return ONLY the JSON array, no other text.
             "max_output_tokens": 2048,
         }
         
-        model_with_safety = genai.GenerativeModel(model_name, safety_settings=SAFETY_SETTINGS)
-        response = model_with_safety.generate_content(prompt, generation_config=generation_config)
-        
-        # Handle different response formats
-        if hasattr(response, 'text') and response.text:
-            content = response.text.strip()
-        elif hasattr(response, 'candidates') and response.candidates:
-            text_parts = []
-            for candidate in response.candidates:
-                if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                    for part in candidate.content.parts:
-                        if hasattr(part, 'text'):
-                            text_parts.append(part.text)
-            content = ' '.join(text_parts).strip() if text_parts else str(response)
-        else:
-            content = str(response).strip()
-        
-        # Extract JSON if wrapped in markdown
-        if content.startswith("```"):
-            parts = content.split("```")
-            if len(parts) > 1:
-                content = parts[1]
-                if content.startswith("json"):
-                    content = content[4:]
-            content = content.strip()
-        
-        try:
-            quiz = json.loads(content)
-            if isinstance(quiz, list) and len(quiz) > 0:
-                return quiz
-        except json.JSONDecodeError:
-            import re
-            json_match = re.search(r'\[.*\]', content, re.DOTALL)
-            if json_match:
-                quiz = json.loads(json_match.group())
-                if isinstance(quiz, list) and len(quiz) > 0:
-                    return quiz
+        content = client.generate(prompt, generation_config=generation_config, task="quiz")
+        quiz = parse_json_array(content)
+        if validate_quiz(quiz):
+            return quiz
         
         # Fallback
-        return [{
+        return FallbackList([{
             "question": "What is the main topic of this episode?",
             "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
             "correct_index": 0,
             "explanation": "Based on the episode summary."
-        }]
+        }])
     except Exception as e:
         print(f"Error generating quiz: {str(e)}")
-        return [{
+        return FallbackList([{
             "question": "What is the main topic of this episode?",
             "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
             "correct_index": 0,
             "explanation": "Based on the episode summary."
-        }]
+        }])
 
 def generate_slides(episode: dict) -> list:
     """Generate presentation slides for an episode using Gemini"""
     try:
-        transcript_text = episode.get('transcript', '')
-        if len(transcript_text) < 100:
-            transcript_text = f"{episode.get('summary', '')} {', '.join(episode.get('key_points', []))}"
+        transcript_text = episode_context(episode)
         
         prompt = f"""
 You are creating a presentation slide deck for this episode.
@@ -542,7 +554,7 @@ You are creating a presentation slide deck for this episode.
 Episode Title: {episode.get('title', 'Unknown')}
 Episode Summary: {episode.get('summary', '')}
 Key Points: {', '.join(episode.get('key_points', []))}
-Transcript: {transcript_text[:2000]}
+Transcript: {transcript_text}
 
 Create 6-8 presentation slides that teach this episode content.
 Return ONLY a valid JSON array in this exact format:
@@ -568,50 +580,71 @@ Return ONLY the JSON array, no other text.
             "max_output_tokens": 2048,
         }
         
-        model_with_safety = genai.GenerativeModel(model_name, safety_settings=SAFETY_SETTINGS)
-        response = model_with_safety.generate_content(prompt, generation_config=generation_config)
-        
-        # Handle different response formats
-        if hasattr(response, 'text') and response.text:
-            content = response.text.strip()
-        elif hasattr(response, 'candidates') and response.candidates:
-            text_parts = []
-            for candidate in response.candidates:
-                if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                    for part in candidate.content.parts:
-                        if hasattr(part, 'text'):
-                            text_parts.append(part.text)
-            content = ' '.join(text_parts).strip() if text_parts else str(response)
-        else:
-            content = str(response).strip()
-        
-        # Extract JSON if wrapped in markdown
-        if content.startswith("```"):
-            parts = content.split("```")
-            if len(parts) > 1:
-                content = parts[1]
-                if content.startswith("json"):
-                    content = content[4:]
-            content = content.strip()
-        
-        try:
-            slides = json.loads(content)
-            if isinstance(slides, list) and len(slides) > 0:
-                return slides
-        except json.JSONDecodeError:
-            import re
-            json_match = re.search(r'\[.*\]', content, re.DOTALL)
-            if json_match:
-                slides = json.loads(json_match.group())
-                if isinstance(slides, list) and len(slides) > 0:
-                    return slides
+        content = client.generate(prompt, generation_config=generation_config, task="slides")
+        slides = parse_json_array(content)
+        if validate_slides(slides):
+            return slides
         
         # Fallback
-        return [
+        return FallbackList([
             {"title": episode.get('title', 'Episode'), "bullets": episode.get('key_points', [])}
-        ]
+        ])
     except Exception as e:
         print(f"Error generating slides: {str(e)}")
-        return [
+        return FallbackList([
             {"title": episode.get('title', 'Episode'), "bullets": episode.get('key_points', [])}
-        ]
+        ])
+
+# One prompt section per study artifact, shared by the combined study-pack prompt
+STUDY_PACK_SECTIONS = {
+    "flashcards": """"flashcards": 8-10 concise flashcards, each {"front": "Question or term?", "back": "Answer or explanation."}""",
+    "quiz": """"quiz": 5 multiple choice questions, each {"question": "...", "options": ["A", "B", "C", "D"], "correct_index": 0, "explanation": "Why this is correct."}""",
+    "slides": """"slides": 6-8 presentation slides, each {"title": "Slide Title", "bullets": ["Point 1", "Point 2", "Point 3"]}""",
+}
+
+def generate_study_pack(episode: dict, parts: list = None) -> dict:
+    """Generate several study artifacts from one Gemini call.
+
+    Returns {part: list} for every requested part that passed validation;
+    parts that are missing or malformed are left out so the caller can
+    regenerate just those.
+    """
+    parts = parts or list(STUDY_PACK_SECTIONS)
+    transcript_text = episode_context(episode)
+    sections = "\n".join(f"- {STUDY_PACK_SECTIONS[part]}" for part in parts)
+    
+    prompt = f"""
+You are creating study materials for this episode.
+
+Episode Title: {episode.get('title', 'Unknown')}
+Episode Summary: {episode.get('summary', '')}
+Key Points: {', '.join(episode.get('key_points', []))}
+Transcript: {transcript_text}
+
+Return ONLY a valid JSON object with these keys:
+{sections}
+
+Return ONLY the JSON object, no other text.
+"""
+    
+    generation_config = {
+        "temperature": 0.7,
+        "top_p": 0.8,
+        "top_k": 40,
+        "max_output_tokens": 2048 * len(parts),
+    }
+    
+    try:
+        content = client.generate(prompt, generation_config=generation_config, task="study_pack")
+    except Exception as e:
+        print(f"Error generating study pack: {str(e)}")
+        return {}
+    
+    pack = parse_json_object(content) or {}
+    valid = {}
+    for part in parts:
+        if STUDY_VALIDATORS[part](pack.get(part)):
+            valid[part] = pack[part]
+        else:
+            print(f"[STUDY PACK] Invalid or missing '{part}' in combined response")
+    return valid
@@ -0,0 +1,111 @@
+import threading
+import time
+from datetime import date, timedelta
+
+# Event types
+WATCHED = "watched"
+QUIZ_SCORED = "quiz_scored"
+QUESTION_ASKED = "question_asked"
+LECTURE_UPLOADED = "lecture_uploaded"
+
+# Counters kept per user besides one per event type
+COURSES_COMPLETED = "courses_completed"
+COMPLETED_TODAY = "completed_today"
+ACTIVE_DAY = "active_day"  # local date ordinal of the latest watch, for the streak
+
+
+class Event:
+    """Something a user did that may unlock achievements"""
+
+    __slots__ = ("kind", "at", "score", "newly_watched", "course_completed")
+
+    def __init__(self, kind: str, at: float = None, score=None, newly_watched: bool = False, course_completed: bool = False):
+        self.kind = kind
+        self.at = time.time() if at is None else at
+        self.score = score                        # QUIZ_SCORED
+        self.newly_watched = newly_watched        # WATCHED: first watch of the episode
+        self.course_completed = course_completed  # WATCHED: that watch finished its course
+
+
+class Rule:
+    """Unlocks an achievement when check(record, event) holds after an event of one type"""
+
+    __slots__ = ("achievement_id", "event_kind", "check")
+
+    def __init__(self, achievement_id: str, event_kind: str, check):
+        self.achievement_id = achievement_id
+        self.event_kind = event_kind
+        self.check = check  # (ProgressRecord, Event) -> bool, evaluated after the counters are updated
+
+
+def at_least(counter: str, n: int):
+    """Rule check: the user's counter has reached n"""
+    return lambda record, event: record.counter(counter) >= n
+
+
+class AchievementEngine:
+    """Evaluates achievement rules against a stream of progress events.
+
+    Rules are indexed by event type, and each user's counters and streak are
+    updated as events arrive, so an event costs one counter update plus the
+    rules registered for its type; history is never rescanned. apply() only
+    touches the in-memory record; ProgressStore persists the result.
+    """
+
+    def __init__(self):
+        self._rules = {}  # event type -> [Rule, ...]
+        self._day = (0.0, 0.0, 0)  # local day of the last event seen: start, end (epoch seconds), ordinal
+        self._lock = threading.Lock()
+
+    def register(self, rules: list):
+        with self._lock:
+            for rule in rules:
+                self._rules.setdefault(rule.event_kind, []).append(rule)
+
+    def apply(self, record, event: Event) -> tuple:
+        """Count event against record and unlock what it earns: (unlocked achievement ids, counters changed)"""
+        changed = self._count(record, event)
+        unlocked = []
+        for rule in self._rules.get(event.kind, ()):
+            if not record.has_achievement(rule.achievement_id) and rule.check(record, event):
+                record.unlock(rule.achievement_id)
+                unlocked.append(rule.achievement_id)
+        return unlocked, changed
+
+    def _count(self, record, event: Event) -> bool:
+        if record.counters is None:
+            record.counters = {}
+        counters = record.counters
+        if event.kind != WATCHED:
+            counters[event.kind] = counters.get(event.kind, 0) + 1
+            return True
+
+        changed = False
+        day = self._day_of(event.at)
+        last_day = counters.get(ACTIVE_DAY, 0)
+        if day > last_day:
+            # First watch of a new day: extend the streak if yesterday was active, else restart it
+            record.binge_streak = record.binge_streak + 1 if last_day == day - 1 else 1
+            counters[ACTIVE_DAY] = day
+            counters[COMPLETED_TODAY] = 0
+            changed = True
+        if event.newly_watched:
+            counters[WATCHED] = counters.get(WATCHED, 0) + 1
+            changed = True
+        if event.course_completed:
+            counters[COURSES_COMPLETED] = counters.get(COURSES_COMPLETED, 0) + 1
+            if day == counters[ACTIVE_DAY]:
+                counters[COMPLETED_TODAY] += 1
+            changed = True
+        return changed
+
+    def _day_of(self, at: float) -> int:
+        """Local date ordinal; consecutive events mostly fall on the cached day"""
+        start, end, ordinal = self._day
+        if start <= at < end:
+            return ordinal
+        day = date.fromtimestamp(at)
+        start = time.mktime(day.timetuple())
+        end = time.mktime((day + timedelta(days=1)).timetuple())
+        self._day = (start, end, day.toordinal())
+        return day.toordinal()
@@ -0,0 +1,45 @@
+"""
+Replay throughput of the achievement engine on a synthetic event stream.
+
+Events are spread over users and days the way a busy catalog would see them;
+each event updates that user's counters and evaluates only the rules for
+its type.
+
+Usage: python bench_achievements.py [num_events] [num_users] [days]
+"""
+import random
+import sys
+import time
+
+from awards import Event, WATCHED, QUIZ_SCORED, QUESTION_ASKED, LECTURE_UPLOADED
+from progress import ProgressRecord
+from storage import achievement_engine
+
+
+def main():
+    num_events = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    num_users = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    days = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    rng = random.Random(7)
+    start_at = time.time() - days * 86400
+    kinds = [WATCHED] * 80 + [QUIZ_SCORED] * 12 + [QUESTION_ASKED] * 7 + [LECTURE_UPLOADED]
+    events = []
+    for i in range(num_events):
+        kind = rng.choice(kinds)
+        event = Event(kind, at=start_at + i * days * 86400 / num_events, score=rng.choice((60, 80, 100)),
+                      newly_watched=True, course_completed=kind == WATCHED and rng.random() < 0.1)
+        events.append((rng.randrange(num_users), event))
+
+    records = [ProgressRecord() for _ in range(num_users)]
+    unlocked = 0
+    start = time.perf_counter()
+    for user, event in events:
+        unlocked += len(achievement_engine.apply(records[user], event)[0])
+    elapsed = time.perf_counter() - start
+    print(f"{num_events} events, {num_users} users, {days} days: {elapsed:.2f}s "
+          f"({num_events / elapsed / 1e6:.2f}M events/s, {elapsed / num_events * 1e6:.2f} us/event), {unlocked} unlocks")
+    print(f"Longest streak: {max(r.binge_streak for r in records)} days")
+
+
+if __name__ == "__main__":
+    main()
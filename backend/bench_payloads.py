@@ -0,0 +1,128 @@
+"""
+Requests/second for GET /episode/{id} on a transcript-heavy episode:
+the previous per-request dict build + JSON encode versus pre-encoded bytes.
+
+Starts a single uvicorn worker (in-memory storage, fake LLM) in a subprocess
+and drives it with keep-alive client threads.
+
+Usage: python bench_payloads.py [seconds_per_case] [client_threads] [transcript_kb]
+"""
+import http.client
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+PORT = int(os.getenv("BENCH_PORT", "8765"))
+EPISODE_ID = "bench-ep1"
+
+
+def serve(transcript_kb: int):
+    os.environ.update(STORAGE_BACKEND="memory", LLM_BACKEND="fake", PREGENERATE_STUDY_MATERIALS="false")
+    import uvicorn
+    import main
+    from models import Course, Episode
+    from storage import episodes, put_catalog
+
+    @main.app.on_event("startup")
+    def add_bench_episode():
+        # Random words, so compression ratios resemble real speech rather than a repeated sentence
+        vocabulary = ("the gradient of loss with respect to each weight tells us which direction reduces error "
+                      "network layer activation function chain rule backward pass matrix vector update step learning "
+                      "rate batch training data model neuron output input bias sum product derivative local so we "
+                      "can see that this is why in practice you want a small value here and then").split()
+        rng = random.Random(7)
+        words = []
+        while sum(len(w) + 1 for w in words) < transcript_kb * 1024:
+            words.append(rng.choice(vocabulary) + ("." if rng.random() < 0.07 else ""))
+        transcript = " ".join(words)
+        ep = Episode(id=EPISODE_ID, course_id="bench", title="Backpropagation in depth", summary="How gradients flow backwards.",
+                     key_points=["Chain rule", "Local gradients", "Vectorized updates"], transcript=transcript)
+        put_catalog([Course(id="bench", title="Bench", subject="Bench", description="", episode_ids=[EPISODE_ID])], [ep])
+
+    @main.app.get("/bench/legacy-episode/{episode_id}")
+    def legacy_get_episode(episode_id: str):
+        """The handler before pre-encoding: split/rejoin the transcript and build a dict per request"""
+        ep = episodes[episode_id]
+        transcript = ep.transcript if ep.transcript else ""
+        if transcript and '\n' not in transcript and len(transcript) > 100:
+            sentences = transcript.split('. ')
+            formatted_transcript = '. '.join(sentences)
+        else:
+            formatted_transcript = transcript
+        return {
+            "id": ep.id,
+            "course_id": ep.course_id,
+            "title": ep.title,
+            "summary": ep.summary,
+            "key_points": ep.key_points,
+            "transcript": formatted_transcript
+        }
+
+    uvicorn.run(main.app, host="127.0.0.1", port=PORT, log_level="warning", access_log=False)
+
+
+def hammer(path: str, headers: dict, seconds: float, threads: int):
+    counts = [0] * threads
+    sizes = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(i):
+        conn = http.client.HTTPConnection("127.0.0.1", PORT)
+        while time.perf_counter() < deadline:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            sizes[i] = len(response.read())
+            counts[i] += 1
+        conn.close()
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return sum(counts) / seconds, max(sizes)
+
+
+def wait_for_server():
+    for _ in range(100):
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", PORT)
+            conn.request("GET", f"/episode/{EPISODE_ID}")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("benchmark server did not start")
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    transcript_kb = int(sys.argv[3]) if len(sys.argv) > 3 else 60
+    server = subprocess.Popen([sys.executable, __file__, "--serve", str(transcript_kb)])
+    try:
+        wait_for_server()
+        cases = [
+            ("before: dict + JSON per request", f"/bench/legacy-episode/{EPISODE_ID}", {}),
+            ("after: pre-encoded identity", f"/episode/{EPISODE_ID}", {}),
+            ("after: pre-encoded gzip", f"/episode/{EPISODE_ID}", {"Accept-Encoding": "gzip"}),
+            ("after: pre-encoded br", f"/episode/{EPISODE_ID}", {"Accept-Encoding": "br, gzip"}),
+        ]
+        print(f"{transcript_kb} KB transcript, {threads} client threads, {seconds:.0f}s per case")
+        for name, path, headers in cases:
+            rps, size = hammer(path, headers, seconds, threads)
+            print(f"  {name:<34} {rps:8.0f} req/s  {size / 1024:7.1f} KB/response")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--serve":
+        serve(int(sys.argv[2]))
+    else:
+        main()
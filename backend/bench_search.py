@@ -0,0 +1,72 @@
+"""
+Query latency benchmark for the full-text search index on a synthetic catalog.
+
+Usage: python bench_search.py [num_episodes] [transcript_words]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from models import Episode
+from search import SearchIndex, document_fields
+
+
+def synthetic_vocabulary(size: int) -> list:
+    rng = random.Random(7)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(3, 10))))
+    return sorted(words)
+
+
+def main():
+    num_episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    transcript_words = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    vocabulary = synthetic_vocabulary(50000)
+    # Zipf-like word frequencies, as in natural text
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+    rng = np.random.default_rng(7)
+    stream = iter(rng.choice(len(vocabulary), size=num_episodes * (transcript_words + 40) + 10000, p=weights / weights.sum()))
+
+    def words(n):
+        return " ".join(vocabulary[next(stream)] for _ in range(n))
+
+    episodes = [
+        Episode(id=f"ep{i}", course_id=f"c{i // 10}", title=words(5), summary=words(20), key_points=[words(4) for _ in range(3)], transcript=words(transcript_words))
+        for i in range(num_episodes)
+    ]
+    index = SearchIndex()
+    start = time.perf_counter()
+    for ep in episodes:
+        index.add("episode", ep.id, document_fields("episode", ep))
+    print(f"Indexed {num_episodes} episodes in {time.perf_counter() - start:.1f}s: {index.stats()}")
+
+    queries = [words(int(rng.integers(1, 4))) for _ in range(500)]
+    queries += [q[:max(2, len(q) - 3)] for q in queries[:200]]  # type-ahead prefixes
+    for q in queries[:50]:
+        index.search(q, 10)  # warm the per-term impact caches
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        index.search(q, 10)
+        latencies.append((time.perf_counter() - start) * 1000)
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"{len(queries)} queries: p50 {p50:.2f} ms, p99 {p99:.2f} ms, max {max(latencies):.2f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search_index.npz")
+        start = time.perf_counter()
+        index.save(path)
+        print(f"Snapshot saved in {time.perf_counter() - start:.2f}s ({os.path.getsize(path) / 1e6:.0f} MB)")
+        start = time.perf_counter()
+        SearchIndex().load(path)
+        print(f"Snapshot loaded in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Side-by-side benchmark of the memory and SQLite repositories.
+
+Usage: python bench_storage.py [num_courses] [episodes_per_course]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from models import Course, Episode, Question
+from repository import MemoryRepository, SQLiteRepository
+
+SUBJECTS = ["Computer Science", "Biology", "Mathematics", "History", "Physics"]
+
+
+def build_catalog(num_courses: int, episodes_per_course: int):
+    courses, episodes, questions = [], [], []
+    for c in range(num_courses):
+        course_id = f"course-{c}"
+        episode_ids = []
+        for e in range(episodes_per_course):
+            ep_id = f"{course_id}-ep{e}"
+            episodes.append(Episode(
+                id=ep_id,
+                course_id=course_id,
+                title=f"Episode {e}",
+                summary="A short summary of the episode.",
+                key_points=["Point one", "Point two", "Point three"],
+                transcript="Lorem ipsum dolor sit amet. " * 100
+            ))
+            questions.append(Question(id=f"{ep_id}-q", episode_id=ep_id, question_text="Why?", answer_text="Because." if e % 2 else None))
+            episode_ids.append(ep_id)
+        courses.append(Course(id=course_id, title=f"Course {c}", subject=SUBJECTS[c % len(SUBJECTS)], description="Benchmark course", episode_ids=episode_ids))
+    return courses, episodes, questions
+
+
+def timed(label: str, fn, repeat: int = 1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"  {label:<32} {elapsed * 1000:10.3f} ms")
+
+
+def bench(name: str, repo, courses, episodes, questions):
+    print(f"{name}:")
+    timed("save catalog (one batch)", lambda: repo.save_catalog(courses, episodes))
+    timed(f"save {len(questions)} questions", lambda: [repo.save_question(q) for q in questions])
+    ids = [e.id for e in episodes[::max(1, len(episodes) // 1000)]]
+    timed(f"get_episode x{len(ids)}", lambda: [repo.get_episode(i) for i in ids])
+    timed("courses_by_subject", lambda: repo.courses_by_subject("Biology"), repeat=20)
+    timed("episodes_by_course", lambda: repo.episodes_by_course(courses[len(courses) // 2].id), repeat=20)
+    timed("questions_by_episode", lambda: repo.questions_by_episode(ids[-1], answered=True), repeat=20)
+    timed("load_catalog (cold start)", repo.load_catalog)
+
+
+def main():
+    num_courses = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    episodes_per_course = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    courses, episodes, questions = build_catalog(num_courses, episodes_per_course)
+    print(f"{num_courses} courses, {len(episodes)} episodes, {len(questions)} questions\n")
+
+    bench("memory", MemoryRepository(), courses, episodes, questions)
+    with tempfile.TemporaryDirectory() as tmp:
+        bench("sqlite (WAL)", SQLiteRepository(os.path.join(tmp, "bench.db")), courses, episodes, questions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from retrieval import STOPWORDS, TOKEN_PATTERN
+
+# On-disk cache root (survives restarts; mount a volume here in production)
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(backend_dir, ".cache"))
+TRANSCRIPT_CACHE_MAX_BYTES = int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))  # 256 MB
+ARTIFACT_CACHE_MAX_ENTRIES = int(os.getenv("ARTIFACT_CACHE_MAX_ENTRIES", "2000"))
+ARTIFACT_DISK_MAX_ENTRIES = int(os.getenv("ARTIFACT_DISK_MAX_ENTRIES", "20000"))
+ARTIFACT_CACHE_TTL = int(os.getenv("ARTIFACT_CACHE_TTL", str(7 * 24 * 3600)))  # Seconds
+TUTOR_CACHE_PER_EPISODE = int(os.getenv("TUTOR_CACHE_PER_EPISODE", "64"))
+TUTOR_CACHE_MAX_EPISODES = int(os.getenv("TUTOR_CACHE_MAX_EPISODES", "5000"))
+TUTOR_CACHE_THRESHOLD = float(os.getenv("TUTOR_CACHE_THRESHOLD", "0.85"))  # Cosine similarity
+
+
+def _atomic_write(path: str, data: bytes):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class TranscriptCache:
+    """Content-addressed transcript store keyed by (audio sha256, model name).
+
+    One file per entry; when the directory grows past max_bytes the least
+    recently used entries are deleted. Files written by other workers are
+    adopted into the index the first time they are looked up.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = {}  # path -> [size, last_used]
+        self._total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if not name.endswith(".txt"):
+                continue
+            path = os.path.join(directory, name)
+            st = os.stat(path)
+            self._entries[path] = [st.st_size, st.st_mtime]
+            self._total_bytes += st.st_size
+
+    def _path(self, content_hash: str, model: str) -> str:
+        # Hash the key so model names can't produce unsafe file names
+        key = hashlib.sha256(f"{model}:{content_hash}".encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def get(self, content_hash: str, model: str):
+        path = self._path(content_hash, model)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                entry[1] = time.time()
+        if entry is None:
+            # Not in this process's index, but another worker may have written it
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                with self._lock:
+                    self.misses += 1
+                return None
+            with self._lock:
+                if path not in self._entries:
+                    self._entries[path] = [size, time.time()]
+                    self._total_bytes += size
+                    self._evict()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                transcript = f.read()
+        except OSError:
+            with self._lock:
+                self._forget(path)
+                self.misses += 1
+            return None
+        os.utime(path)
+        with self._lock:
+            self.hits += 1
+        return transcript
+
+    def put(self, content_hash: str, model: str, transcript: str):
+        path = self._path(content_hash, model)
+        data = transcript.encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+        _atomic_write(path, data)
+        with self._lock:
+            self._forget(path)
+            self._entries[path] = [len(data), time.time()]
+            self._total_bytes += len(data)
+            self._evict()
+
+    def _forget(self, path: str):
+        entry = self._entries.pop(path, None)
+        if entry:
+            self._total_bytes -= entry[0]
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        for path, _ in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._forget(path)
+            self.evictions += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def episode_content_hash(episode: dict) -> str:
+    """Stable hash of the episode fields that feed the study-material prompts"""
+    payload = json.dumps(
+        [episode.get("title", ""), episode.get("summary", ""), episode.get("key_points", []), episode.get("transcript", "")],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def artifact_key(episode: dict, artifact_type: str, prompt_version: str) -> str:
+    return f"{artifact_type}:{prompt_version}:{episode_content_hash(episode)}"
+
+
+class ArtifactCache:
+    """Two-tier cache for generated study materials (flashcards, quiz, slides).
+
+    An in-memory LRU sits in front of one JSON file per entry on disk, so
+    restarts only lose the hot tier. Entries expire after ttl seconds in
+    both tiers. Once the directory holds more than max_disk_entries files,
+    expired files and then the oldest are deleted down to 90% of the limit.
+    """
+
+    def __init__(self, directory: str, max_entries: int, ttl: int, max_disk_entries: int = ARTIFACT_DISK_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (created_at, value)
+        os.makedirs(directory, exist_ok=True)
+        # Approximate: other workers write here too, so sweeps recount from the directory
+        self._disk_entries = sum(1 for name in os.listdir(directory) if name.endswith(".json"))
+        if self._disk_entries > max_disk_entries:
+            self._sweep_disk()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            stored = None
+
+        with self._lock:
+            if stored is None or stored.get("key") != key or now - stored.get("created_at", 0) >= self.ttl:
+                self.misses += 1
+                if stored is not None:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                return None
+            self.disk_hits += 1
+            self._remember(key, stored["created_at"], stored["value"])
+            return stored["value"]
+
+    def put(self, key: str, value):
+        created_at = time.time()
+        data = json.dumps({"key": key, "created_at": created_at, "value": value}, ensure_ascii=False)
+        _atomic_write(self._path(key), data.encode("utf-8"))
+        with self._lock:
+            self._remember(key, created_at, value)
+            self._disk_entries += 1
+            over = self._disk_entries > self.max_disk_entries
+        if over:
+            self._sweep_disk()
+
+    def _sweep_disk(self):
+        """Delete expired files, then the oldest, until the directory is at 90% of max_disk_entries"""
+        if not self._sweep_lock.acquire(blocking=False):
+            return  # Another thread is already sweeping
+        try:
+            files = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".json"):
+                    try:
+                        files.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        pass
+            files.sort()
+            now = time.time()
+            keep = self.max_disk_entries * 9 // 10
+            removed = 0
+            for i, (mtime, path) in enumerate(files):
+                if len(files) - i <= keep and now - mtime < self.ttl:
+                    break
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+            with self._lock:
+                self._disk_entries = len(files) - removed
+                self.disk_evictions += removed
+        finally:
+            self._sweep_lock.release()
+
+    def _remember(self, key: str, created_at: float, value):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries_in_memory": len(self._memory),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_entries": self._disk_entries,
+                "max_disk_entries": self.max_disk_entries,
+                "disk_evictions": self.disk_evictions,
+            }
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.lower().split()).rstrip("?!. ")
+
+
+# Words that change what is being asked; dropped by the retrieval tokenizer, kept here
+INTENT_WORDS = {"how", "what", "when", "where", "which", "who", "why", "not", "no", "never", "without"}
+
+
+def question_terms(question: str) -> list:
+    """Unigrams plus bigrams, with a crude plural strip ("vectors" matches "vector")"""
+    # "n't" becomes "not"; the "s" left from "what's" or "it's" is dropped
+    words = [w for w in TOKEN_PATTERN.findall(question.lower().replace("n't", " not")) if w != "s"]
+    tokens = [
+        t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t
+        for t in words if t in INTENT_WORDS or t not in STOPWORDS
+    ]
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def question_intent(terms: list) -> frozenset:
+    """Interrogatives and negations in a question; questions only match if these agree"""
+    return frozenset(t for t in terms if t in INTENT_WORDS)
+
+
+class _EpisodeAnswers:
+    """Cached answers for one episode: a log-tf matrix over a growing per-episode vocabulary"""
+
+    def __init__(self, content_hash: str):
+        self.content_hash = content_hash
+        self.vocab = {}
+        self.matrix = np.zeros((0, 0), dtype=np.float32)  # rows: questions, cols: terms
+        self.questions = []  # normalized question per row
+        self.intents = []  # question_intent per row
+        self.answers = []
+        self.last_used = []
+        self.exact = {}  # normalized question -> row
+
+    def _vector(self, terms: list, grow: bool) -> tuple:
+        """(log-tf vector over the vocabulary, squared norm of the terms outside it)"""
+        if grow:
+            for term in terms:
+                if term not in self.vocab:
+                    self.vocab[term] = len(self.vocab)
+            if len(self.vocab) > self.matrix.shape[1]:
+                grown = np.zeros((self.matrix.shape[0], len(self.vocab)), dtype=np.float32)
+                grown[:, :self.matrix.shape[1]] = self.matrix
+                self.matrix = grown
+        vec = np.zeros(self.matrix.shape[1], dtype=np.float32)
+        unknown = {}
+        for term in terms:
+            col = self.vocab.get(term)
+            if col is not None:
+                vec[col] += 1
+            else:
+                unknown[term] = unknown.get(term, 0) + 1
+        outside = float(sum(np.log1p(count) ** 2 for count in unknown.values()))
+        return np.log1p(vec), outside
+
+    def best_match(self, terms: list):
+        """(row, cosine similarity) of the closest cached question asking the same kind of thing.
+
+        Terms no cached question contains still count toward the query's
+        norm, so extra words lower the similarity instead of being ignored.
+        """
+        intent = question_intent(terms)
+        rows = [i for i, other in enumerate(self.intents) if other == intent]
+        if not rows:
+            return None, 0.0
+        q, outside = self._vector(terms, grow=False)
+        q_norm = np.sqrt(float(q @ q) + outside)
+        if not q.any():
+            return None, 0.0
+        candidates = self.matrix[rows]
+        norms = np.linalg.norm(candidates, axis=1) * q_norm
+        sims = (candidates @ q) / np.where(norms == 0, 1, norms)
+        best = int(np.argmax(sims))
+        return rows[best], float(sims[best])
+
+    def add(self, normalized: str, terms: list, answer: str, capacity: int) -> bool:
+        """Store an answer; returns True if an older entry was evicted to make room"""
+        if normalized in self.exact:
+            row = self.exact[normalized]
+            self.answers[row] = answer
+            self.last_used[row] = time.time()
+            return False
+        evicted = False
+        if len(self.questions) >= capacity:
+            self._remove(int(np.argmin(self.last_used)))
+            evicted = True
+        vec, _ = self._vector(terms, grow=True)
+        self.matrix = np.vstack([self.matrix, vec[None, :]])
+        self.exact[normalized] = len(self.questions)
+        self.questions.append(normalized)
+        self.intents.append(question_intent(terms))
+        self.answers.append(answer)
+        self.last_used.append(time.time())
+        return evicted
+
+    def _remove(self, row: int):
+        self.matrix = np.delete(self.matrix, row, axis=0)
+        del self.questions[row], self.intents[row], self.answers[row], self.last_used[row]
+        self.exact = {q: i for i, q in enumerate(self.questions)}
+
+
+class TutorAnswerCache:
+    """Per-episode cache of AI tutor answers with near-duplicate question matching.
+
+    Questions are matched exactly after normalization, then by cosine
+    similarity against the episode's cached questions that have the same
+    interrogatives and negations. An episode's entries are dropped when its
+    content hash changes.
+    """
+
+    def __init__(self, per_episode: int, max_episodes: int, threshold: float):
+        self.per_episode = per_episode
+        self.max_episodes = max_episodes
+        self.threshold = threshold
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._episodes = OrderedDict()  # episode_id -> _EpisodeAnswers
+
+    def _bucket(self, episode_id: str, content_hash: str, create: bool):
+        bucket = self._episodes.get(episode_id)
+        if bucket is not None and bucket.content_hash != content_hash:
+            del self._episodes[episode_id]
+            self.invalidations += 1
+            bucket = None
+        if bucket is None and create:
+            bucket = _EpisodeAnswers(content_hash)
+            self._episodes[episode_id] = bucket
+            while len(self._episodes) > self.max_episodes:
+                self._episodes.popitem(last=False)
+                self.evictions += 1
+        if bucket is not None:
+            self._episodes.move_to_end(episode_id)
+        return bucket
+
+    def get(self, episode_id: str, content_hash: str, question: str):
+        normalized = normalize_question(question)
+        with self._lock:
+            bucket = self._bucket(episode_id, content_hash, create=False)
+            if bucket is None:
+                self.misses += 1
+                return None
+            row = bucket.exact.get(normalized)
+            if row is not None:
+                self.exact_hits += 1
+            else:
+                row, similarity = bucket.best_match(question_terms(normalized))
+                if row is None or similarity < self.threshold:
+                    self.misses += 1
+                    return None
+                self.similar_hits += 1
+            bucket.last_used[row] = time.time()
+            return bucket.answers[row]
+
+    def put(self, episode_id: str, content_hash: str, question: str, answer: str):
+        normalized = normalize_question(question)
+        with self._lock:
+            bucket = self._bucket(episode_id, content_hash, create=True)
+            if bucket.add(normalized, question_terms(normalized), answer, self.per_episode):
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.exact_hits + self.similar_hits
+            lookups = hits + self.misses
+            return {
+                "episodes": len(self._episodes),
+                "entries": sum(len(b.questions) for b in self._episodes.values()),
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "threshold": self.threshold,
+            }
+
+
+transcript_cache = TranscriptCache(os.path.join(CACHE_DIR, "transcripts"), TRANSCRIPT_CACHE_MAX_BYTES)
+artifact_cache = ArtifactCache(os.path.join(CACHE_DIR, "artifacts"), ARTIFACT_CACHE_MAX_ENTRIES, ARTIFACT_CACHE_TTL)
+tutor_answer_cache = TutorAnswerCache(TUTOR_CACHE_PER_EPISODE, TUTOR_CACHE_MAX_EPISODES, TUTOR_CACHE_THRESHOLD)
@@ -0,0 +1,48 @@
+import json
+import threading
+
+
+def _dumps(value) -> bytes:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class FeedSnapshot:
+    """The catalog half of the home feed: subject rows of course cards, serialized once.
+
+    Catalog writes call invalidate(); the next request rebuilds it. Per-user
+    progress is small and is overlaid on each request, so one snapshot
+    serves every user.
+    """
+
+    def __init__(self, build_rows):
+        self.build_rows = build_rows  # () -> [{"subject": ..., "courses": [card, ...]}, ...]
+        self.version = 0
+        self._lock = threading.Lock()
+        self._built = None  # (version, cards by course id, serialized rows)
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._built = None
+
+    def get(self):
+        """(version, cards by course id, rows as JSON bytes), rebuilding after a write"""
+        built = self._built
+        if built is not None:
+            return built
+        version = self.version
+        rows = self.build_rows()
+        cards = {card["id"]: card for row in rows for card in row["courses"]}
+        built = (version, cards, _dumps(rows))
+        with self._lock:
+            # Only publish if no write landed while building; otherwise rebuild next time
+            if self.version == version:
+                self._built = built
+        return built
+
+    @staticmethod
+    def render(snapshot: tuple, user_feed: dict) -> bytes:
+        """Feed response body: the snapshot's rows plus the caller's per-user fields"""
+        version, _, rows = snapshot
+        user_json = _dumps({"version": version, **user_feed})
+        return b'{"subjects":' + rows + b"," + user_json[1:]
@@ -0,0 +1,125 @@
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Dict, Optional
+
+from models import Course, Question, User
+
+
+def subject_key(subject: str) -> str:
+    return " ".join(subject.split()).casefold()
+
+
+def sort_key(item) -> tuple:
+    """Stable listing order: creation time, then id. Both are stored with the entity, so every worker agrees."""
+    return (item.created_at, item.id)
+
+
+class SortedIds:
+    """Ids kept sorted by sort_key, so a page resumes after a cursor with one binary search"""
+
+    __slots__ = ("keys",)
+
+    def __init__(self):
+        self.keys = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key: tuple):
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            # New items sort last, so this is almost always an append
+            self.keys.insert(i, key)
+
+    def remove(self, key: tuple):
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+
+    def ids(self) -> list:
+        return [key[1] for key in self.keys]
+
+    def page(self, after: Optional[tuple], limit: int) -> tuple:
+        """(ids of up to `limit` items after the `after` key, key to resume from or None at the end)"""
+        start = bisect_right(self.keys, after) if after is not None else 0
+        chunk = self.keys[start:start + limit]
+        next_after = chunk[-1] if chunk and start + limit < len(self.keys) else None
+        return [key[1] for key in chunk], next_after
+
+
+_EMPTY = SortedIds()
+
+
+class CatalogIndexes:
+    """Secondary indexes over the storage hot caches, updated on every write.
+
+    Listings are SortedIds in (created_at, id) order, so they page with a
+    cursor. Reads return copies, so callers never iterate a list another
+    thread is updating.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.subject_courses: Dict[str, SortedIds] = {}  # subject key -> course ids
+        self.subject_names: Dict[str, str] = {}  # subject key -> display name
+        self.answered_questions: Dict[str, SortedIds] = {}  # episode_id -> answered question ids
+        self.unanswered_questions = SortedIds()
+        self.user_emails: Dict[str, str] = {}  # user id -> email
+
+    def on_course(self, previous: Course, course: Course):
+        with self._lock:
+            if previous is not None:
+                key = subject_key(previous.subject)
+                members = self.subject_courses.get(key, _EMPTY)
+                members.remove(sort_key(previous))
+                if not members:
+                    self.subject_courses.pop(key, None)
+                    self.subject_names.pop(key, None)
+            if course is not None:
+                key = subject_key(course.subject)
+                self.subject_courses.setdefault(key, SortedIds()).add(sort_key(course))
+                self.subject_names.setdefault(key, course.subject)
+
+    def on_question(self, previous: Question, question: Question):
+        with self._lock:
+            if previous is not None:
+                self.unanswered_questions.remove(sort_key(previous))
+                answered = self.answered_questions.get(previous.episode_id, _EMPTY)
+                answered.remove(sort_key(previous))
+                if not answered:
+                    self.answered_questions.pop(previous.episode_id, None)
+            if question is not None:
+                if question.answer_text:
+                    self.answered_questions.setdefault(question.episode_id, SortedIds()).add(sort_key(question))
+                else:
+                    self.unanswered_questions.add(sort_key(question))
+
+    def on_user(self, previous: User, user: User):
+        with self._lock:
+            if previous is not None:
+                self.user_emails.pop(previous.id, None)
+            if user is not None:
+                self.user_emails[user.id] = user.email
+
+    def subjects(self) -> list:
+        with self._lock:
+            return list(self.subject_names.values())
+
+    def course_ids_for_subject(self, subject: str) -> list:
+        with self._lock:
+            return self.subject_courses.get(subject_key(subject), _EMPTY).ids()
+
+    def subject_course_page(self, subject: str, after: Optional[tuple], limit: int) -> tuple:
+        with self._lock:
+            return self.subject_courses.get(subject_key(subject), _EMPTY).page(after, limit)
+
+    def answered_question_page(self, episode_id: str, after: Optional[tuple], limit: int) -> tuple:
+        with self._lock:
+            return self.answered_questions.get(episode_id, _EMPTY).page(after, limit)
+
+    def unanswered_question_page(self, after: Optional[tuple], limit: int) -> tuple:
+        with self._lock:
+            return self.unanswered_questions.page(after, limit)
+
+    def user_email(self, user_id: str):
+        return self.user_emails.get(user_id)
@@ -0,0 +1,177 @@
+import hashlib
+import os
+import uuid
+
+import multipart
+from multipart.multipart import parse_options_header
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+# Streaming upload settings - peak memory per upload is about one chunk, whatever the file size
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # 1 MB
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(2 * 1024 * 1024 * 1024)))  # 2 GB
+# Room for the text fields and multipart framing on top of the file itself
+MAX_FORM_OVERHEAD_BYTES = 64 * 1024
+
+ALLOWED_MIME_PREFIXES = ("audio/", "video/")
+# Browsers send application/octet-stream for some containers, so fall back to the extension
+ALLOWED_EXTENSIONS = {
+    ".mp3", ".wav", ".m4a", ".aac", ".ogg", ".flac", ".webm",
+    ".mp4", ".mov", ".mkv", ".avi", ".mpeg", ".mpg",
+}
+
+
+def too_large(size: int = None) -> HTTPException:
+    shown = f" ({size / 1024 / 1024:.0f} MB)" if size is not None else ""
+    return HTTPException(status_code=413, detail=f"File too large{shown}. Maximum is {MAX_UPLOAD_BYTES / 1024 / 1024:.0f} MB.")
+
+
+def check_content_length(request: Request):
+    """Reject a body whose declared length is over the cap, before any of it is read"""
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > MAX_UPLOAD_BYTES + MAX_FORM_OVERHEAD_BYTES:
+        raise too_large(int(declared))
+
+
+def validate_upload(filename: str, content_type: str):
+    """Reject files that are not audio or video, by MIME type or extension"""
+    content_type = (content_type or "").lower()
+    suffix = os.path.splitext(filename or "")[1].lower()
+    if not content_type.startswith(ALLOWED_MIME_PREFIXES) and suffix not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported file type '{content_type or suffix}'. Please upload an audio or video file."
+        )
+
+
+class LectureUpload:
+    """A multipart lecture upload as received: its text fields, and its one file already on disk"""
+
+    def __init__(self, dest_dir: str):
+        self.dest_dir = dest_dir
+        self.fields = {}
+        self.filename = None
+        self.content_type = ""
+        self.path = None
+        self.size = 0
+        self.sha256 = None
+
+        self._hasher = hashlib.sha256()
+        self._file = None
+        self._pending = []  # file bytes parsed but not yet written
+        self._pending_bytes = 0
+        self._form_bytes = 0
+        self._headers = {}
+        self._header_name = b""
+        self._header_value = b""
+        self._field = None  # name of the text field being read, None while in the file part
+        self._field_data = b""
+
+    # python-multipart callbacks; they run inside parser.write(), so they only buffer
+
+    def on_part_begin(self):
+        self._headers = {}
+        self._field = None
+        self._field_data = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" not in options:
+            self._field = name
+            return
+        if self.path is not None:
+            raise HTTPException(status_code=400, detail="Upload one file at a time.")
+        # Checked before any of the file's bytes are read
+        self.filename = options[b"filename"].decode("utf-8", "replace")
+        self.content_type = self._headers.get(b"content-type", b"").decode("latin-1")
+        validate_upload(self.filename, self.content_type)
+        suffix = os.path.splitext(self.filename)[1] or ".mp3"
+        self.path = os.path.join(self.dest_dir, f"{uuid.uuid4()}{suffix}")
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._field is not None:
+            self._form_bytes += end - start
+            if self._form_bytes > MAX_FORM_OVERHEAD_BYTES:
+                raise HTTPException(status_code=413, detail="Form fields too large.")
+            self._field_data += data[start:end]
+            return
+        self.size += end - start
+        if self.size > MAX_UPLOAD_BYTES:
+            raise too_large()
+        self._pending.append(data[start:end])
+        self._pending_bytes += end - start
+
+    def on_part_end(self):
+        if self._field is not None:
+            self.fields[self._field] = self._field_data.decode("utf-8", "replace")
+
+    def _write(self, data: bytes):
+        if self._file is None:
+            self._file = open(self.path, "wb")
+        self._hasher.update(data)
+        self._file.write(data)
+
+    async def _flush(self):
+        if self._pending:
+            data = b"".join(self._pending)
+            self._pending, self._pending_bytes = [], 0
+            await run_in_threadpool(self._write, data)
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        self._close()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+    async def receive(self, request: Request):
+        """Parse the request body as it arrives, writing the file in UPLOAD_CHUNK_SIZE pieces off the event loop.
+
+        Raises 413 as soon as the file passes MAX_UPLOAD_BYTES and 415 as soon
+        as its part headers show it is not audio or video; the partial file is removed.
+        """
+        check_content_length(request)
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload.")
+        parser = multipart.MultipartParser(params[b"boundary"], {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        })
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                if self._pending_bytes >= UPLOAD_CHUNK_SIZE:
+                    await self._flush()
+            parser.finalize()
+            await self._flush()
+            if self.path is None:
+                raise HTTPException(status_code=422, detail="No file uploaded.")
+            if self._file is None:
+                await run_in_threadpool(self._write, b"")  # empty file
+            await run_in_threadpool(self._close)
+        except BaseException:
+            await run_in_threadpool(self.discard)
+            raise
+        self.sha256 = self._hasher.hexdigest()
+        return self
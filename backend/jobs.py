@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from models import Job, JobStage
+from storage import repository
+
+# Background worker pool for long-running pipelines (transcription, episode generation).
+# Runs outside the event loop so uploads never block catalog or tutor traffic.
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "2"))
+# How many finished jobs to keep around for status lookups
+MAX_FINISHED_JOBS = int(os.getenv("MAX_FINISHED_JOBS", "500"))
+
+# Separate, smaller pool for low-priority pre-generation so it never delays ingest
+PREGEN_WORKERS = int(os.getenv("PREGEN_WORKERS", "2"))
+
+executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="job-worker")
+pregen_executor = ThreadPoolExecutor(max_workers=PREGEN_WORKERS, thread_name_prefix="pregen-worker")
+
+# Jobs run by this process; snapshots are also written to the repository so any
+# worker can answer status polls
+jobs: Dict[str, Job] = {}
+# (kind, course_id) -> most recent job id
+latest_course_jobs: Dict[tuple, str] = {}
+_jobs_lock = threading.Lock()
+
+
+def _persist(job: Job):
+    try:
+        repository.save_job(job)
+    except Exception as e:
+        print(f"[JOBS] Could not save job {job.id}: {str(e)}")
+
+
+class JobContext:
+    """Handle passed to a job function for reporting stage progress"""
+
+    def __init__(self, job: Job):
+        self.job = job
+
+    def stage(self, name: str):
+        """Context manager that marks a stage as running, then completed/failed"""
+        return _StageTimer(self.job, name)
+
+
+class _StageTimer:
+    def __init__(self, job: Job, name: str):
+        self.job = job
+        self.stage = next((s for s in job.stages if s.name == name), None)
+        if self.stage is None:
+            self.stage = JobStage(name=name)
+            job.stages.append(self.stage)
+
+    def __enter__(self):
+        self.stage.status = "running"
+        self.stage.started_at = time.time()
+        self.job.stage = self.stage.name
+        _persist(self.job)
+        return self.stage
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stage.finished_at = time.time()
+        self.stage.duration = round(self.stage.finished_at - self.stage.started_at, 3)
+        self.stage.status = "failed" if exc_type else "completed"
+        done = sum(1 for s in self.job.stages if s.status == "completed")
+        self.job.progress = round(done / len(self.job.stages) * 100, 1)
+        _persist(self.job)
+        return False
+
+
+def create_job(kind: str, stages: List[str], course_id: str = None) -> Job:
+    """Register a new queued job with the given stage names"""
+    job = Job(
+        id=str(uuid.uuid4()),
+        kind=kind,
+        course_id=course_id,
+        stages=[JobStage(name=name) for name in stages],
+        created_at=time.time()
+    )
+    with _jobs_lock:
+        jobs[job.id] = job
+        if course_id:
+            latest_course_jobs[(kind, course_id)] = job.id
+        _prune_finished_jobs()
+    _persist(job)
+    return job
+
+
+def submit_job(job: Job, fn, *args, pool: ThreadPoolExecutor = None, **kwargs) -> Job:
+    """Run fn(ctx, *args, **kwargs) on the worker pool; its return value becomes job.result"""
+    def run():
+        job.status = "running"
+        job.started_at = time.time()
+        _persist(job)
+        try:
+            job.result = fn(JobContext(job), *args, **kwargs)
+            job.status = "completed"
+            job.progress = 100.0
+        except Exception as e:
+            print(f"[JOBS] Job {job.id} ({job.kind}) failed: {str(e)}")
+            print(traceback.format_exc())
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.stage = None
+            job.finished_at = time.time()
+            _persist(job)
+
+    (pool or executor).submit(run)
+    return job
+
+
+def get_job(job_id: str):
+    # Jobs started by another worker are only in the repository
+    return jobs.get(job_id) or repository.get_job(job_id)
+
+
+def get_course_job(kind: str, course_id: str):
+    job_id = latest_course_jobs.get((kind, course_id))
+    return jobs.get(job_id) if job_id else repository.latest_course_job(kind, course_id)
+
+
+def _prune_finished_jobs():
+    finished = [j for j in jobs.values() if j.status in ("completed", "failed")]
+    if len(finished) <= MAX_FINISHED_JOBS:
+        return
+    finished.sort(key=lambda j: j.finished_at or 0)
+    for j in finished[:len(finished) - MAX_FINISHED_JOBS]:
+        del jobs[j.id]
+        if j.course_id and latest_course_jobs.get((j.kind, j.course_id)) == j.id:
+            del latest_course_jobs[(j.kind, j.course_id)]
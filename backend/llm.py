@@ -0,0 +1,373 @@
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from dotenv import load_dotenv
+from scheduler import scheduler, estimate_tokens, current_priority_override, current_flight, INTERACTIVE, STANDARD, BACKGROUND
+
+# Load environment variables - explicitly load from backend directory
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+env_path = os.path.join(backend_dir, '.env')
+
+# Try multiple ways to load the .env file
+if os.path.exists(env_path):
+    load_dotenv(env_path, override=True)
+    print(f"[ENV] Loaded .env from: {env_path}")
+else:
+    print(f"[ENV] .env not found at: {env_path}, trying current directory")
+    load_dotenv(override=True)
+
+# Also try loading from current directory as fallback
+load_dotenv(override=True)
+
+# "gemini" (default) or "fake" for offline load testing without quota
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+# Use the working model name (tested and confirmed)
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", 'gemini-2.5-flash-preview-05-20')
+# Simulated per-call latency for the fake backend, to make load tests realistic
+FAKE_LLM_LATENCY_MS = int(os.getenv("FAKE_LLM_LATENCY_MS", "0"))
+
+
+def load_gemini_key() -> str:
+    gemini_key = os.getenv("GEMINI_API_KEY")
+
+    # If still not found, try reading directly from .env file
+    if not gemini_key and os.path.exists(env_path):
+        try:
+            with open(env_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#') and 'GEMINI_API_KEY' in line:
+                        if '=' in line:
+                            gemini_key = line.split('=', 1)[1].strip().strip('"').strip("'").strip()
+                            if gemini_key:
+                                print("[ENV] Loaded GEMINI_API_KEY directly from .env file")
+                                # Set it in environment for future use
+                                os.environ['GEMINI_API_KEY'] = gemini_key
+                                break
+        except Exception as e:
+            print(f"[ENV] Error reading .env directly: {e}")
+
+    if not gemini_key or len(gemini_key) < 10:
+        raise ValueError(f"GEMINI_API_KEY not found in environment variables. Please set it in .env file. Current value: {gemini_key[:10] if gemini_key else 'None'}...")
+    return gemini_key
+
+
+def extract_text(response) -> str:
+    """Pull the generated text out of a Gemini response.
+
+    Raises if the response has no text, including the block reason when the
+    candidate was stopped by safety/recitation filters.
+    """
+    candidates = getattr(response, 'candidates', None) or []
+    text_parts = []
+    for candidate in candidates:
+        content = getattr(candidate, 'content', None)
+        for part in getattr(content, 'parts', None) or []:
+            text = getattr(part, 'text', None)
+            if text:
+                text_parts.append(text)
+    if text_parts:
+        return ' '.join(text_parts).strip()
+
+    for candidate in candidates:
+        finish_reason = getattr(candidate, 'finish_reason', None)
+        if finish_reason == 2:  # SAFETY (blocked)
+            raise Exception("Content was blocked by safety filters. Please try with different content or adjust the prompt.")
+        elif finish_reason == 3:  # RECITATION (copyright)
+            raise Exception("Content was blocked due to potential copyright issues.")
+        elif finish_reason == 4:  # OTHER
+            raise Exception("Content generation was stopped for an unknown reason.")
+
+    error_msg = "No text content in response"
+    for candidate in candidates:
+        if hasattr(candidate, 'finish_reason'):
+            error_msg += f" (finish_reason: {candidate.finish_reason})"
+        if hasattr(candidate, 'safety_ratings'):
+            error_msg += f" (safety_ratings: {candidate.safety_ratings})"
+    raise Exception(error_msg)
+
+
+# Default scheduler priority per task; callers can override (e.g. background pre-generation)
+TASK_PRIORITIES = {
+    "tutor": INTERACTIVE,
+    "flashcards": STANDARD,
+    "quiz": STANDARD,
+    "slides": STANDARD,
+    "study_pack": STANDARD,
+    "episodes": BACKGROUND,
+    "episode_sections": BACKGROUND,
+    "episode_plan": BACKGROUND,
+    "transcribe": BACKGROUND,
+}
+
+
+class LLMBackend:
+    """Interface every model backend implements.
+
+    task names the kind of request ("transcribe", "episodes", "tutor",
+    "flashcards", "quiz", "slides") so backends can meter or fake it.
+    Subclasses implement _generate/_transcribe; the public methods route
+    every call through the outbound scheduler.
+    """
+
+    model_name = "unknown"
+
+    def generate(self, prompt, generation_config: dict = None, task: str = "generic", priority: int = None) -> str:
+        if priority is None:
+            priority = current_priority_override()
+        if priority is None:
+            priority = TASK_PRIORITIES.get(task, STANDARD)
+        return scheduler.run(
+            lambda: self._generate(prompt, generation_config, task),
+            priority=priority,
+            est_tokens=estimate_tokens(prompt, generation_config),
+            default=TASK_PRIORITIES.get(task, STANDARD),
+            flight=current_flight()
+        )
+
+    def stream(self, prompt, generation_config: dict = None, task: str = "generic", priority: int = None):
+        """Yield text chunks as they are generated.
+
+        Admission and rate-limit retries happen before the first chunk is
+        returned; closing the generator stops consuming the model stream.
+        """
+        if priority is None:
+            priority = current_priority_override()
+        if priority is None:
+            priority = TASK_PRIORITIES.get(task, STANDARD)
+
+        def start():
+            chunks = self._stream(prompt, generation_config, task)
+            # Pull the first chunk inside the scheduler so 429s on connect are retried
+            return chunks, next(chunks, None)
+
+        chunks, first = scheduler.run(start, priority=priority, est_tokens=estimate_tokens(prompt, generation_config),
+                                      default=TASK_PRIORITIES.get(task, STANDARD), flight=current_flight())
+        try:
+            if first is None:
+                return
+            yield first
+            for chunk in chunks:
+                yield chunk
+        finally:
+            chunks.close()
+
+    def transcribe(self, file_path: str, prompt: str) -> str:
+        return self._transcribe(file_path, prompt)
+
+    def _generate(self, prompt, generation_config: dict, task: str) -> str:
+        raise NotImplementedError
+
+    def _stream(self, prompt, generation_config: dict, task: str):
+        # Backends without native streaming return the whole answer as one chunk
+        yield self._generate(prompt, generation_config, task)
+
+    def _transcribe(self, file_path: str, prompt: str) -> str:
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    """Gemini via google-generativeai, with one long-lived model handle"""
+
+    def __init__(self, model_name: str):
+        import google.generativeai as genai
+        import google.generativeai.types as genai_types
+
+        gemini_key = load_gemini_key()
+        genai.configure(api_key=gemini_key)
+        self.genai = genai
+        self.model_name = model_name
+
+        # Safety settings - disable all blocking for demo/educational purposes
+        self.safety_settings = [
+            {
+                "category": genai_types.HarmCategory.HARM_CATEGORY_HARASSMENT,
+                "threshold": genai_types.HarmBlockThreshold.BLOCK_NONE
+            },
+            {
+                "category": genai_types.HarmCategory.HARM_CATEGORY_HATE_SPEECH,
+                "threshold": genai_types.HarmBlockThreshold.BLOCK_NONE
+            },
+            {
+                "category": genai_types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
+                "threshold": genai_types.HarmBlockThreshold.BLOCK_NONE
+            },
+            {
+                "category": genai_types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
+                "threshold": genai_types.HarmBlockThreshold.BLOCK_NONE
+            },
+        ]
+        self.model = genai.GenerativeModel(model_name, safety_settings=self.safety_settings)
+
+        print(f"[GEMINI] Using Gemini API for all AI operations (Model: {model_name}, Key: {gemini_key[:20]}...)")
+        print(f"[GEMINI] Safety filters disabled for demo purposes")
+
+    def _generate(self, prompt, generation_config: dict, task: str) -> str:
+        response = self.model.generate_content(prompt, generation_config=generation_config)
+        return extract_text(response)
+
+    def _stream(self, prompt, generation_config: dict, task: str):
+        response = self.model.generate_content(prompt, generation_config=generation_config, stream=True)
+        for chunk in response:
+            text = ''.join(
+                getattr(part, 'text', '') or ''
+                for candidate in (getattr(chunk, 'candidates', None) or [])
+                for part in (getattr(getattr(candidate, 'content', None), 'parts', None) or [])
+            )
+            if text:
+                yield text
+
+    def _transcribe(self, file_path: str, prompt: str) -> str:
+        # Upload audio file to Gemini
+        audio_file = self.genai.upload_file(path=file_path)
+        try:
+            # Wait for file to be processed
+            while audio_file.state.name == "PROCESSING":
+                time.sleep(2)
+                audio_file = self.genai.get_file(audio_file.name)
+
+            if audio_file.state.name == "FAILED":
+                raise Exception("File processing failed")
+
+            return self.generate([prompt, audio_file], task="transcribe")
+        finally:
+            # Clean up uploaded file
+            try:
+                self.genai.delete_file(audio_file.name)
+            except Exception:
+                pass  # Ignore cleanup errors
+
+
+FAKE_TOPICS = [
+    "gradient descent", "linear regression", "supply and demand", "cell division",
+    "the chain rule", "binary search", "thermodynamics", "opportunity cost",
+    "photosynthesis", "recursion", "hash tables", "eigenvectors",
+]
+
+
+class FakeBackend(LLMBackend):
+    """Deterministic local backend for offline benchmarks and load tests.
+
+    Output is seeded from the prompt, so the same request always yields the
+    same (well-formed) response.
+    """
+
+    model_name = "fake"
+
+    def __init__(self, latency_ms: int = 0):
+        self.latency_ms = latency_ms
+        print(f"[LLM] Using fake LLM backend (latency: {latency_ms}ms)")
+
+    def _rng(self, seed_text: str) -> random.Random:
+        return random.Random(hashlib.sha256(seed_text.encode("utf-8")).hexdigest())
+
+    def _sleep(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def _sentences(self, rng: random.Random, count: int) -> list:
+        return [
+            f"In this part we look at {rng.choice(FAKE_TOPICS)} and how it relates to {rng.choice(FAKE_TOPICS)}."
+            for _ in range(count)
+        ]
+
+    def _generate(self, prompt, generation_config: dict, task: str) -> str:
+        self._sleep()
+        prompt_text = prompt if isinstance(prompt, str) else " ".join(p for p in prompt if isinstance(p, str))
+        rng = self._rng(prompt_text)
+        title_match = re.search(r"(?:Episode Title|Course): (.+)", prompt_text)
+        title = title_match.group(1).strip() if title_match else "Lecture"
+
+        if task == "episodes":
+            return json.dumps([
+                {
+                    "title": f"Episode {i + 1}: {rng.choice(FAKE_TOPICS).title()}",
+                    "summary": " ".join(self._sentences(rng, 2)),
+                    "key_points": [rng.choice(FAKE_TOPICS) for _ in range(3)],
+                    "transcript": " ".join(self._sentences(rng, 25)),
+                }
+                for i in range(4)
+            ])
+        if task in ("flashcards", "quiz", "slides"):
+            return json.dumps(self._study_artifact(task, rng, title))
+        if task == "study_pack":
+            return json.dumps({
+                part: self._study_artifact(part, rng, title)
+                for part in ("flashcards", "quiz", "slides")
+                if f'"{part}":' in prompt_text
+            })
+        if task == "episode_sections":
+            numbers = [int(n) for n in re.findall(r"^\[(\d+)\]", prompt_text, re.MULTILINE)]
+            starts = sorted(set(numbers[::max(1, len(numbers) // 2)]))
+            return json.dumps([
+                {"start": start, "title": rng.choice(FAKE_TOPICS).title(), "summary": " ".join(self._sentences(rng, 1)), "key_points": [rng.choice(FAKE_TOPICS)]}
+                for start in starts
+            ])
+        if task == "episode_plan":
+            section_count = len(re.findall(r"^Section \d+:", prompt_text, re.MULTILINE))
+            episode_count = max(1, min(4, section_count))
+            size = -(-section_count // episode_count)
+            return json.dumps([
+                {
+                    "title": f"Episode {n + 1}: {rng.choice(FAKE_TOPICS).title()}",
+                    "summary": " ".join(self._sentences(rng, 2)),
+                    "key_points": [rng.choice(FAKE_TOPICS) for _ in range(3)],
+                    "sections": list(range(start, min(start + size, section_count))),
+                }
+                for n, start in enumerate(range(0, section_count, size))
+            ])
+        if task == "transcribe":
+            return " ".join(self._sentences(rng, 200))
+        return " ".join(self._sentences(rng, 4))
+
+    def _study_artifact(self, task: str, rng: random.Random, title: str) -> list:
+        if task == "flashcards":
+            return [
+                {"front": f"What is {topic}?", "back": f"{topic.capitalize()} as covered in {title}."}
+                for topic in rng.sample(FAKE_TOPICS, 8)
+            ]
+        if task == "quiz":
+            return [
+                {
+                    "question": f"Which statement about {topic} is correct?",
+                    "options": [f"Option {c}" for c in "ABCD"],
+                    "correct_index": rng.randrange(4),
+                    "explanation": f"See the discussion of {topic} in {title}.",
+                }
+                for topic in rng.sample(FAKE_TOPICS, 5)
+            ]
+        return [
+            {"title": topic.title(), "bullets": self._sentences(rng, 3)}
+            for topic in rng.sample(FAKE_TOPICS, 6)
+        ]
+
+    def _stream(self, prompt, generation_config: dict, task: str):
+        # Simulate a stream: the configured latency is spent before the first word
+        text = self._generate(prompt, generation_config, task)
+        for word in text.split(" "):
+            yield word + " "
+            if self.latency_ms:
+                time.sleep(0.005)
+
+    def _transcribe(self, file_path: str, prompt: str) -> str:
+        hasher = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                hasher.update(chunk)
+        # Seed the fake transcript from the audio bytes, scheduled like a real call
+        return self.generate([prompt, f"audio:{hasher.hexdigest()}"], task="transcribe")
+
+
+def create_client() -> LLMBackend:
+    if LLM_BACKEND == "fake":
+        return FakeBackend(FAKE_LLM_LATENCY_MS)
+    if LLM_BACKEND != "gemini":
+        raise ValueError(f"Unknown LLM_BACKEND '{LLM_BACKEND}'. Use 'gemini' or 'fake'.")
+    return GeminiBackend(GEMINI_MODEL)
+
+
+# Shared client used by every AI operation
+client = create_client()
@@ -1,10 +1,17 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse, Response
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 import uuid
 import os
+import socket
+import hashlib
+import json
 import tempfile
-from typing import Dict, List
+import base64
+import orjson
+import time
+from typing import List, Optional
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -15,14 +22,36 @@ load_dotenv(env_path)
 # Also try loading from current directory
 load_dotenv()
 
-from models import Course, Episode, Question, UserProgress, LoginRequest, LoginResponse
-from storage import courses, episodes, questions, user_progress, achievements, users, sessions
+from models import Course, Episode, Question, LoginRequest, LoginResponse
+from storage import courses, episodes, questions, achievements, users, sessions, progress_store, DEFAULT_USER_ID, indexes, user_by_id, search_index, home_feed, course_card
+from storage import load_storage, sync_storage, sync_due, put_catalog, put_question, put_session, delete_session, repository
 import secrets
-from ai import transcribe_audio, generate_episodes_from_transcript, ask_ai_tutor
+from ai import transcribe_audio, generate_episodes_from_transcript, ask_ai_tutor, stream_ai_tutor, PROMPT_VERSIONS, FallbackList, TutorErrorAnswer, TUTOR_PRIMER_QUESTION
+from jobs import create_job, submit_job, get_job, get_course_job, pregen_executor
+from ingest import LectureUpload
+from cache import transcript_cache, artifact_cache, artifact_key, episode_content_hash, tutor_answer_cache, normalize_question
+from singleflight import ai_flight
+from scheduler import scheduler, priority_override, BACKGROUND
+from retrieval import index_episode, select_context
+from search import document_fields, highlight
+from payloads import episode_payloads, episode_payload, negotiate
+from awards import Event, QUIZ_SCORED, QUESTION_ASKED, LECTURE_UPLOADED
 from datetime import datetime, date
 
 app = FastAPI(title="BadgerFlix API")
 
+# Warm flashcards/quiz/slides and a tutor primer for new episodes in the background
+PREGENERATE_STUDY_MATERIALS = os.getenv("PREGENERATE_STUDY_MATERIALS", "true").lower() in ("1", "true", "yes")
+
+# Most ids one batchGet request may ask for
+BATCH_GET_MAX_IDS = int(os.getenv("BATCH_GET_MAX_IDS", "500"))
+# List endpoints return pages of this many items by default, and at most LIST_PAGE_MAX
+LIST_PAGE_DEFAULT = int(os.getenv("LIST_PAGE_DEFAULT", "50"))
+LIST_PAGE_MAX = int(os.getenv("LIST_PAGE_MAX", "200"))
+
+# Catalog responses carry ETags; "no-cache" makes clients revalidate each time and get a bodiless 304 if unchanged
+CATALOG_CACHE_CONTROL = os.getenv("CATALOG_CACHE_CONTROL", "public, no-cache")
+
 # CORS middleware - Update with your production frontend URL
 app.add_middleware(
     CORSMiddleware,
@@ -38,6 +67,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class SharedStateSync:
+    """ASGI middleware: apply other workers' storage changes before handling a request.
+
+    Polls the change log at most every STORAGE_SYNC_INTERVAL seconds, from the
+    threadpool so SQLite reads never block the event loop.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and sync_due():
+            await run_in_threadpool(sync_storage)
+        await self.app(scope, receive, send)
+
+app.add_middleware(SharedStateSync)
+
 # Request models
 class AskAIRequest(BaseModel):
     question: str
@@ -49,6 +95,10 @@ class AskInstructorRequest(BaseModel):
 class AnswerRequest(BaseModel):
     answer_text: str
 
+class BatchGetRequest(BaseModel):
+    ids: List[str]
+    fields: Optional[List[str]] = None  # Projection; all fields when omitted
+
 # Seed some sample data on startup
 def seed_sample_data():
     """Add preloaded sample courses for demo - VC pitch ready content"""
@@ -173,33 +223,58 @@ def seed_sample_data():
         }
     ]
     
+    seed_courses = []
+    seed_episodes = []
     for course_data in sample_courses:
         course_id = course_data["id"]
         episode_ids = []
         
         for ep_data in course_data["episodes"]:
             ep_id = ep_data["id"]
-            episodes[ep_id] = Episode(
+            seed_episodes.append(Episode(
                 id=ep_id,
                 course_id=course_id,
                 title=ep_data["title"],
                 summary=ep_data["summary"],
                 key_points=ep_data["key_points"],
                 transcript=ep_data["transcript"]
-            )
+            ))
+            index_episode(ep_id, ep_data["transcript"])
             episode_ids.append(ep_id)
         
-        courses[course_id] = Course(
+        seed_courses.append(Course(
             id=course_id,
             title=course_data["title"],
             subject=course_data["subject"],
             description=course_data["description"],
             episode_ids=episode_ids
-        )
+        ))
+    
+    # One transaction for the whole sample catalog
+    put_catalog(seed_courses, seed_episodes)
 
 @app.on_event("startup")
 async def startup_event():
-    seed_sample_data()
+    load_storage()
+    # With --workers N every worker runs this; only one of them seeds and warms the catalog
+    lease = f"startup:{socket.gethostname()}:{os.getppid()}"
+    owner = str(os.getpid())
+    if not repository.try_acquire_lease(lease, owner, ttl=60):
+        print(f"[STARTUP] Worker {os.getpid()} skipping seeding (another worker holds {lease})")
+        return
+    try:
+        seed_sample_data()
+        for course_id in list(courses):
+            schedule_pregeneration(course_id)
+    finally:
+        # Seeding is idempotent; the lease only keeps workers starting together from
+        # doing it at once, so a worker restarted later (crash, --reload) seeds again
+        repository.release_lease(lease, owner)
+
+@app.on_event("shutdown")
+def shutdown_event():
+    if search_index.dirty:
+        search_index.save()
 
 @app.get("/")
 def root():
@@ -222,7 +297,7 @@ def login(body: LoginRequest):
     
     # Generate token
     token = secrets.token_urlsafe(32)
-    sessions[token] = user.id
+    put_session(token, user.id)
     
     return LoginResponse(
         token=token,
@@ -235,7 +310,7 @@ def login(body: LoginRequest):
 def logout(token: str):
     """Logout endpoint"""
     if token in sessions:
-        del sessions[token]
+        delete_session(token)
     return {"status": "logged_out"}
 
 @app.get("/auth/me")
@@ -245,8 +320,7 @@ def get_current_user(token: str):
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
-    # Find user by id
-    user = next((u for u in users.values() if u.id == user_id), None)
+    user = user_by_id(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -257,108 +331,269 @@ def get_current_user(token: str):
         "name": user.name
     }
 
+def process_lecture(ctx, temp_path: str, title: str, subject: str, content_hash: str = None, user_id: str = DEFAULT_USER_ID) -> dict:
+    """Background pipeline: transcribe -> segment -> persist; user_id is credited for the upload once the course exists"""
+    try:
+        with ctx.stage("transcribe"):
+            try:
+                if content_hash:
+                    transcript = ai_flight.do("transcribe", content_hash, transcribe_audio, temp_path, content_hash)
+                else:
+                    transcript = transcribe_audio(temp_path)
+            except Exception as e:
+                raise Exception(f"Error transcribing audio: {str(e)}")
+        
+        with ctx.stage("segment"):
+            try:
+                segment_key = hashlib.sha256(f"{title}\n{transcript}".encode("utf-8")).hexdigest()
+                eps_raw = ai_flight.do("episodes", segment_key, generate_episodes_from_transcript, transcript, title)
+            except Exception as e:
+                raise Exception(f"Error generating episodes: {str(e)}")
+        
+        with ctx.stage("persist"):
+            # Create course and episodes
+            course_id = str(uuid.uuid4())
+            ep_ids = []
+            new_episodes = []
+            
+            for idx, ep in enumerate(eps_raw):
+                eid = str(uuid.uuid4())
+                # Use transcript if available, otherwise use transcript_excerpt, otherwise use summary
+                episode_transcript = ep.get("transcript", "") or ep.get("transcript_excerpt", "") or ep.get("summary", "")
+                new_episodes.append(Episode(
+                    id=eid,
+                    course_id=course_id,
+                    title=ep.get("title", f"Episode {idx + 1}"),
+                    summary=ep.get("summary", ""),
+                    key_points=ep.get("key_points", []),
+                    transcript=episode_transcript
+                ))
+                index_episode(eid, episode_transcript)
+                ep_ids.append(eid)
+            
+            course = Course(
+                id=course_id,
+                title=title,
+                subject=subject,
+                description=f"AI-generated course from uploaded lecture: {title}",
+                episode_ids=ep_ids
+            )
+            put_catalog([course], new_episodes)
+        
+        print(f"[UPLOAD] Successfully created course {course_id} with {len(ep_ids)} episodes")
+        newly_unlocked = progress_store.record_event(user_id, Event(LECTURE_UPLOADED)) if ep_ids else []
+        pregen_job = schedule_pregeneration(course_id)
+        return {
+            "course_id": course_id,
+            "episodes_created": len(ep_ids),
+            "content_hash": content_hash,
+            "pregeneration_job_id": pregen_job.id if pregen_job else None,
+            "new_achievements": newly_unlocked
+        }
+    finally:
+        # Clean up temp file
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
 @app.post("/upload-lecture")
-async def upload_lecture(
-    file: UploadFile = File(...),
-    title: str = Form(...),
-    subject: str = Form(...)
-):
-    """Upload lecture audio/video and generate episodes"""
+async def upload_lecture(request: Request, token: Optional[str] = None):
+    """Upload lecture audio/video (multipart: file, title, subject); episodes are generated by a background job"""
     import logging
     logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger(__name__)
     
+    # A session lookup may read the repository
+    user_id = await run_in_threadpool(progress_user_id, token)
     try:
-        logger.info(f"Received upload request - subject: {subject}, title: {title}, file: {file.filename}")
-        # Save uploaded file temporarily
-        file_id = str(uuid.uuid4())
-        suffix = os.path.splitext(file.filename)[1] or ".mp3"
-        temp_path = os.path.join(tempfile.gettempdir(), f"{file_id}{suffix}")
+        # Parse the multipart body as it arrives rather than declaring File/Form
+        # parameters, which would have the whole body spooled before we run:
+        # the size cap and type check apply mid-stream, and the file is written
+        # to disk in chunks from the threadpool
+        upload = await LectureUpload(tempfile.gettempdir()).receive(request)
+        title, subject = upload.fields.get("title"), upload.fields.get("subject")
+        if not title or not subject:
+            await run_in_threadpool(upload.discard)
+            raise HTTPException(status_code=422, detail="title and subject are required")
+        logger.info(f"Received upload - subject: {subject}, title: {title}, file: {upload.filename}")
+        logger.info(f"Saved {upload.size} bytes for {upload.filename} (sha256 {upload.sha256[:12]})")
         
-        with open(temp_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        # Transcription and segmentation run on the worker pool, not the event loop
+        job = create_job("upload_lecture", ["transcribe", "segment", "persist"])
+        submit_job(job, process_lecture, upload.path, title, subject, upload.sha256, user_id=user_id)
+        logger.info(f"Queued lecture job {job.id} for {upload.filename}")
         
-        # Transcribe audio using Gemini
-        try:
-            transcript = transcribe_audio(temp_path)
-        except Exception as e:
-            error_msg = str(e)
-            raise HTTPException(status_code=500, detail=f"Error transcribing audio: {error_msg}")
-        
-        # Generate episodes using Gemini
-        try:
-            eps_raw = generate_episodes_from_transcript(transcript, title)
-        except Exception as e:
-            error_msg = str(e)
-            raise HTTPException(status_code=500, detail=f"Error generating episodes: {error_msg}")
-        
-        # Create course and episodes
-        course_id = str(uuid.uuid4())
-        ep_ids = []
-        
-        for idx, ep in enumerate(eps_raw):
-            eid = str(uuid.uuid4())
-            # Use transcript if available, otherwise use transcript_excerpt, otherwise use summary
-            episode_transcript = ep.get("transcript", "") or ep.get("transcript_excerpt", "") or ep.get("summary", "")
-            episodes[eid] = Episode(
-                id=eid,
-                course_id=course_id,
-                title=ep.get("title", f"Episode {idx + 1}"),
-                summary=ep.get("summary", ""),
-                key_points=ep.get("key_points", []),
-                transcript=episode_transcript
-            )
-            ep_ids.append(eid)
-        
-        courses[course_id] = Course(
-            id=course_id,
-            title=title,
-            subject=subject,
-            description=f"AI-generated course from uploaded lecture: {title}",
-            episode_ids=ep_ids
-        )
-        
-        logger.info(f"Successfully created course {course_id} with {len(ep_ids)} episodes")
-        
-        # Clean up temp file
-        os.remove(temp_path)
-        
-        return {"course_id": course_id, "episodes_created": len(ep_ids)}
+        return {"job_id": job.id, "status": job.status}
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing lecture: {str(e)}")
 
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Get hit/miss counters for the AI result caches and request coalescing"""
+    return {
+        "transcripts": transcript_cache.stats(),
+        "artifacts": artifact_cache.stats(),
+        "tutor_answers": tutor_answer_cache.stats(),
+        "episode_payloads": episode_payloads.stats(),
+        "coalescing": ai_flight.stats()
+    }
+
+@app.get("/llm/stats")
+def get_llm_stats():
+    """Get outbound scheduler budgets, queue depth and retry counts per priority"""
+    return scheduler.stats()
+
+@app.get("/jobs/{job_id}")
+def get_job_status(job_id: str):
+    """Get stage, progress and timings for a background job"""
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.model_dump()
+
 @app.get("/subjects")
 def get_subjects():
     """Get all available subjects"""
-    subjects = list(set([c.subject for c in courses.values()]))
+    subjects = indexes.subjects()
     return {"subjects": subjects}
 
+# Conditional GET: ETags are derived from entity version counters, so a
+# revalidation is answered before any payload is built or serialized
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Set validators on the response; returns a 304 to send instead if the client's copy is current"""
+    headers = {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+def course_etag(course: Course) -> str:
+    # Versions only grow, so the sum changes whenever any listed episode does
+    episode_versions = sum(episodes[e].version for e in course.episode_ids if e in episodes)
+    return f'"c{course.version}.{episode_versions}"'
+
+def subject_etag(course_ids: List[str], next_cursor: Optional[str]) -> str:
+    digest = hashlib.blake2b(digest_size=12)
+    for course_id in course_ids:
+        course = courses.get(course_id)
+        digest.update(f"{course_id}:{course.version if course else ''};".encode())
+    digest.update(f"next:{next_cursor}".encode())
+    return f'"s{digest.hexdigest()}"'
+
+# Field projection and cursor pagination for list and batch endpoints
+COURSE_FIELDS = ("id", "title", "subject", "description", "episode_count", "episode_ids")
+EPISODE_FIELDS = ("id", "course_id", "title", "summary", "key_points", "transcript")
+QUESTION_FIELDS = ("id", "episode_id", "question_text", "is_anonymous", "answer_text", "created_at")
+
+def field_projection(fields: Optional[List[str]], allowed: tuple) -> Optional[List[str]]:
+    if fields is None:
+        return None
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {unknown}; choose from {list(allowed)}")
+    # "id" is always returned so results can be matched up
+    return [f for f in allowed if f == "id" or f in fields]
+
+def query_fields(fields: Optional[str], allowed: tuple, default: tuple) -> List[str]:
+    """Fields for a list endpoint from a comma-separated fields= parameter"""
+    if not fields:
+        return list(default)
+    return field_projection([f.strip() for f in fields.split(",") if f.strip()], allowed)
+
+def page_limit(limit: int) -> int:
+    return max(1, min(limit, LIST_PAGE_MAX))
+
+def encode_cursor(key: Optional[tuple]) -> Optional[str]:
+    """Opaque cursor for a (created_at, id) sort key; None once the listing is exhausted"""
+    if key is None:
+        return None
+    return base64.urlsafe_b64encode(orjson.dumps(list(key))).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[tuple]:
+    if not cursor:
+        return None
+    try:
+        created_at, item_id = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(created_at), str(item_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def course_fields(c: Course) -> dict:
+    return {**course_card(c), "episode_ids": c.episode_ids}
+
 @app.get("/subject/{subject}/courses")
-def get_courses_by_subject(subject: str):
-    """Get all courses for a specific subject"""
+def get_courses_by_subject(subject: str, request: Request, response: Response, limit: int = LIST_PAGE_DEFAULT, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """Get a page of courses for a subject, oldest first; follow next_cursor for more"""
+    selected = query_fields(fields, COURSE_FIELDS, COURSE_FIELDS)
+    course_ids, next_key = indexes.subject_course_page(subject, decode_cursor(cursor), page_limit(limit))
+    next_cursor = encode_cursor(next_key)
+    cached = not_modified(request, response, subject_etag(course_ids, next_cursor))
+    if cached:
+        return cached
+    
     subject_courses = [
-        {
-            "id": c.id,
-            "title": c.title,
-            "subject": c.subject,
-            "description": c.description,
-            "episode_count": len(c.episode_ids),
-            "episode_ids": c.episode_ids  # Include for progress calculation
-        }
-        for c in courses.values()
-        if c.subject.lower() == subject.lower()
+        {f: item[f] for f in selected}
+        for course_id in course_ids
+        for item in [course_fields(courses[course_id])]
     ]
-    return {"courses": subject_courses}
+    return {"courses": subject_courses, "next_cursor": next_cursor}
+
+@app.get("/search")
+def search_catalog(q: str, limit: int = 10):
+    """Full-text search over courses and episodes; the last word also matches as a prefix (type-ahead)"""
+    limit = max(1, min(limit, 50))
+    started = time.perf_counter()
+    results = []
+    for hit in search_index.search(q, limit):
+        if hit["kind"] == "course":
+            course = courses.get(hit["id"])
+            if not course:
+                continue
+            results.append({
+                "type": "course",
+                "id": course.id,
+                "title": course.title,
+                "subject": course.subject,
+                "score": hit["score"],
+                "highlight": highlight(document_fields("course", course), hit["offsets"])
+            })
+        else:
+            ep = episodes.get(hit["id"])
+            if not ep:
+                continue
+            course = courses.get(ep.course_id)
+            results.append({
+                "type": "episode",
+                "id": ep.id,
+                "course_id": ep.course_id,
+                "course_title": course.title if course else None,
+                "title": ep.title,
+                "score": hit["score"],
+                "highlight": highlight(document_fields("episode", ep), hit["offsets"])
+            })
+    return {"query": q, "results": results, "took_ms": round((time.perf_counter() - started) * 1000, 2)}
 
 @app.get("/course/{course_id}")
-def get_course(course_id: str):
+def get_course(course_id: str, request: Request, response: Response):
     """Get course details with episodes"""
     if course_id not in courses:
         raise HTTPException(status_code=404, detail="Course not found")
     
     course = courses[course_id]
+    cached = not_modified(request, response, course_etag(course))
+    if cached:
+        return cached
+    
     episode_list = [
         {
             "id": ep.id,
@@ -380,30 +615,60 @@ def get_course(course_id: str):
     }
 
 @app.get("/episode/{episode_id}")
-def get_episode(episode_id: str):
-    """Get episode details"""
+def get_episode(episode_id: str, request: Request):
+    """Get episode details, served from bytes encoded once per episode version"""
     if episode_id not in episodes:
         raise HTTPException(status_code=404, detail="Episode not found")
     
     ep = episodes[episode_id]
-    # Ensure transcript is included and formatted properly
-    transcript = ep.transcript if ep.transcript else ""
-    # Format transcript into readable paragraphs if it's one long string
-    if transcript and '\n' not in transcript and len(transcript) > 100:
-        # Split by sentences and create paragraphs
-        sentences = transcript.split('. ')
-        formatted_transcript = '. '.join(sentences)
-    else:
-        formatted_transcript = transcript
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    # Each content coding is a different representation, so it gets its own strong ETag
+    etag = f'"e{ep.version}"' if encoding == "identity" else f'"e{ep.version}-{encoding}"'
+    headers = {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
     
-    return {
-        "id": ep.id,
-        "course_id": ep.course_id,
-        "title": ep.title,
-        "summary": ep.summary,
-        "key_points": ep.key_points,
-        "transcript": formatted_transcript
-    }
+    payload = episode_payloads.get(ep.id, ep.version, lambda: episode_payload(ep))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=payload.bodies[encoding], media_type="application/json", headers=headers)
+
+# Batch reads: one round trip for many ids, results in request order
+def batch_lookup(ids: List[str], cache) -> tuple:
+    """(found values in request order, ids not found)"""
+    if len(ids) > BATCH_GET_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_GET_MAX_IDS} ids per request")
+    found = []
+    not_found = {}
+    for item_id in ids:
+        value = cache.get(item_id)
+        if value is None:
+            not_found[item_id] = None
+        else:
+            found.append(value)
+    return found, list(not_found)
+
+@app.post("/courses:batchGet")
+def batch_get_courses(body: BatchGetRequest):
+    """Get many courses in one request"""
+    fields = field_projection(body.fields, COURSE_FIELDS)
+    found, not_found = batch_lookup(body.ids, courses)
+    items = [course_fields(c) for c in found]
+    if fields:
+        items = [{f: item[f] for f in fields} for item in items]
+    return Response(content=orjson.dumps({"courses": items, "not_found": not_found}), media_type="application/json")
+
+@app.post("/episodes:batchGet")
+def batch_get_episodes(body: BatchGetRequest):
+    """Get many episodes in one request; pass fields to skip heavy ones like transcript"""
+    fields = field_projection(body.fields, EPISODE_FIELDS)
+    found, not_found = batch_lookup(body.ids, episodes)
+    if fields:
+        items = orjson.dumps([{f: payload[f] for f in fields} for payload in map(episode_payload, found)])
+    else:
+        # Full episodes: splice the bodies already encoded for GET /episode/{id}
+        items = b"[" + b",".join(episode_payloads.json_body(ep.id, ep.version, lambda ep=ep: episode_payload(ep)) for ep in found) + b"]"
+    return Response(content=b'{"episodes":' + items + b',"not_found":' + orjson.dumps(not_found) + b"}", media_type="application/json")
 
 @app.post("/episode/{episode_id}/ask-ai")
 def ask_ai(episode_id: str, body: AskAIRequest):
@@ -419,60 +684,132 @@ def ask_ai(episode_id: str, body: AskAIRequest):
             "key_points": ep.key_points,
             "transcript": ep.transcript if ep.transcript else ""
         }
+        primer = cached_tutor_primer(ep, body.question)
+        if primer is not None:
+            return {"answer": primer}
+        
+        # Near-duplicate questions about the same episode reuse an earlier answer
+        content_hash = episode_content_hash(episode_dict)
+        cached = tutor_answer_cache.get(episode_id, content_hash, body.question)
+        if cached is not None:
+            return {"answer": cached}
+        
+        def answer_and_cache():
+            # Send only the transcript passages relevant to the question
+            episode_dict["context"] = select_context(episode_id, episode_dict["transcript"], body.question)
+            answer = ask_ai_tutor(episode_dict, body.question)
+            if not isinstance(answer, TutorErrorAnswer):
+                tutor_answer_cache.put(episode_id, content_hash, body.question, answer)
+            return answer
         
-        answer = ask_ai_tutor(episode_dict, body.question)
+        # Identical in-flight questions about the same episode share one answer
+        question_key = f"{episode_id}:{normalize_question(body.question)}"
+        answer = ai_flight.do("tutor", question_key, answer_and_cache)
         return {"answer": answer}
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         print(f"Error in ask_ai: {str(e)}")
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Error generating AI response: {str(e)}")
 
+@app.post("/episode/{episode_id}/ask-ai/stream")
+async def ask_ai_stream(episode_id: str, body: AskAIRequest, request: Request):
+    """Ask AI tutor a question, streaming the answer as Server-Sent Events"""
+    def prepare():
+        # Episode lookups and passage retrieval may read the repository, so they run off the event loop
+        if episode_id not in episodes:
+            raise HTTPException(status_code=404, detail="Episode not found")
+        
+        ep = episodes[episode_id]
+        episode_dict = {
+            "title": ep.title,
+            "summary": ep.summary,
+            "key_points": ep.key_points,
+            "transcript": ep.transcript if ep.transcript else ""
+        }
+        content_hash = episode_content_hash(episode_dict)
+        cached = cached_tutor_primer(ep, body.question) or tutor_answer_cache.get(episode_id, content_hash, body.question)
+        if cached is not None:
+            return content_hash, cached, iter([cached])
+        episode_dict["context"] = select_context(episode_id, episode_dict["transcript"], body.question)
+        return content_hash, None, stream_ai_tutor(episode_dict, body.question)
+    
+    content_hash, cached, chunks = await run_in_threadpool(prepare)
+    
+    async def event_stream():
+        parts = []
+        try:
+            async for chunk in iterate_in_threadpool(chunks):
+                # Stop pulling from the model as soon as the student goes away
+                if await request.is_disconnected():
+                    print(f"[TUTOR] Client disconnected, cancelling stream for episode {episode_id}")
+                    break
+                parts.append(chunk)
+                yield f"data: {json.dumps({'text': chunk})}\n\n"
+            else:
+                answer = "".join(parts).strip()
+                if cached is None and answer:
+                    tutor_answer_cache.put(episode_id, content_hash, body.question, answer)
+                yield f"event: done\ndata: {json.dumps({'answer': answer})}\n\n"
+        except Exception as e:
+            print(f"Error in ask_ai_stream: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'detail': f'Error generating AI response: {str(e)}'})}\n\n"
+        finally:
+            try:
+                if hasattr(chunks, "close"):
+                    chunks.close()
+            except ValueError:
+                pass  # Still running in the worker thread; it stops at the next chunk
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/episode/{episode_id}/ask-instructor")
-def ask_instructor(episode_id: str, body: AskInstructorRequest):
+def ask_instructor(episode_id: str, body: AskInstructorRequest, token: Optional[str] = None):
     """Submit anonymous question to instructor"""
     if episode_id not in episodes:
         raise HTTPException(status_code=404, detail="Episode not found")
     
+    user_id = progress_user_id(token)
     qid = str(uuid.uuid4())
-    questions[qid] = Question(
+    put_question(Question(
         id=qid,
         episode_id=episode_id,
         question_text=body.question_text,
         is_anonymous=body.is_anonymous
-    )
+    ))
+    newly_unlocked = progress_store.record_event(user_id, Event(QUESTION_ASKED))
     
-    return {"question_id": qid, "status": "submitted"}
+    return {"question_id": qid, "status": "submitted", "new_achievements": newly_unlocked}
 
 @app.get("/episode/{episode_id}/questions")
-def get_episode_questions(episode_id: str):
-    """Get all answered questions for an episode"""
+def get_episode_questions(episode_id: str, limit: int = LIST_PAGE_DEFAULT, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """Get a page of answered questions for an episode, oldest first"""
+    selected = query_fields(fields, QUESTION_FIELDS, ("id", "question_text", "is_anonymous", "answer_text"))
+    question_ids, next_key = indexes.answered_question_page(episode_id, decode_cursor(cursor), page_limit(limit))
     answered = [
-        {
-            "id": q.id,
-            "question_text": q.question_text,
-            "is_anonymous": q.is_anonymous,
-            "answer_text": q.answer_text
-        }
-        for q in questions.values()
-        if q.episode_id == episode_id and q.answer_text
+        {f: item[f] for f in selected}
+        for question_id in question_ids
+        for item in [questions[question_id].model_dump()]
     ]
-    return {"questions": answered}
+    return {"questions": answered, "next_cursor": encode_cursor(next_key)}
 
 @app.get("/instructor/questions")
-def get_unanswered_questions():
-    """Get all unanswered questions for instructor"""
+def get_unanswered_questions(limit: int = LIST_PAGE_DEFAULT, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """Get a page of unanswered questions for instructor, oldest first"""
+    selected = query_fields(fields, QUESTION_FIELDS, ("id", "episode_id", "question_text", "is_anonymous"))
+    question_ids, next_key = indexes.unanswered_question_page(decode_cursor(cursor), page_limit(limit))
     unanswered = [
-        {
-            "id": q.id,
-            "episode_id": q.episode_id,
-            "question_text": q.question_text,
-            "is_anonymous": q.is_anonymous
-        }
-        for q in questions.values()
-        if not q.answer_text
+        {f: item[f] for f in selected}
+        for question_id in question_ids
+        for item in [questions[question_id].model_dump()]
     ]
-    return {"questions": unanswered}
+    return {"questions": unanswered, "next_cursor": encode_cursor(next_key)}
 
 @app.post("/question/{question_id}/answer")
 def answer_question(question_id: str, body: AnswerRequest):
@@ -481,26 +818,54 @@ def answer_question(question_id: str, body: AnswerRequest):
         raise HTTPException(status_code=404, detail="Question not found")
     
     questions[question_id].answer_text = body.answer_text
+    put_question(questions[question_id])
     return {"status": "answered", "question_id": question_id}
 
 # WhisperChat Enhancements - Flashcards, Quiz, Slides
+def study_episode_dict(ep: Episode) -> dict:
+    return {
+        "title": ep.title,
+        "summary": ep.summary,
+        "key_points": ep.key_points,
+        "transcript": ep.transcript if ep.transcript else ""
+    }
+
+def add_study_context(ep: Episode, episode_dict: dict):
+    # Ground study materials in the passages that cover the episode's key points
+    query = " ".join([ep.title, ep.summary] + ep.key_points)
+    episode_dict["context"] = select_context(ep.id, episode_dict["transcript"], query)
+
+def get_study_artifact(ep: Episode, artifact_type: str, generate, regenerate: bool = False):
+    """Serve a study artifact from cache, generating (and caching) it on a miss or regenerate"""
+    episode_dict = study_episode_dict(ep)
+    key = artifact_key(episode_dict, artifact_type, PROMPT_VERSIONS[artifact_type])
+    if not regenerate:
+        cached = artifact_cache.get(key)
+        if cached is not None:
+            return cached
+    
+    def generate_and_cache():
+        add_study_context(ep, episode_dict)
+        result = generate(episode_dict)
+        # Don't cache placeholder output from a failed generation
+        if not isinstance(result, FallbackList):
+            artifact_cache.put(key, result)
+        return result
+    
+    # Concurrent requests for the same artifact share one Gemini call; a regenerate
+    # must not join an ordinary call and be handed the result it was asked to replace
+    flight_key = f"regenerate:{key}" if regenerate else key
+    return ai_flight.do(artifact_type, flight_key, generate_and_cache)
+
 @app.post("/episode/{episode_id}/flashcards")
-def generate_flashcards(episode_id: str):
+def generate_flashcards(episode_id: str, regenerate: bool = False):
     """Generate flashcards for an episode"""
     try:
         if episode_id not in episodes:
             raise HTTPException(status_code=404, detail="Episode not found")
         
         from ai import generate_flashcards as ai_generate_flashcards
-        ep = episodes[episode_id]
-        episode_dict = {
-            "title": ep.title,
-            "summary": ep.summary,
-            "key_points": ep.key_points,
-            "transcript": ep.transcript if ep.transcript else ""
-        }
-        
-        flashcards = ai_generate_flashcards(episode_dict)
+        flashcards = get_study_artifact(episodes[episode_id], "flashcards", ai_generate_flashcards, regenerate)
         return {"flashcards": flashcards}
     except Exception as e:
         import traceback
@@ -509,22 +874,14 @@ def generate_flashcards(episode_id: str):
         raise HTTPException(status_code=500, detail=f"Error generating flashcards: {str(e)}")
 
 @app.post("/episode/{episode_id}/quiz")
-def generate_quiz(episode_id: str):
+def generate_quiz(episode_id: str, regenerate: bool = False):
     """Generate quiz for an episode"""
     try:
         if episode_id not in episodes:
             raise HTTPException(status_code=404, detail="Episode not found")
         
         from ai import generate_quiz as ai_generate_quiz
-        ep = episodes[episode_id]
-        episode_dict = {
-            "title": ep.title,
-            "summary": ep.summary,
-            "key_points": ep.key_points,
-            "transcript": ep.transcript if ep.transcript else ""
-        }
-        
-        quiz = ai_generate_quiz(episode_dict)
+        quiz = get_study_artifact(episodes[episode_id], "quiz", ai_generate_quiz, regenerate)
         return {"quiz": quiz}
     except Exception as e:
         import traceback
@@ -533,22 +890,14 @@ def generate_quiz(episode_id: str):
         raise HTTPException(status_code=500, detail=f"Error generating quiz: {str(e)}")
 
 @app.post("/episode/{episode_id}/slides")
-def generate_slides(episode_id: str):
+def generate_slides(episode_id: str, regenerate: bool = False):
     """Generate presentation slides for an episode"""
     try:
         if episode_id not in episodes:
             raise HTTPException(status_code=404, detail="Episode not found")
         
         from ai import generate_slides as ai_generate_slides
-        ep = episodes[episode_id]
-        episode_dict = {
-            "title": ep.title,
-            "summary": ep.summary,
-            "key_points": ep.key_points,
-            "transcript": ep.transcript if ep.transcript else ""
-        }
-        
-        slides = ai_generate_slides(episode_dict)
+        slides = get_study_artifact(episodes[episode_id], "slides", ai_generate_slides, regenerate)
         return {"slides": slides}
     except Exception as e:
         import traceback
@@ -556,69 +905,166 @@ def generate_slides(episode_id: str):
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Error generating slides: {str(e)}")
 
+def build_study_pack(ep: Episode, regenerate: bool = False) -> dict:
+    """Flashcards, quiz and slides for an episode, generating missing parts with one combined call"""
+    from ai import generate_study_pack as ai_generate_study_pack, STUDY_VALIDATORS
+    from ai import generate_flashcards as ai_generate_flashcards, generate_quiz as ai_generate_quiz, generate_slides as ai_generate_slides
+    episode_dict = study_episode_dict(ep)
+    # Pack parts share cache entries with the individual endpoints
+    keys = {part: artifact_key(episode_dict, part, PROMPT_VERSIONS[part]) for part in STUDY_VALIDATORS}
+    
+    pack = {}
+    if not regenerate:
+        for part, key in keys.items():
+            cached = artifact_cache.get(key)
+            if cached is not None:
+                pack[part] = cached
+    missing = [part for part in keys if part not in pack]
+    
+    def generate_missing():
+        add_study_context(ep, episode_dict)
+        generated = ai_generate_study_pack(episode_dict, missing)
+        for part, value in generated.items():
+            artifact_cache.put(keys[part], value)
+        # Only the parts that failed validation are regenerated, one call each
+        single_generators = {
+            "flashcards": ai_generate_flashcards,
+            "quiz": ai_generate_quiz,
+            "slides": ai_generate_slides,
+        }
+        for part in missing:
+            if part not in generated:
+                generated[part] = get_study_artifact(ep, part, single_generators[part], regenerate=True)
+        return generated
+    
+    if missing:
+        flight_key = f"{'regenerate:' if regenerate else ''}{'+'.join(missing)}:{keys[missing[0]]}"
+        pack.update(ai_flight.do("study_pack", flight_key, generate_missing))
+    return pack
+
+@app.post("/episode/{episode_id}/study-pack")
+def generate_study_pack(episode_id: str, regenerate: bool = False):
+    """Generate flashcards, quiz and slides for an episode with one combined AI call"""
+    try:
+        if episode_id not in episodes:
+            raise HTTPException(status_code=404, detail="Episode not found")
+        
+        return build_study_pack(episodes[episode_id], regenerate)
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        print(f"Error generating study pack: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Error generating study pack: {str(e)}")
+
+# Eager pre-generation - new episodes get study materials before the first student asks
+def tutor_primer_key(ep: Episode) -> str:
+    return artifact_key(study_episode_dict(ep), "tutor_primer", PROMPT_VERSIONS["tutor_primer"])
+
+def cached_tutor_primer(ep: Episode, question: str):
+    """Pre-generated answer if the question is the default primer question"""
+    if " ".join(question.lower().split()) != " ".join(TUTOR_PRIMER_QUESTION.lower().split()):
+        return None
+    return artifact_cache.get(tutor_primer_key(ep))
+
+def pregenerate_course(ctx, course_id: str) -> dict:
+    """Background job: fill study pack and tutor primer for every episode of a course"""
+    from ai import generate_tutor_primer
+    warmed = 0
+    failed = []
+    # Runs behind interactive and on-demand calls in the outbound scheduler
+    with priority_override(BACKGROUND):
+        for ep_id in list(courses[course_id].episode_ids):
+            # One episode's failure marks its stage failed; the rest are still warmed
+            try:
+                with ctx.stage(ep_id):
+                    ep = episodes.get(ep_id)
+                    if not ep:
+                        continue
+                    build_study_pack(ep)
+                    
+                    primer_key = tutor_primer_key(ep)
+                    if artifact_cache.get(primer_key) is None:
+                        episode_dict = study_episode_dict(ep)
+                        add_study_context(ep, episode_dict)
+                        artifact_cache.put(primer_key, ai_flight.do("tutor_primer", primer_key, generate_tutor_primer, episode_dict))
+                    warmed += 1
+            except Exception as e:
+                print(f"[PREGEN] Episode {ep_id} of course {course_id} failed: {str(e)}")
+                failed.append(ep_id)
+    return {"course_id": course_id, "episodes_warmed": warmed, "episodes_failed": failed}
+
+def schedule_pregeneration(course_id: str):
+    if not PREGENERATE_STUDY_MATERIALS or course_id not in courses:
+        return None
+    job = create_job("pregenerate", list(courses[course_id].episode_ids), course_id=course_id)
+    submit_job(job, pregenerate_course, course_id, pool=pregen_executor)
+    return job
+
+@app.get("/course/{course_id}/pregeneration")
+def get_pregeneration_status(course_id: str):
+    """Get per-episode progress of study-material pre-generation for a course"""
+    if course_id not in courses:
+        raise HTTPException(status_code=404, detail="Course not found")
+    job = get_course_job("pregenerate", course_id)
+    if not job:
+        return {"course_id": course_id, "status": "not_started"}
+    return job.model_dump()
+
 # Progress Tracking & Achievements
+def progress_user_id(token: Optional[str]) -> str:
+    """Whose progress a request touches: the logged-in user, or the shared default user when anonymous"""
+    if not token:
+        return DEFAULT_USER_ID
+    user_id = sessions.get(token)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return user_id
+
 @app.post("/episode/{episode_id}/mark-watched")
-def mark_episode_watched(episode_id: str):
+def mark_episode_watched(episode_id: str, token: Optional[str] = None):
     """Mark an episode as watched"""
     if episode_id not in episodes:
         raise HTTPException(status_code=404, detail="Episode not found")
     
-    newly_unlocked = []
+    user_id = progress_user_id(token)
     
-    if episode_id not in user_progress.watched_episodes:
-        user_progress.watched_episodes.append(episode_id)
-        user_progress.last_watch_date = datetime.now().isoformat()
-        
-        # Check for achievements
-        ep = episodes[episode_id]
-        course = courses.get(ep.course_id)
-        
-        if course:
-            # Check if all episodes in course are watched
-            all_watched = all(eid in user_progress.watched_episodes for eid in course.episode_ids)
-            if all_watched and ep.course_id not in user_progress.completed_courses:
-                user_progress.completed_courses.append(ep.course_id)
-                # Award Director achievement
-                if "director" not in user_progress.achievements:
-                    user_progress.achievements.append("director")
-                    newly_unlocked.append("director")
-                # Award Cinematographer achievement
-                if "cinematographer" not in user_progress.achievements:
-                    user_progress.achievements.append("cinematographer")
-                    newly_unlocked.append("cinematographer")
+    # Per-course progress records make the completion check O(1); the
+    # achievement engine then evaluates only the rules for watch events
+    _, newly_unlocked = progress_store.mark_watched(user_id, episode_id)
     
     return {"status": "watched", "episode_id": episode_id, "new_achievements": newly_unlocked}
 
 @app.post("/quiz/{episode_id}/submit-score")
-def submit_quiz_score(episode_id: str, body: dict):
-    """Submit quiz score and check for Action Hero achievement"""
+def submit_quiz_score(episode_id: str, body: dict, token: Optional[str] = None):
+    """Submit quiz score and check for quiz achievements"""
     if episode_id not in episodes:
         raise HTTPException(status_code=404, detail="Episode not found")
     
+    user_id = progress_user_id(token)
     score = body.get("score", 0)
-    newly_unlocked = []
-    
-    # Award Action Hero achievement for perfect score
-    if score == 100 and "action_hero" not in user_progress.achievements:
-        user_progress.achievements.append("action_hero")
-        newly_unlocked.append("action_hero")
+    newly_unlocked = progress_store.record_event(user_id, Event(QUIZ_SCORED, score=score))
     
     return {"score": score, "new_achievements": newly_unlocked}
 
 @app.get("/progress")
-def get_progress():
+def get_progress(token: Optional[str] = None):
     """Get user progress"""
+    user_id = progress_user_id(token)
+    progress = progress_store.get(user_id).to_model(user_id, progress_store.slots)
     return {
-        "watched_episodes": user_progress.watched_episodes,
-        "completed_courses": user_progress.completed_courses,
-        "my_list": user_progress.my_list,
-        "achievements": user_progress.achievements,
-        "binge_streak": user_progress.binge_streak
+        "watched_episodes": progress.watched_episodes,
+        "completed_courses": progress.completed_courses,
+        "my_list": progress.my_list,
+        "achievements": progress.achievements,
+        "binge_streak": progress.binge_streak
     }
 
 @app.get("/achievements")
-def get_achievements():
+def get_achievements(token: Optional[str] = None):
     """Get all achievements with user's unlocked status"""
+    record = progress_store.get(progress_user_id(token))
     return {
         "achievements": [
             {
@@ -627,56 +1073,84 @@ def get_achievements():
                 "description": ach.description,
                 "icon": ach.icon,
                 "category": ach.category,
-                "unlocked": ach.id in user_progress.achievements
+                "unlocked": record.has_achievement(ach.id)
             }
             for ach in achievements.values()
         ]
     }
 
 @app.post("/course/{course_id}/add-to-list")
-def add_to_list(course_id: str):
+def add_to_list(course_id: str, token: Optional[str] = None):
     """Add course to My List"""
     if course_id not in courses:
         raise HTTPException(status_code=404, detail="Course not found")
     
-    if course_id not in user_progress.my_list:
-        user_progress.my_list.append(course_id)
+    progress_store.add_to_list(progress_user_id(token), course_id)
     
     return {"status": "added", "course_id": course_id}
 
 @app.delete("/course/{course_id}/remove-from-list")
-def remove_from_list(course_id: str):
+def remove_from_list(course_id: str, token: Optional[str] = None):
     """Remove course from My List"""
-    if course_id in user_progress.my_list:
-        user_progress.my_list.remove(course_id)
+    progress_store.remove_from_list(progress_user_id(token), course_id)
     
     return {"status": "removed", "course_id": course_id}
 
-@app.get("/continue-watching")
-def get_continue_watching():
-    """Get courses/episodes to continue watching"""
+CONTINUE_WATCHING_LIMIT = int(os.getenv("CONTINUE_WATCHING_LIMIT", "20"))
+
+def continue_watching_items(user_id: str, limit: int = CONTINUE_WATCHING_LIMIT) -> list:
+    """Started but unfinished courses, most recently watched first, with the episode to resume at"""
     continue_watching = []
     
-    for course_id in user_progress.my_list + user_progress.completed_courses:
-        if course_id not in courses:
+    for course_id, course_progress in progress_store.in_progress(user_id, limit):
+        course = courses.get(course_id)
+        if course is None or not course.episode_ids:
             continue
         
-        course = courses[course_id]
-        watched_count = sum(1 for eid in course.episode_ids if eid in user_progress.watched_episodes)
         total_episodes = len(course.episode_ids)
-        progress = (watched_count / total_episodes * 100) if total_episodes > 0 else 0
-        
-        if progress > 0 and progress < 100:  # In progress, not completed
-            continue_watching.append({
-                "course_id": course_id,
-                "title": course.title,
-                "subject": course.subject,
-                "progress": progress,
-                "watched_episodes": watched_count,
-                "total_episodes": total_episodes
-            })
+        next_position = course_progress.next_position
+        if next_position is not None and next_position >= total_episodes:
+            next_position = None
+        continue_watching.append({
+            "course_id": course_id,
+            "title": course.title,
+            "subject": course.subject,
+            "progress": course_progress.count / total_episodes * 100,
+            "watched_episodes": course_progress.count,
+            "total_episodes": total_episodes,
+            "last_watched": datetime.fromtimestamp(course_progress.last_watched).isoformat(),
+            "next_episode_id": course.episode_ids[next_position] if next_position is not None else None
+        })
+    
+    return continue_watching
+
+@app.get("/continue-watching")
+def get_continue_watching(token: Optional[str] = None, limit: int = CONTINUE_WATCHING_LIMIT):
+    """Get courses to continue watching"""
+    return {"continue_watching": continue_watching_items(progress_user_id(token), page_limit(limit))}
+
+@app.get("/feed")
+def get_home_feed(token: Optional[str] = None):
+    """Everything the home page shows in one response: subject rows, My List, continue watching and progress.
+    
+    Subject rows come from a snapshot serialized once per catalog change; only the
+    user's own progress (proportional to what they have touched) is computed per request.
+    """
+    user_id = progress_user_id(token)
+    record = progress_store.get(user_id)
+    snapshot = home_feed.get()
+    cards = snapshot[1]
     
-    return {"continue_watching": continue_watching}
+    user_feed = {
+        "my_list": [cards[c] for c in record.my_list_ids() if c in cards],
+        "continue_watching": continue_watching_items(user_id),
+        "progress": {
+            "watched": {c: n for c, n in record.watched_counts().items() if c in cards},
+            "completed_courses": record.completed_ids(),
+            "my_list": record.my_list_ids()
+        }
+    }
+    return Response(content=home_feed.render(snapshot, user_feed), media_type="application/json")
 
 if __name__ == "__main__":
     import uvicorn
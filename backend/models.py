@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class Episode(BaseModel):
     id: str
@@ -8,6 +8,7 @@ class Episode(BaseModel):
     summary: str
     key_points: List[str]
     transcript: str
+    version: int = 0  # Bumped by put_catalog whenever the content changes (ETags)
 
 class Course(BaseModel):
     id: str
@@ -15,6 +16,8 @@ class Course(BaseModel):
     subject: str
     description: str
     episode_ids: List[str]
+    version: int = 0  # Bumped by put_catalog whenever the content changes (ETags)
+    created_at: float = 0.0  # Set on first write; listing and cursor order
 
 class Question(BaseModel):
     id: str
@@ -22,13 +25,15 @@ class Question(BaseModel):
     question_text: str
     is_anonymous: bool = True
     answer_text: Optional[str] = None
+    created_at: float = 0.0  # Set on first write; listing and cursor order
 
 class UserProgress(BaseModel):
-    user_id: str = "default"  # For MVP, using single user
+    user_id: str = "default"  # Logged-in user id, or "default" for anonymous visitors
     watched_episodes: List[str] = []
     completed_courses: List[str] = []
     my_list: List[str] = []  # Saved courses
     achievements: List[str] = []
+    counters: Dict[str, int] = {}  # Achievement rule counters and streak state, by name
     binge_streak: int = 0
     last_watch_date: Optional[str] = None
 
@@ -58,3 +63,24 @@ class LoginResponse(BaseModel):
     name: str
 
 
+
+class JobStage(BaseModel):
+    name: str
+    status: str = "pending"  # "pending", "running", "completed", "failed"
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    duration: Optional[float] = None  # Seconds
+
+class Job(BaseModel):
+    id: str
+    kind: str  # e.g. "upload_lecture"
+    course_id: Optional[str] = None  # Course the job works on, when known up front
+    status: str = "queued"  # "queued", "running", "completed", "failed"
+    stage: Optional[str] = None  # Name of the stage currently running
+    stages: List[JobStage] = []
+    progress: float = 0.0  # 0-100
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
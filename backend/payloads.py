@@ -0,0 +1,143 @@
+import gzip
+import os
+import threading
+from collections import OrderedDict
+
+import orjson
+
+from models import Episode
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip and identity are offered
+    brotli = None
+
+EPISODE_PAYLOAD_CACHE_MAX_BYTES = int(os.getenv("EPISODE_PAYLOAD_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))  # 128 MB
+GZIP_LEVEL = int(os.getenv("PAYLOAD_GZIP_LEVEL", "9"))
+BROTLI_QUALITY = int(os.getenv("PAYLOAD_BROTLI_QUALITY", "9"))
+
+# Preferred first when the client accepts several equally
+ENCODINGS = ("br", "gzip", "identity")
+
+
+def episode_payload(ep: Episode) -> dict:
+    """Body of GET /episode/{id}"""
+    return {
+        "id": ep.id,
+        "course_id": ep.course_id,
+        "title": ep.title,
+        "summary": ep.summary,
+        "key_points": ep.key_points,
+        "transcript": ep.transcript or ""
+    }
+
+
+class EncodedPayload:
+    """One response body, JSON-encoded once and compressed once per content coding"""
+
+    __slots__ = ("version", "bodies", "size")
+
+    def __init__(self, version: int, data):
+        identity = orjson.dumps(data)
+        self.version = version
+        self.bodies = {"identity": identity, "gzip": gzip.compress(identity, GZIP_LEVEL, mtime=0)}
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(identity, quality=BROTLI_QUALITY)
+        self.size = sum(len(b) for b in self.bodies.values())
+
+
+def available_encodings() -> tuple:
+    return tuple(e for e in ENCODINGS if e != "br" or brotli is not None)
+
+
+def negotiate(accept_encoding: str) -> str:
+    """Pick a content coding from an Accept-Encoding header (q-values honoured)"""
+    if not accept_encoding:
+        return "identity"
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+    best, best_q = "identity", 0.0
+    for coding in available_encodings():
+        q = weights.get(coding, weights.get("*"))
+        if q is None:
+            q = 0.001 if coding == "identity" else 0.0  # identity is a fallback unless excluded
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class PayloadCache:
+    """Encoded response bodies keyed by entity id, tagged with the entity version.
+
+    A lookup with a newer version rebuilds the entry, so writes need no
+    explicit invalidation and every worker converges on its own. Least
+    recently used entries are dropped past max_bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, EncodedPayload]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def put(self, key: str, version: int, data) -> EncodedPayload:
+        payload = EncodedPayload(version, data)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = payload
+            self._bytes += payload.size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+        return payload
+
+    def get(self, key: str, version: int, build) -> EncodedPayload:
+        """Cached payload for this version of the entity, encoding build() on a miss"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None and payload.version == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+            self.misses += 1
+        return self.put(key, version, build())
+
+    def json_body(self, key: str, version: int, build) -> bytes:
+        """Uncompressed body from the cache if present, else encoded on the spot (not compressed or stored)"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None and payload.version == version:
+                self.hits += 1
+                return payload.bodies["identity"]
+        return orjson.dumps(build())
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.evictions,
+            "encodings": list(available_encodings())
+        }
+
+
+episode_payloads = PayloadCache(EPISODE_PAYLOAD_CACHE_MAX_BYTES)
@@ -0,0 +1,344 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict
+
+from awards import Event, WATCHED
+from models import UserProgress
+
+
+class IdCodec:
+    """Interns string IDs as small ints shared by every user's progress record.
+
+    Each ID string is stored once, and the same int object is handed out for
+    it, so per-user sets hold pointers instead of copies of UUID strings.
+    """
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self._ids = []
+        self._lock = threading.Lock()
+
+    def encode(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self._ids)
+                    self._ids.append(value)
+                    self._codes[value] = code
+        return code
+
+    def lookup(self, value: str):
+        """Code for value if it has been seen, without interning it"""
+        return self._codes.get(value)
+
+    def decode(self, code: int) -> str:
+        return self._ids[code]
+
+
+ids = IdCodec()
+
+
+class EpisodeSlots:
+    """Maps each episode to (course code, bit position in the course).
+
+    A user's watched episodes of one course then fit in a single int
+    bitmask, and the course's watched count is its popcount.
+    """
+
+    def __init__(self, locate):
+        self.locate = locate  # episode_id -> (course_id, position, course size) or None
+        self._slots: Dict[int, tuple] = {}  # episode code -> (course code, position)
+        self._episodes: Dict[tuple, str] = {}  # (course code, position) -> episode id
+        self._sizes: Dict[int, int] = {}  # course code -> number of episodes
+
+    def slot(self, episode_id: str):
+        code = ids.encode(episode_id)
+        slot = self._slots.get(code)
+        if slot is None:
+            found = self.locate(episode_id)
+            if found is None:
+                return None
+            slot = (ids.encode(found[0]), found[1])
+            self._sizes[slot[0]] = found[2]
+            self._slots[code] = slot
+            self._episodes[slot] = episode_id
+        return slot
+
+    def episode(self, course_code: int, position: int) -> str:
+        return self._episodes[(course_code, position)]
+
+    def course_size(self, course_code: int) -> int:
+        return self._sizes.get(course_code, 0)
+
+
+class CourseProgress:
+    """One user's progress through one course, updated in O(1) per watched episode"""
+
+    __slots__ = ("watched", "count", "last_watched", "next_position")
+
+    def __init__(self):
+        self.watched = 0            # bitmask of watched episode positions
+        self.count = 0              # popcount of watched, kept so reads never recount
+        self.last_watched = 0.0     # epoch seconds of the latest watch
+        self.next_position = 0      # first unwatched episode after the latest one watched, None when all are
+
+    def watch(self, position: int, course_size: int, at: float) -> bool:
+        """Record a watch (first or repeat) at time at; returns True if the episode was new"""
+        newly_watched = not self.watched >> position & 1
+        if newly_watched:
+            self.watched |= 1 << position
+            self.count += 1
+        self.last_watched = max(self.last_watched, at)
+        self.next_position = self._unwatched_from(position + 1, course_size)
+        if self.next_position is None:
+            # Nothing unwatched after this one; go back for anything skipped
+            self.next_position = self._unwatched_from(0, course_size)
+        return newly_watched
+
+    def _unwatched_from(self, start: int, course_size: int):
+        free = ~self.watched >> start  # negative: unwatched positions are the set bits
+        position = start + (free & -free).bit_length() - 1
+        return position if position < course_size else None
+
+
+class ProgressRecord:
+    """One user's progress. Containers are created on first use to keep idle users small."""
+
+    __slots__ = ("courses", "completed", "my_list", "achievements", "counters", "binge_streak", "last_watch_date")
+
+    def __init__(self):
+        self.courses = None         # course code -> CourseProgress, least recently watched first
+        self.completed = None       # dict of course codes (insertion ordered, values unused)
+        self.my_list = None         # dict of course codes (insertion ordered, values unused)
+        self.achievements = None    # dict of achievement ids (insertion ordered, values unused)
+        self.counters = None        # achievement counters and streak state (see awards.py)
+        self.binge_streak = 0
+        self.last_watch_date = None
+
+    def watch(self, slot: tuple, course_size: int, at: float) -> bool:
+        """Mark the episode at slot watched and move its course to the most recently watched end"""
+        if self.courses is None:
+            self.courses = {}
+        course = self.courses.pop(slot[0], None) or CourseProgress()
+        self.courses[slot[0]] = course
+        return course.watch(slot[1], course_size, at)
+
+    def has_watched(self, slot: tuple) -> bool:
+        course = self.courses.get(slot[0]) if self.courses else None
+        return course is not None and bool(course.watched >> slot[1] & 1)
+
+    def watched_counts(self) -> dict:
+        """course_id -> watched episode count, for courses with any watched"""
+        return {ids.decode(code): course.count for code, course in list((self.courses or {}).items())}
+
+    def in_my_list(self, course_id: str) -> bool:
+        code = ids.lookup(course_id)
+        return code is not None and self.my_list is not None and code in self.my_list
+
+    def has_completed(self, course_id: str) -> bool:
+        code = ids.lookup(course_id)
+        return code is not None and self.completed is not None and code in self.completed
+
+    def has_achievement(self, achievement_id: str) -> bool:
+        return self.achievements is not None and achievement_id in self.achievements
+
+    def unlock(self, achievement_id: str):
+        if self.achievements is None:
+            self.achievements = {}
+        self.achievements[achievement_id] = None
+
+    def counter(self, name: str) -> int:
+        return self.counters.get(name, 0) if self.counters else 0
+
+    def my_list_ids(self) -> list:
+        return [ids.decode(c) for c in self.my_list or ()]
+
+    def completed_ids(self) -> list:
+        return [ids.decode(c) for c in self.completed or ()]
+
+    def watched_ids(self, slots: EpisodeSlots) -> list:
+        watched = []
+        for course_code, course in (self.courses or {}).items():
+            mask = course.watched
+            position = 0
+            while mask:
+                if mask & 1:
+                    watched.append(slots.episode(course_code, position))
+                mask >>= 1
+                position += 1
+        return watched
+
+    def to_model(self, user_id: str, slots: EpisodeSlots) -> UserProgress:
+        return UserProgress(
+            user_id=user_id,
+            watched_episodes=self.watched_ids(slots),
+            completed_courses=self.completed_ids(),
+            my_list=self.my_list_ids(),
+            achievements=list(self.achievements or ()),
+            counters=dict(self.counters or {}),
+            binge_streak=self.binge_streak,
+            last_watch_date=self.last_watch_date
+        )
+
+
+class ProgressStore:
+    """Per-user progress keyed by user id, written through to the repository.
+
+    Every operation touches a constant number of set/dict entries and
+    repository rows, however much the user has watched. Each user has their
+    own lock, so one user's repository writes never wait on another's.
+    """
+
+    def __init__(self, repository, locate_episode, engine):
+        self.repository = repository
+        self.slots = EpisodeSlots(locate_episode)
+        self.engine = engine  # AchievementEngine fed every progress event
+        self._records: Dict[str, ProgressRecord] = {}
+        self._user_locks: Dict[str, threading.RLock] = {}
+        self._lock = threading.Lock()  # guards the two maps only
+
+    def _load(self, user_id: str) -> ProgressRecord:
+        record = ProgressRecord()
+        saved = self.repository.get_progress(user_id)
+        if saved:
+            record.binge_streak = saved.binge_streak
+            record.last_watch_date = saved.last_watch_date
+            record.counters = dict(saved.counters) or None
+        items = self.repository.load_progress_items(user_id)
+        # Replaying oldest first rebuilds each course's counters and the recency order
+        for kind, item, at in items:
+            self._apply(record, kind, item, at)
+        return record
+
+    def _apply(self, record: ProgressRecord, kind: str, item: str, at: float):
+        if kind == "watched":
+            slot = self.slots.slot(item)
+            if slot is None:
+                return  # Episode no longer in the catalog
+            record.watch(slot, self.slots.course_size(slot[0]), at)
+        elif kind == "completed":
+            if record.completed is None:
+                record.completed = {}
+            record.completed[ids.encode(item)] = None
+        elif kind == "my_list":
+            if record.my_list is None:
+                record.my_list = {}
+            record.my_list[ids.encode(item)] = None
+        elif kind == "achievement":
+            record.unlock(item)
+
+    def _user_lock(self, user_id: str) -> threading.RLock:
+        lock = self._user_locks.get(user_id)
+        if lock is None:
+            with self._lock:
+                lock = self._user_locks.setdefault(user_id, threading.RLock())
+        return lock
+
+    def get(self, user_id: str) -> ProgressRecord:
+        record = self._records.get(user_id)
+        if record is None:
+            with self._user_lock(user_id):
+                record = self._records.get(user_id)
+                if record is None:
+                    record = self._load(user_id)
+                    with self._lock:
+                        self._records[user_id] = record
+        return record
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def evict(self, user_id: str):
+        """Drop a cached record (another worker changed it); it reloads on next access"""
+        with self._lock:
+            self._records.pop(user_id, None)
+
+    def _add(self, user_id: str, record: ProgressRecord, kind: str, item: str):
+        self.repository.add_progress_item(user_id, kind, item)
+        self._apply(record, kind, item, time.time())
+
+    def _save(self, user_id: str, record: ProgressRecord):
+        self.repository.save_progress(UserProgress(
+            user_id=user_id,
+            counters=dict(record.counters or {}),
+            binge_streak=record.binge_streak,
+            last_watch_date=record.last_watch_date
+        ))
+
+    def _emit(self, user_id: str, record: ProgressRecord, event: Event) -> tuple:
+        """Run the achievement rules for event; persists unlocks, returns (unlocked ids, counters changed)"""
+        unlocked, changed = self.engine.apply(record, event)
+        for achievement_id in unlocked:
+            self.repository.add_progress_item(user_id, "achievement", achievement_id)
+        return unlocked, changed
+
+    def mark_watched(self, user_id: str, episode_id: str):
+        """Record a watched episode; returns (newly_watched, newly unlocked achievement ids)"""
+        with self._user_lock(user_id):
+            record = self.get(user_id)
+            slot = self.slots.slot(episode_id)
+            if slot is None:
+                return False, []
+            newly_watched = not record.has_watched(slot)
+            course_completed = False
+            if not newly_watched:
+                # A rewatch moves the course up and its next pointer on; the new watch time is
+                # persisted so a reload (or another worker) replays it in the same order
+                self.repository.touch_progress_item(user_id, "watched", episode_id)
+                record.watch(slot, self.slots.course_size(slot[0]), time.time())
+            else:
+                self._add(user_id, record, "watched", episode_id)
+                record.last_watch_date = datetime.now().isoformat()
+                course_id = ids.decode(slot[0])
+                if record.courses[slot[0]].count >= self.slots.course_size(slot[0]) and not record.has_completed(course_id):
+                    self._add(user_id, record, "completed", course_id)
+                    course_completed = True
+
+            # A rewatch still counts toward the day's streak
+            unlocked, changed = self._emit(user_id, record, Event(WATCHED, newly_watched=newly_watched, course_completed=course_completed))
+            if newly_watched or changed:
+                self._save(user_id, record)
+            return newly_watched, unlocked
+
+    def record_event(self, user_id: str, event: Event) -> list:
+        """Count a non-watch progress event (quiz scored, question asked, ...); returns newly unlocked achievement ids"""
+        with self._user_lock(user_id):
+            record = self.get(user_id)
+            unlocked, changed = self._emit(user_id, record, event)
+            if changed:
+                self._save(user_id, record)
+            return unlocked
+
+    def in_progress(self, user_id: str, limit: int) -> list:
+        """(course_id, CourseProgress) for started but unfinished courses, most recently watched first.
+
+        Walks the recency order from the newest end, so the cost is the number
+        returned plus any recently finished courses skipped on the way.
+        """
+        with self._user_lock(user_id):
+            record = self.get(user_id)
+            started = []
+            for code in reversed(record.courses or {}):
+                course = record.courses[code]
+                if course.count < self.slots.course_size(code):
+                    started.append((ids.decode(code), course))
+                    if len(started) >= limit:
+                        break
+            return started
+
+    def add_to_list(self, user_id: str, course_id: str):
+        with self._user_lock(user_id):
+            record = self.get(user_id)
+            if not record.in_my_list(course_id):
+                self._add(user_id, record, "my_list", course_id)
+
+    def remove_from_list(self, user_id: str, course_id: str):
+        with self._user_lock(user_id):
+            record = self.get(user_id)
+            if record.in_my_list(course_id):
+                self.repository.remove_progress_item(user_id, "my_list", course_id)
+                del record.my_list[ids.encode(course_id)]
@@ -0,0 +1,363 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+
+from models import Course, Episode, Question, User, UserProgress, Job
+
+# "sqlite" persists the catalog, questions, users, sessions and progress across restarts;
+# "memory" keeps the old behaviour (everything is lost when the process exits)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sqlite").lower()
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+DATABASE_PATH = os.getenv("DATABASE_PATH", os.path.join(backend_dir, "badgerflix.db"))
+# How long change notifications are kept for workers to catch up on
+CHANGE_LOG_RETENTION = int(os.getenv("CHANGE_LOG_RETENTION", "3600"))  # Seconds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (id TEXT PRIMARY KEY, subject TEXT NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_courses_subject ON courses (subject COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS episodes (id TEXT PRIMARY KEY, course_id TEXT NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_episodes_course_id ON episodes (course_id);
+CREATE TABLE IF NOT EXISTS questions (id TEXT PRIMARY KEY, episode_id TEXT NOT NULL, answered INTEGER NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_questions_episode_id ON questions (episode_id, answered);
+CREATE TABLE IF NOT EXISTS users (email TEXT PRIMARY KEY, id TEXT NOT NULL UNIQUE, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS sessions (token TEXT PRIMARY KEY, user_id TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS progress (user_id TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, course_id TEXT, created_at REAL NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_jobs_course ON jobs (kind, course_id, created_at);
+CREATE TABLE IF NOT EXISTS progress_items (user_id TEXT NOT NULL, kind TEXT NOT NULL, item TEXT NOT NULL, added_at REAL NOT NULL, PRIMARY KEY (user_id, kind, item)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, key TEXT NOT NULL, at REAL NOT NULL, origin TEXT NOT NULL DEFAULT '');
+CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL);
+"""
+
+# Statements are module constants so each connection's statement cache reuses the prepared form
+UPSERT_COURSE = "INSERT OR REPLACE INTO courses (id, subject, data) VALUES (?, ?, ?)"
+UPSERT_EPISODE = "INSERT OR REPLACE INTO episodes (id, course_id, data) VALUES (?, ?, ?)"
+UPSERT_QUESTION = "INSERT OR REPLACE INTO questions (id, episode_id, answered, data) VALUES (?, ?, ?, ?)"
+UPSERT_USER = "INSERT OR REPLACE INTO users (email, id, data) VALUES (?, ?, ?)"
+UPSERT_SESSION = "INSERT OR REPLACE INTO sessions (token, user_id) VALUES (?, ?)"
+UPSERT_PROGRESS = "INSERT OR REPLACE INTO progress (user_id, data) VALUES (?, ?)"
+UPSERT_JOB = "INSERT OR REPLACE INTO jobs (id, kind, course_id, created_at, data) VALUES (?, ?, ?, ?, ?)"
+INSERT_CHANGE = "INSERT INTO changes (kind, key, at, origin) VALUES (?, ?, ?, ?)"
+INSERT_PROGRESS_ITEM = "INSERT OR IGNORE INTO progress_items (user_id, kind, item, added_at) VALUES (?, ?, ?, ?)"
+TOUCH_PROGRESS_ITEM = "UPDATE progress_items SET added_at = ? WHERE user_id = ? AND kind = ? AND item = ?"
+DELETE_PROGRESS_ITEM = "DELETE FROM progress_items WHERE user_id = ? AND kind = ? AND item = ?"
+DELETE_SESSION = "DELETE FROM sessions WHERE token = ?"
+DELETE_OLD_CHANGES = "DELETE FROM changes WHERE at < ?"
+DELETE_EXPIRED_LEASE = "DELETE FROM leases WHERE name = ? AND expires_at < ?"
+INSERT_LEASE = "INSERT OR IGNORE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)"
+DELETE_LEASE = "DELETE FROM leases WHERE name = ? AND owner = ?"
+SELECT_COURSE = "SELECT data FROM courses WHERE id = ?"
+SELECT_EPISODE = "SELECT data FROM episodes WHERE id = ?"
+SELECT_QUESTION = "SELECT data FROM questions WHERE id = ?"
+SELECT_USER = "SELECT data FROM users WHERE email = ?"
+SELECT_USER_BY_ID = "SELECT data FROM users WHERE id = ?"
+SELECT_SESSION = "SELECT user_id FROM sessions WHERE token = ?"
+SELECT_PROGRESS = "SELECT data FROM progress WHERE user_id = ?"
+SELECT_COURSES_BY_SUBJECT = "SELECT data FROM courses WHERE subject = ? COLLATE NOCASE"
+SELECT_EPISODES_BY_COURSE = "SELECT data FROM episodes WHERE course_id = ?"
+SELECT_QUESTIONS_BY_EPISODE = "SELECT data FROM questions WHERE episode_id = ? AND answered = ?"
+SELECT_JOB = "SELECT data FROM jobs WHERE id = ?"
+SELECT_LATEST_COURSE_JOB = "SELECT data FROM jobs WHERE kind = ? AND course_id = ? ORDER BY created_at DESC LIMIT 1"
+SELECT_PROGRESS_ITEMS = "SELECT kind, item, added_at FROM progress_items WHERE user_id = ? ORDER BY added_at"
+SELECT_CHANGES_SINCE = "SELECT seq, kind, key, origin FROM changes WHERE seq > ? ORDER BY seq"
+SELECT_LAST_CHANGE = "SELECT COALESCE(MAX(seq), 0) FROM changes"
+SELECT_LEASE_OWNER = "SELECT owner FROM leases WHERE name = ?"
+
+
+class MemoryRepository:
+    """Process-local repository - the reference implementation of the repository API"""
+
+    shared = False  # Nothing to share with other worker processes
+
+    def __init__(self):
+        self.courses: Dict[str, Course] = {}
+        self.episodes: Dict[str, Episode] = {}
+        self.questions: Dict[str, Question] = {}
+        self.users: Dict[str, User] = {}
+        self.sessions: Dict[str, str] = {}
+        self.progress: Dict[str, UserProgress] = {}
+        self.progress_items: Dict[str, dict] = {}  # user_id -> {(kind, item): added_at}, insertion ordered
+
+    def save_catalog(self, courses: List[Course], episodes: List[Episode]):
+        for ep in episodes:
+            self.episodes[ep.id] = ep
+        for course in courses:
+            self.courses[course.id] = course
+
+    def save_question(self, question: Question):
+        self.questions[question.id] = question
+
+    def save_users(self, users: List[User]):
+        for user in users:
+            self.users[user.email] = user
+
+    def save_session(self, token: str, user_id: str):
+        self.sessions[token] = user_id
+
+    def delete_session(self, token: str):
+        self.sessions.pop(token, None)
+
+    def save_progress(self, progress: UserProgress):
+        self.progress[progress.user_id] = progress
+
+    def add_progress_item(self, user_id: str, kind: str, item: str):
+        self.progress_items.setdefault(user_id, {}).setdefault((kind, item), time.time())
+
+    def touch_progress_item(self, user_id: str, kind: str, item: str):
+        """Move an existing item's added_at to now, so replay puts it last"""
+        items = self.progress_items.get(user_id, {})
+        if items.pop((kind, item), None) is not None:
+            items[(kind, item)] = time.time()
+
+    def remove_progress_item(self, user_id: str, kind: str, item: str):
+        self.progress_items.get(user_id, {}).pop((kind, item), None)
+
+    def load_progress_items(self, user_id: str) -> list:
+        return [(kind, item, added_at) for (kind, item), added_at in self.progress_items.get(user_id, {}).items()]
+
+    def get_course(self, course_id: str):
+        return self.courses.get(course_id)
+
+    def get_episode(self, episode_id: str):
+        return self.episodes.get(episode_id)
+
+    def get_question(self, question_id: str):
+        return self.questions.get(question_id)
+
+    def get_user(self, email: str):
+        return self.users.get(email)
+
+    def get_user_by_id(self, user_id: str):
+        return next((u for u in self.users.values() if u.id == user_id), None)
+
+    def get_session(self, token: str):
+        return self.sessions.get(token)
+
+    def get_progress(self, user_id: str):
+        return self.progress.get(user_id)
+
+    def courses_by_subject(self, subject: str) -> List[Course]:
+        return [c for c in self.courses.values() if c.subject.lower() == subject.lower()]
+
+    def episodes_by_course(self, course_id: str) -> List[Episode]:
+        return [e for e in self.episodes.values() if e.course_id == course_id]
+
+    def questions_by_episode(self, episode_id: str, answered: bool) -> List[Question]:
+        return [q for q in self.questions.values() if q.episode_id == episode_id and bool(q.answer_text) == answered]
+
+    def load_catalog(self):
+        return list(self.courses.values()), list(self.episodes.values())
+
+    def load_questions(self) -> List[Question]:
+        return list(self.questions.values())
+
+    def save_job(self, job: Job):
+        pass
+
+    def get_job(self, job_id: str):
+        return None
+
+    def latest_course_job(self, kind: str, course_id: str):
+        return None
+
+    def last_change_seq(self) -> int:
+        return 0
+
+    def changes_since(self, seq: int) -> list:
+        return []
+
+    def try_acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        return True
+
+    def release_lease(self, name: str, owner: str):
+        pass
+
+
+class SQLiteRepository:
+    """SQLite repository in WAL mode: readers never block the (single) writer.
+
+    Each thread gets its own connection; models are stored as JSON next to
+    the indexed columns used for lookups. Every write also appends to the
+    `changes` log in the same transaction, so other worker processes sharing
+    the database file can invalidate their hot caches (see changes_since).
+    """
+
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().executescript(SCHEMA)
+        # Identifies this process's own entries in the change log
+        self.origin = f"{os.getpid()}:{id(self)}"
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _fetch_one(self, sql: str, key: str):
+        row = self._conn().execute(sql, (key,)).fetchone()
+        return row[0] if row else None
+
+    def _record_changes(self, conn: sqlite3.Connection, kind: str, keys: list):
+        now = time.time()
+        last_seq = None
+        for key in keys:
+            last_seq = conn.execute(INSERT_CHANGE, (kind, key, now, self.origin)).lastrowid
+        # Trim the log every 1000 changes; workers that fall further behind do a full reload
+        if last_seq and last_seq // 1000 != (last_seq - len(keys)) // 1000:
+            conn.execute(DELETE_OLD_CHANGES, (now - CHANGE_LOG_RETENTION,))
+
+    def save_catalog(self, courses: List[Course], episodes: List[Episode]):
+        """Write courses and their episodes in one transaction"""
+        with self._conn() as conn:
+            conn.executemany(UPSERT_EPISODE, [(e.id, e.course_id, e.model_dump_json()) for e in episodes])
+            conn.executemany(UPSERT_COURSE, [(c.id, c.subject, c.model_dump_json()) for c in courses])
+            self._record_changes(conn, "episode", [e.id for e in episodes])
+            self._record_changes(conn, "course", [c.id for c in courses])
+
+    def save_question(self, question: Question):
+        with self._conn() as conn:
+            conn.execute(UPSERT_QUESTION, (question.id, question.episode_id, int(bool(question.answer_text)), question.model_dump_json()))
+            self._record_changes(conn, "question", [question.id])
+
+    def save_users(self, users: List[User]):
+        with self._conn() as conn:
+            conn.executemany(UPSERT_USER, [(u.email, u.id, u.model_dump_json()) for u in users])
+            self._record_changes(conn, "user", [u.email for u in users])
+
+    def save_session(self, token: str, user_id: str):
+        # New sessions need no notification - other workers read through on a miss
+        with self._conn() as conn:
+            conn.execute(UPSERT_SESSION, (token, user_id))
+
+    def delete_session(self, token: str):
+        with self._conn() as conn:
+            conn.execute(DELETE_SESSION, (token,))
+            self._record_changes(conn, "session", [token])
+
+    def save_progress(self, progress: UserProgress):
+        with self._conn() as conn:
+            conn.execute(UPSERT_PROGRESS, (progress.user_id, progress.model_dump_json()))
+            self._record_changes(conn, "progress", [progress.user_id])
+
+    def add_progress_item(self, user_id: str, kind: str, item: str):
+        with self._conn() as conn:
+            conn.execute(INSERT_PROGRESS_ITEM, (user_id, kind, item, time.time()))
+            self._record_changes(conn, "progress", [user_id])
+
+    def touch_progress_item(self, user_id: str, kind: str, item: str):
+        """Move an existing item's added_at to now, so replay puts it last"""
+        with self._conn() as conn:
+            conn.execute(TOUCH_PROGRESS_ITEM, (time.time(), user_id, kind, item))
+            self._record_changes(conn, "progress", [user_id])
+
+    def remove_progress_item(self, user_id: str, kind: str, item: str):
+        with self._conn() as conn:
+            conn.execute(DELETE_PROGRESS_ITEM, (user_id, kind, item))
+            self._record_changes(conn, "progress", [user_id])
+
+    def load_progress_items(self, user_id: str) -> list:
+        """(kind, item, added_at) rows for a user, oldest first"""
+        return self._conn().execute(SELECT_PROGRESS_ITEMS, (user_id,)).fetchall()
+
+    def save_job(self, job: Job):
+        with self._conn() as conn:
+            conn.execute(UPSERT_JOB, (job.id, job.kind, job.course_id, job.created_at, job.model_dump_json()))
+
+    def get_job(self, job_id: str):
+        data = self._fetch_one(SELECT_JOB, job_id)
+        return Job.model_validate_json(data) if data else None
+
+    def latest_course_job(self, kind: str, course_id: str):
+        row = self._conn().execute(SELECT_LATEST_COURSE_JOB, (kind, course_id)).fetchone()
+        return Job.model_validate_json(row[0]) if row else None
+
+    def last_change_seq(self) -> int:
+        return self._conn().execute(SELECT_LAST_CHANGE).fetchone()[0]
+
+    def changes_since(self, seq: int) -> list:
+        """(seq, kind, key, origin) rows written after seq, oldest first"""
+        return self._conn().execute(SELECT_CHANGES_SINCE, (seq,)).fetchall()
+
+    def try_acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Claim a named lease for ttl seconds; True if `owner` holds it"""
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(DELETE_EXPIRED_LEASE, (name, now))
+            conn.execute(INSERT_LEASE, (name, owner, now + ttl))
+            row = conn.execute(SELECT_LEASE_OWNER, (name,)).fetchone()
+        return bool(row) and row[0] == owner
+
+    def release_lease(self, name: str, owner: str):
+        """Give up a lease early; no-op unless `owner` holds it"""
+        with self._conn() as conn:
+            conn.execute(DELETE_LEASE, (name, owner))
+
+    def get_course(self, course_id: str):
+        data = self._fetch_one(SELECT_COURSE, course_id)
+        return Course.model_validate_json(data) if data else None
+
+    def get_episode(self, episode_id: str):
+        data = self._fetch_one(SELECT_EPISODE, episode_id)
+        return Episode.model_validate_json(data) if data else None
+
+    def get_question(self, question_id: str):
+        data = self._fetch_one(SELECT_QUESTION, question_id)
+        return Question.model_validate_json(data) if data else None
+
+    def get_user(self, email: str):
+        data = self._fetch_one(SELECT_USER, email)
+        return User.model_validate_json(data) if data else None
+
+    def get_user_by_id(self, user_id: str):
+        data = self._fetch_one(SELECT_USER_BY_ID, user_id)
+        return User.model_validate_json(data) if data else None
+
+    def get_session(self, token: str):
+        return self._fetch_one(SELECT_SESSION, token)
+
+    def get_progress(self, user_id: str):
+        data = self._fetch_one(SELECT_PROGRESS, user_id)
+        return UserProgress.model_validate_json(data) if data else None
+
+    def courses_by_subject(self, subject: str) -> List[Course]:
+        rows = self._conn().execute(SELECT_COURSES_BY_SUBJECT, (subject,)).fetchall()
+        return [Course.model_validate_json(r[0]) for r in rows]
+
+    def episodes_by_course(self, course_id: str) -> List[Episode]:
+        rows = self._conn().execute(SELECT_EPISODES_BY_COURSE, (course_id,)).fetchall()
+        return [Episode.model_validate_json(r[0]) for r in rows]
+
+    def questions_by_episode(self, episode_id: str, answered: bool) -> List[Question]:
+        rows = self._conn().execute(SELECT_QUESTIONS_BY_EPISODE, (episode_id, int(answered))).fetchall()
+        return [Question.model_validate_json(r[0]) for r in rows]
+
+    def load_catalog(self):
+        conn = self._conn()
+        courses = [Course.model_validate_json(r[0]) for r in conn.execute("SELECT data FROM courses")]
+        episodes = [Episode.model_validate_json(r[0]) for r in conn.execute("SELECT data FROM episodes")]
+        return courses, episodes
+
+    def load_questions(self) -> List[Question]:
+        return [Question.model_validate_json(r[0]) for r in self._conn().execute("SELECT data FROM questions")]
+
+
+def create_repository(backend: str = STORAGE_BACKEND, path: str = DATABASE_PATH):
+    if backend == "memory":
+        print("[STORAGE] Using in-memory repository (data is lost on restart)")
+        return MemoryRepository()
+    if backend != "sqlite":
+        raise ValueError(f"Unknown STORAGE_BACKEND '{backend}' (expected 'sqlite' or 'memory')")
+    print(f"[STORAGE] Using SQLite repository at {path}")
+    return SQLiteRepository(path)
@@ -0,0 +1,157 @@
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+# Passage windows: PASSAGE_WINDOW sentences each, starting every PASSAGE_STRIDE sentences
+PASSAGE_WINDOW = int(os.getenv("PASSAGE_WINDOW", "3"))
+PASSAGE_STRIDE = int(os.getenv("PASSAGE_STRIDE", "2"))
+# Prompt budget for retrieved context (replaces the old transcript[:2000] cut)
+CONTEXT_MAX_CHARS = int(os.getenv("CONTEXT_MAX_CHARS", "2000"))
+CONTEXT_TOP_K = int(os.getenv("CONTEXT_TOP_K", "4"))
+# Most episodes whose passage index is kept in memory; the rest are rebuilt on demand
+PASSAGE_INDEX_MAX_ENTRIES = int(os.getenv("PASSAGE_INDEX_MAX_ENTRIES", "2000"))
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "can", "do", "does", "for", "from",
+    "how", "i", "if", "in", "is", "it", "its", "me", "of", "on", "or", "so", "that", "the",
+    "this", "to", "was", "we", "what", "when", "where", "which", "who", "why", "will", "with", "you",
+}
+
+
+def split_sentences(text: str, max_len: int = None) -> list:
+    """Split text on sentence boundaries, keeping the punctuation.
+
+    Run-on "sentences" longer than max_len (unpunctuated transcripts) are
+    broken at word boundaries.
+    """
+    sentences = []
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        sentence = sentence.strip()
+        while max_len and len(sentence) > max_len:
+            cut = sentence.rfind(" ", 0, max_len)
+            if cut <= 0:
+                cut = max_len
+            sentences.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+def tokenize(text: str) -> list:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class PassageIndex:
+    """BM25 index over sentence-window passages of one episode transcript.
+
+    Postings are stored term-major in flat NumPy arrays (CSR layout), so a
+    query scores all passages with a few vectorized ops per query term.
+    """
+
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self, text: str, window: int = PASSAGE_WINDOW, stride: int = PASSAGE_STRIDE):
+        sentences = split_sentences(text, max_len=CONTEXT_MAX_CHARS // 2)
+        starts = range(0, max(1, len(sentences) - window + stride), stride)
+        self.passages = [" ".join(sentences[i:i + window]) for i in starts if sentences[i:i + window]]
+
+        counts = {}  # term -> {passage: tf}
+        lengths = []
+        for p, passage in enumerate(self.passages):
+            tokens = tokenize(passage)
+            lengths.append(len(tokens))
+            for token in tokens:
+                postings = counts.setdefault(token, {})
+                postings[p] = postings.get(p, 0) + 1
+
+        self.vocab = {term: i for i, term in enumerate(counts)}
+        self.indptr = np.zeros(len(counts) + 1, dtype=np.int32)
+        docs, tfs = [], []
+        for i, postings in enumerate(counts.values()):
+            docs.extend(postings.keys())
+            tfs.extend(postings.values())
+            self.indptr[i + 1] = len(docs)
+        self.doc_ids = np.asarray(docs, dtype=np.int32)
+        self.tfs = np.asarray(tfs, dtype=np.float32)
+
+        n = len(self.passages)
+        df = np.diff(self.indptr).astype(np.float32)
+        self.idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+        self.lengths = np.asarray(lengths, dtype=np.float32)
+        avg_length = float(self.lengths.mean()) if n else 0.0
+        # Per-passage length normalization, precomputed once
+        self.norm = self.k1 * (1 - self.b + self.b * self.lengths / avg_length) if avg_length else np.full(n, self.k1, dtype=np.float32)
+
+    def score(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.passages), dtype=np.float32)
+        for token in set(tokenize(query)):
+            t = self.vocab.get(token)
+            if t is None:
+                continue
+            lo, hi = self.indptr[t], self.indptr[t + 1]
+            docs = self.doc_ids[lo:hi]
+            tf = self.tfs[lo:hi]
+            scores[docs] += self.idf[t] * tf * (self.k1 + 1) / (tf + self.norm[docs])
+        return scores
+
+    def top_passages(self, query: str, k: int = CONTEXT_TOP_K, max_chars: int = CONTEXT_MAX_CHARS) -> list:
+        """Best-matching passages for query, in transcript order, within max_chars"""
+        if not self.passages:
+            return []
+        scores = self.score(query)
+        if not scores.any():
+            # Nothing matched - fall back to the opening passages
+            ranked = list(range(len(self.passages)))
+        else:
+            ranked = [int(i) for i in np.argsort(-scores, kind="stable") if scores[i] > 0]
+
+        chosen = []
+        used = 0
+        for i in ranked:
+            if len(chosen) >= k:
+                break
+            length = len(self.passages[i])
+            if chosen and used + length > max_chars:
+                continue
+            chosen.append(i)
+            used += length
+        return [self.passages[i] for i in sorted(chosen)]
+
+
+passage_indexes = OrderedDict()  # episode id -> (transcript crc32, PassageIndex), least recently used first
+_index_lock = threading.Lock()
+
+
+def index_episode(episode_id: str, transcript: str) -> PassageIndex:
+    """Build (or rebuild) the passage index for an episode - called at ingest"""
+    transcript = transcript or ""
+    index = PassageIndex(transcript)
+    with _index_lock:
+        passage_indexes[episode_id] = (zlib.crc32(transcript.encode("utf-8")), index)
+        passage_indexes.move_to_end(episode_id)
+        while len(passage_indexes) > PASSAGE_INDEX_MAX_ENTRIES:
+            passage_indexes.popitem(last=False)
+    return index
+
+
+def select_context(episode_id: str, transcript: str, query: str, max_chars: int = CONTEXT_MAX_CHARS) -> str:
+    """Top-k transcript passages for query, joined for use in a prompt"""
+    with _index_lock:
+        entry = passage_indexes.get(episode_id)
+        if entry is not None:
+            passage_indexes.move_to_end(episode_id)
+    # Rebuilt if the transcript changed since it was indexed (e.g. by another worker)
+    if entry is None or entry[0] != zlib.crc32((transcript or "").encode("utf-8")):
+        index = index_episode(episode_id, transcript)
+    else:
+        index = entry[1]
+    passages = index.top_passages(query, max_chars=max_chars)
+    return "\n...\n".join(passages)[:max_chars]
@@ -0,0 +1,244 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+
+# Priority classes - lower runs first
+INTERACTIVE = 0  # Student is waiting on the answer (AI tutor)
+STANDARD = 1     # On-demand study tools
+BACKGROUND = 2   # Lecture ingest, pre-generation
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", STANDARD: "standard", BACKGROUND: "background"}
+
+# Outbound budgets (match these to the Gemini project's quota).
+# Split evenly across WEB_CONCURRENCY worker processes so the total stays within quota.
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "60"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))  # Seconds
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "32.0"))  # Seconds
+
+
+_local = threading.local()
+
+
+class priority_override:
+    """Context manager: calls made by this thread without an explicit priority use `priority`"""
+
+    def __init__(self, priority: int):
+        self.priority = priority
+
+    def __enter__(self):
+        self.previous = getattr(_local, "priority", None)
+        _local.priority = self.priority
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.priority = self.previous
+        return False
+
+
+def current_priority_override():
+    return getattr(_local, "priority", None)
+
+
+class FlightPriority:
+    """Priorities of the callers waiting on one coalesced call (see singleflight.py).
+
+    Outbound requests made while running the call are queued at the most
+    urgent of their own priority and the joiners', so a student who joins a
+    background pre-generation call does not wait at background priority.
+    A nested call inherits the boosts of the call it runs inside.
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.joined = ()  # priority overrides of the joiners; None means "the task's default"
+
+    def join(self, override):
+        if override not in self.joined:
+            self.joined += (override,)
+            scheduler.reprioritize()
+
+    def boost(self, default: int):
+        """Most urgent priority a joiner asked for, or None if nobody more urgent joined"""
+        requested = [default if p is None else p for p in self.joined]
+        if self.parent is not None:
+            inherited = self.parent.boost(default)
+            if inherited is not None:
+                requested.append(inherited)
+        return min(requested) if requested else None
+
+
+class flight_scope:
+    """Context manager: outbound requests made by this thread run under `flight`"""
+
+    def __init__(self, flight: FlightPriority):
+        self.flight = flight
+
+    def __enter__(self):
+        self.previous = getattr(_local, "flight", None)
+        _local.flight = self.flight
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.flight = self.previous
+        return False
+
+
+def current_flight():
+    return getattr(_local, "flight", None)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    error_msg = str(error).lower()
+    return (
+        "429" in error_msg
+        or "quota" in error_msg
+        or "rate limit" in error_msg
+        or "resource has been exhausted" in error_msg
+        or type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+    )
+
+
+class TokenBucket:
+    """Continuously refilling budget of `rate` units per minute (not thread-safe on its own)"""
+
+    def __init__(self, rate_per_minute: int):
+        self.capacity = float(rate_per_minute)
+        self.tokens = float(rate_per_minute)
+        self.fill_rate = rate_per_minute / 60.0
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.fill_rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if available now)"""
+        self._refill()
+        # A single request larger than the whole bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.fill_rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class OutboundScheduler:
+    """Admits outbound model calls in priority order within RPM/TPM budgets.
+
+    Callers block in run() until they are the highest-priority waiter and
+    both buckets have room; rate-limit errors are retried with jittered
+    exponential backoff.
+    """
+
+    def __init__(self, rpm: int, tpm: int, max_retries: int, backoff_base: float, backoff_max: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of [effective priority, seq, priority, task default, flight]
+        self._seq = itertools.count()
+        self._stats = {
+            name: {"calls": 0, "boosted": 0, "retries": 0, "rate_limited": 0, "failed": 0, "queue_wait_total": 0.0}
+            for name in PRIORITY_NAMES.values()
+        }
+
+    @staticmethod
+    def _effective(priority: int, default: int, flight) -> int:
+        boost = flight.boost(priority if default is None else default) if flight is not None else None
+        return priority if boost is None else min(priority, boost)
+
+    def _acquire(self, priority: int, est_tokens: int, default: int = None, flight: FlightPriority = None) -> int:
+        """Block until admitted; returns the priority the request was admitted at"""
+        ticket = [self._effective(priority, default, flight), next(self._seq), priority, default, flight]
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                if self._waiting[0] is ticket:
+                    wait = max(self.requests.wait_time(1), self.tokens.wait_time(est_tokens))
+                    if wait == 0:
+                        self.requests.take(1)
+                        self.tokens.take(est_tokens)
+                        heapq.heappop(self._waiting)
+                        self._cond.notify_all()
+                        return ticket[0]
+                    self._cond.wait(timeout=wait)
+                else:
+                    self._cond.wait()
+
+    def reprioritize(self):
+        """Re-rank queued requests after a flight's joiners changed"""
+        with self._cond:
+            for ticket in self._waiting:
+                if ticket[4] is not None:
+                    ticket[0] = self._effective(ticket[2], ticket[3], ticket[4])
+            heapq.heapify(self._waiting)
+            self._cond.notify_all()
+
+    def run(self, fn, priority: int = STANDARD, est_tokens: int = 0, default: int = None, flight: FlightPriority = None):
+        """Call fn() once admitted; retry it on rate-limit errors.
+
+        default is the task's own priority, used for flight joiners that gave
+        no override; flight (if any) may raise priority while queued.
+        """
+        stats = self._stats[PRIORITY_NAMES.get(priority, "standard")]
+        attempt = 0
+        while True:
+            queued_at = time.monotonic()
+            admitted = self._acquire(priority, est_tokens, default, flight)
+            with self._cond:
+                stats["calls"] += 1
+                if admitted < priority:
+                    stats["boosted"] += 1
+                stats["queue_wait_total"] += time.monotonic() - queued_at
+            try:
+                return fn()
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                with self._cond:
+                    stats["rate_limited"] += 1
+                    if attempt >= self.max_retries:
+                        stats["failed"] += 1
+                        raise
+                    stats["retries"] += 1
+                # Full jitter: sleep a random time up to the exponential cap
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+                print(f"[SCHED] Rate limited ({PRIORITY_NAMES.get(priority)}), retry {attempt + 1} in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "rpm": int(self.requests.capacity),
+                "tpm": int(self.tokens.capacity),
+                "queued": len(self._waiting),
+                "by_priority": {
+                    name: dict(counts, avg_queue_wait=round(counts["queue_wait_total"] / counts["calls"], 3) if counts["calls"] else 0.0)
+                    for name, counts in self._stats.items()
+                },
+            }
+
+
+def estimate_tokens(prompt, generation_config: dict = None) -> int:
+    """Rough token count for TPM budgeting: ~4 characters per token plus the output cap"""
+    if isinstance(prompt, str):
+        chars = len(prompt)
+    else:
+        chars = sum(len(p) for p in prompt if isinstance(p, str))
+    return chars // 4 + (generation_config or {}).get("max_output_tokens", 0)
+
+
+scheduler = OutboundScheduler(max(1, GEMINI_RPM // WEB_CONCURRENCY), max(1, GEMINI_TPM // WEB_CONCURRENCY), LLM_MAX_RETRIES, LLM_BACKOFF_BASE, LLM_BACKOFF_MAX)
@@ -0,0 +1,388 @@
+import bisect
+import io
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Dict
+
+import numpy as np
+
+from cache import CACHE_DIR, _atomic_write
+from retrieval import STOPWORDS
+
+SEARCH_SNAPSHOT_PATH = os.getenv("SEARCH_SNAPSHOT_PATH", os.path.join(CACHE_DIR, "search_index.npz"))
+SEARCH_SNAPSHOT_INTERVAL = int(os.getenv("SEARCH_SNAPSHOT_INTERVAL", "300"))  # Seconds between snapshots after writes
+SEARCH_MIN_PREFIX = int(os.getenv("SEARCH_MIN_PREFIX", "2"))  # Shortest last token expanded as a prefix
+SEARCH_PREFIX_EXPANSIONS = int(os.getenv("SEARCH_PREFIX_EXPANSIONS", "10"))  # Most frequent completions scored
+SNIPPET_CHARS = 160
+
+# Bump when tokenization or field weights change so old snapshots are discarded
+SEARCH_INDEX_VERSION = 1
+FIELD_WEIGHTS = {"title": 3.0, "key_points": 2.0, "description": 1.5, "summary": 1.5, "transcript": 1.0}
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+", re.IGNORECASE)
+
+
+def document_fields(kind: str, obj) -> list:
+    """(field, text) pairs indexed for a course or episode - offsets are into these joined by newlines"""
+    if kind == "course":
+        return [("title", obj.title), ("description", obj.description)]
+    return [("title", obj.title), ("summary", obj.summary), ("key_points", "\n".join(obj.key_points)), ("transcript", obj.transcript or "")]
+
+
+def tokens_with_offsets(text: str):
+    for match in TOKEN_PATTERN.finditer(text):
+        token = match.group().lower()
+        if token not in STOPWORDS:
+            yield token, match.start(), match.end()
+
+
+class _Growable:
+    """Append-only NumPy array that doubles its capacity (may start as a view into a snapshot)"""
+
+    __slots__ = ("data", "size")
+
+    def __init__(self, dtype, data=None):
+        self.data = np.zeros(4, dtype=dtype) if data is None else data
+        self.size = 0 if data is None else len(data)
+
+    def append(self, value):
+        if self.size == len(self.data):
+            grown = np.empty(max(4, self.size * 2), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size] = value
+        self.size += 1
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+class _Postings:
+    """Docs containing a term (ascending), their field-weighted tf and the term's first offset.
+
+    `impacts` caches the BM25 tf component per posting; it is recomputed when
+    the postings grow or the length normalization is refreshed. `df` caches
+    the number of live docs among them, recounted after postings grow or a
+    doc is tombstoned.
+    """
+
+    __slots__ = ("docs", "tfs", "offsets", "impacts", "impacts_key", "df", "df_key")
+
+    def __init__(self, docs=None, tfs=None, offsets=None):
+        self.docs = _Growable(np.int32, docs)
+        self.tfs = _Growable(np.float32, tfs)
+        self.offsets = _Growable(np.int32, offsets)
+        self.impacts = None
+        self.impacts_key = None
+        self.df = 0
+        self.df_key = None
+
+
+class SearchIndex:
+    """Incremental BM25 inverted index over course and episode text.
+
+    Adding a document appends to the postings of its terms; a changed
+    document is tombstoned and re-added under a new doc number.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.postings: Dict[str, _Postings] = {}
+        self.doc_keys = []  # doc number -> (kind, id)
+        self.doc_numbers: Dict[tuple, int] = {}  # (kind, id) -> live doc number
+        self.doc_lengths = _Growable(np.float32)
+        self.fingerprints = _Growable(np.uint32)
+        self.live = _Growable(np.bool_)
+        self.live_count = 0
+        self.total_length = 0.0
+        self._sorted_terms = []
+        self._pending_terms = []
+        self._norm = None  # BM25 length normalization per doc
+        self._norm_avg = 0.0  # average doc length _norm was computed with
+        self._norm_version = 0
+        self._tombstones = 0  # bumped per tombstone, invalidating cached document frequencies
+        self._save_lock = threading.Lock()  # held while a background snapshot is being written
+        self.dirty = False
+        self.last_snapshot = time.time()
+
+    def add(self, kind: str, doc_id: str, fields: list) -> bool:
+        """Index a document; no-op if it is already indexed with the same text"""
+        text = "\n".join(t for _, t in fields)
+        fingerprint = zlib.crc32(text.encode("utf-8"))
+        key = (kind, doc_id)
+        with self._lock:
+            existing = self.doc_numbers.get(key)
+            if existing is not None:
+                if self.fingerprints.data[existing] == fingerprint:
+                    return False
+                self._tombstone(existing)
+
+            doc = len(self.doc_keys)
+            tfs = {}
+            first_offsets = {}
+            length = 0.0
+            base = 0
+            for field, field_text in fields:
+                weight = FIELD_WEIGHTS[field]
+                for token, start, _ in tokens_with_offsets(field_text):
+                    tfs[token] = tfs.get(token, 0.0) + weight
+                    first_offsets.setdefault(token, base + start)
+                    length += weight
+                base += len(field_text) + 1
+
+            for token, tf in tfs.items():
+                postings = self.postings.get(token)
+                if postings is None:
+                    postings = self.postings[token] = _Postings()
+                    self._pending_terms.append(token)
+                postings.docs.append(doc)
+                postings.tfs.append(tf)
+                postings.offsets.append(first_offsets[token])
+
+            self.doc_keys.append(key)
+            self.doc_numbers[key] = doc
+            self.doc_lengths.append(length)
+            self.fingerprints.append(fingerprint)
+            self.live.append(True)
+            self.live_count += 1
+            self.total_length += length
+            self.dirty = True
+            return True
+
+    def _tombstone(self, doc: int):
+        self.live.data[doc] = False
+        self.live_count -= 1
+        self._tombstones += 1
+        self.total_length -= float(self.doc_lengths.data[doc])
+
+    def _terms_with_prefix(self, prefix: str) -> list:
+        if self._pending_terms:
+            # New terms are merged in on the next prefix query rather than on every insert
+            self._sorted_terms = sorted(self._sorted_terms + self._pending_terms)
+            self._pending_terms = []
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        matches = []
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        matches.sort(key=lambda t: -self.postings[t].docs.size)
+        expansions = matches[:SEARCH_PREFIX_EXPANSIONS]
+        if prefix in self.postings and prefix not in expansions:
+            # The word as typed may already be complete; never crowd it out
+            expansions = [prefix] + expansions[:SEARCH_PREFIX_EXPANSIONS - 1]
+        return expansions
+
+    def _length_norm(self) -> np.ndarray:
+        """Per-doc BM25 length normalization, refreshed only when the average length drifts by >2%"""
+        n = len(self.doc_keys)
+        avg_length = self.total_length / self.live_count or 1.0
+        if self._norm is None or abs(avg_length - self._norm_avg) > 0.02 * self._norm_avg:
+            self._norm_avg = avg_length
+            self._norm_version += 1
+            self._norm = self.k1 * (1 - self.b + self.b * self.doc_lengths.view() / avg_length)
+        elif self._norm.size < n:
+            # Docs added since: extend with the same average so cached impacts stay valid
+            tail = self.k1 * (1 - self.b + self.b * self.doc_lengths.view()[self._norm.size:] / self._norm_avg)
+            self._norm = np.concatenate([self._norm, tail])
+        return self._norm
+
+    def _term_scores(self, term: str, norm: np.ndarray):
+        postings = self.postings.get(term)
+        if postings is None:
+            return None, None
+        docs = postings.docs.view()
+        key = (docs.size, self._norm_version)
+        if postings.impacts_key != key:
+            tf = postings.tfs.view()
+            postings.impacts = tf * (self.k1 + 1) / (tf + norm[docs])
+            postings.impacts_key = key
+        df_key = (docs.size, self._tombstones)
+        if postings.df_key != df_key:
+            # Tombstoned (replaced) docs don't count toward document frequency
+            postings.df = int(np.count_nonzero(self.live.data[docs])) if self.live_count < len(self.doc_keys) else docs.size
+            postings.df_key = df_key
+        df = postings.df
+        idf = np.float32(np.log(1 + (self.live_count - df + 0.5) / (df + 0.5)))
+        return docs, postings.impacts * idf
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """Top documents as dicts with kind, id, score and the matched terms' first offsets"""
+        tokens = [t for t, _, _ in tokens_with_offsets(query)]
+        if not tokens:
+            return []
+        prefix = None
+        if query[-1:].isalnum() and len(tokens[-1]) >= SEARCH_MIN_PREFIX:
+            # Still typing the last word: match it as a prefix
+            prefix = tokens.pop()
+
+        with self._lock:
+            n = len(self.doc_keys)
+            if not self.live_count:
+                return []
+            norm = self._length_norm()
+            scores = np.zeros(n, dtype=np.float32)
+            terms = []
+            for token in set(tokens):
+                docs, contribution = self._term_scores(token, norm)
+                if docs is not None:
+                    scores[docs] += contribution
+                    terms.append(token)
+            if prefix:
+                # Best completion per document, so one prefix can't outweigh the whole query
+                best = np.zeros(n, dtype=np.float32)
+                for term in self._terms_with_prefix(prefix):
+                    docs, contribution = self._term_scores(term, norm)
+                    best[docs] = np.maximum(best[docs], contribution)
+                    terms.append(term)
+                scores += best
+            if self.live_count < n:
+                scores[~self.live.view()] = 0
+
+            k = min(limit, n)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            results = []
+            for doc in top:
+                if scores[doc] <= 0:
+                    break
+                kind, doc_id = self.doc_keys[doc]
+                results.append({
+                    "kind": kind,
+                    "id": doc_id,
+                    "score": round(float(scores[doc]), 4),
+                    "offsets": self._match_offsets(int(doc), terms),
+                })
+            return results
+
+    def _match_offsets(self, doc: int, terms: list) -> list:
+        """First offset of each query term in the document, read from the postings"""
+        offsets = []
+        for term in terms:
+            postings = self.postings[term]
+            docs = postings.docs.view()
+            i = int(np.searchsorted(docs, doc))
+            if i < docs.size and docs[i] == doc:
+                offsets.append((int(postings.offsets.data[i]), term))
+        return sorted(offsets)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": self.live_count,
+                "terms": len(self.postings),
+                "postings": sum(p.docs.size for p in self.postings.values()),
+                "dirty": self.dirty,
+            }
+
+    def save(self, path: str = SEARCH_SNAPSHOT_PATH):
+        """Write the index as flat CSR arrays plus a JSON header"""
+        with self._lock:
+            terms = list(self.postings)
+            sizes = np.array([self.postings[t].docs.size for t in terms], dtype=np.int64)
+            indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+            np.cumsum(sizes, out=indptr[1:])
+            arrays = {
+                "indptr": indptr,
+                "docs": np.concatenate([self.postings[t].docs.view() for t in terms]) if terms else np.zeros(0, np.int32),
+                "tfs": np.concatenate([self.postings[t].tfs.view() for t in terms]) if terms else np.zeros(0, np.float32),
+                "offsets": np.concatenate([self.postings[t].offsets.view() for t in terms]) if terms else np.zeros(0, np.int32),
+                "doc_lengths": self.doc_lengths.view().copy(),
+                "fingerprints": self.fingerprints.view().copy(),
+                "live": self.live.view().copy(),
+            }
+            header = {"version": SEARCH_INDEX_VERSION, "terms": terms, "doc_keys": list(self.doc_keys)}  # Copied: encoded after the lock is released
+            self.dirty = False
+            self.last_snapshot = time.time()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        buffer = io.BytesIO()
+        np.savez(buffer, header=np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8), **arrays)
+        _atomic_write(path, buffer.getvalue())
+        print(f"[SEARCH] Saved snapshot: {len(header['doc_keys'])} docs, {len(terms)} terms -> {path}")
+
+    def load(self, path: str = SEARCH_SNAPSHOT_PATH) -> bool:
+        """Replace the index with a snapshot; False if there is none or it is outdated"""
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path) as data:
+                header = json.loads(data["header"].tobytes().decode("utf-8"))
+                if header.get("version") != SEARCH_INDEX_VERSION:
+                    print("[SEARCH] Snapshot version changed, rebuilding index")
+                    return False
+                indptr, docs, tfs, offsets = data["indptr"], data["docs"], data["tfs"], data["offsets"]
+                doc_lengths, fingerprints, live = data["doc_lengths"], data["fingerprints"], data["live"]
+        except Exception as e:
+            print(f"[SEARCH] Could not load snapshot {path}: {str(e)}")
+            return False
+
+        with self._lock:
+            # Postings start as views into the snapshot arrays; they are copied on first append
+            self.postings = {
+                term: _Postings(docs[indptr[i]:indptr[i + 1]], tfs[indptr[i]:indptr[i + 1]], offsets[indptr[i]:indptr[i + 1]])
+                for i, term in enumerate(header["terms"])
+            }
+            self.doc_keys = [tuple(key) for key in header["doc_keys"]]
+            self.doc_numbers = {key: doc for doc, key in enumerate(self.doc_keys) if live[doc]}
+            self.doc_lengths = _Growable(np.float32, doc_lengths)
+            self.fingerprints = _Growable(np.uint32, fingerprints)
+            self.live = _Growable(np.bool_, live)
+            self.live_count = int(live.sum())
+            self.total_length = float(doc_lengths[live].sum())
+            self._sorted_terms = sorted(header["terms"])
+            self._pending_terms = []
+            self._norm = None
+            self._norm_avg = 0.0
+            self._tombstones += 1
+            self.dirty = False
+            self.last_snapshot = time.time()
+        print(f"[SEARCH] Loaded snapshot: {self.live_count} docs, {len(self.postings)} terms")
+        return True
+
+    def save_if_due(self, interval: float = SEARCH_SNAPSHOT_INTERVAL):
+        """Start a snapshot on a background thread if one is due and none is running"""
+        if self.dirty and time.time() - self.last_snapshot >= interval and self._save_lock.acquire(blocking=False):
+            threading.Thread(target=self._save_in_background, name="search-snapshot", daemon=True).start()
+
+    def _save_in_background(self):
+        try:
+            self.save()
+        except Exception as e:
+            print(f"[SEARCH] Snapshot failed: {str(e)}")
+        finally:
+            self._save_lock.release()
+
+
+def highlight(fields: list, offsets: list, width: int = SNIPPET_CHARS) -> dict:
+    """Snippet around the first matched term, with [start, end) spans of every match inside it"""
+    if not offsets:
+        return None
+    # Snippet from the first field (in document order: title first) that has a match
+    bounds = []
+    base = 0
+    for field, text in fields:
+        bounds.append((field, base, text))
+        base += len(text) + 1
+    matched_terms = {term for _, term in offsets}
+    for field, start, text in bounds:
+        hits = [o - start for o, _ in offsets if start <= o < start + len(text)]
+        if not hits:
+            continue
+        center = hits[0]
+        lo = max(0, center - width // 3)
+        hi = min(len(text), lo + width)
+        if lo > 0:
+            # Don't start mid-word
+            space = text.rfind(" ", 0, lo + 1)
+            lo = space + 1 if space >= 0 and lo - space < 20 else lo
+        snippet = text[lo:hi]
+        spans = [[s, e] for token, s, e in tokens_with_offsets(snippet) if token in matched_terms]
+        return {"field": field, "snippet": snippet, "matches": spans, "truncated_start": lo > 0, "truncated_end": hi < len(text)}
+    return None
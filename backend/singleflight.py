@@ -0,0 +1,76 @@
+import threading
+from typing import Dict
+
+from scheduler import FlightPriority, current_flight, current_priority_override, flight_scope
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        self.priority = FlightPriority(parent=current_flight())
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key runs fn; callers arriving while it is in flight
+    block until it finishes and receive the same result, or the same exception.
+    A joiner's scheduler priority carries over to the call it waits on.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def do(self, namespace: str, key: str, fn, *args, **kwargs):
+        full_key = f"{namespace}:{key}"
+        with self._lock:
+            stats = self._stats.setdefault(namespace, {"calls": 0, "executed": 0, "coalesced": 0, "errors": 0})
+            stats["calls"] += 1
+            call = self._calls.get(full_key)
+            if call is not None:
+                call.waiters += 1
+                stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[full_key] = call
+                stats["executed"] += 1
+                leader = True
+
+        if not leader:
+            call.priority.join(current_priority_override())
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            with flight_scope(call.priority):
+                call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[full_key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "by_type": {ns: dict(counts) for ns, counts in self._stats.items()},
+                "calls_saved": sum(counts["coalesced"] for counts in self._stats.values()),
+            }
+
+
+# Shared instance for all outbound AI generation
+ai_flight = SingleFlight()
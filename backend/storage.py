@@ -1,34 +1,303 @@
-from models import Course, Episode, Question, UserProgress, Achievement, User
-from typing import Dict
+from models import Course, Episode, Question, Achievement, User
+from repository import create_repository
+from progress import ProgressStore
+from awards import AchievementEngine, Rule, at_least, WATCHED, QUIZ_SCORED, QUESTION_ASKED, LECTURE_UPLOADED, COMPLETED_TODAY
+from indexes import CatalogIndexes
+from search import SearchIndex, document_fields
+from feed import FeedSnapshot
+from payloads import episode_payloads, episode_payload
+from typing import Dict, List
+import os
+import threading
+import time
 
-# In-memory storage (can be replaced with database later)
-courses: Dict[str, Course] = {}
-episodes: Dict[str, Episode] = {}
-questions: Dict[str, Question] = {}
+
+class ReadThroughDict(dict):
+    """Hot in-memory cache over a repository table: misses fall through to `loader`.
+
+    Fill and evict through put()/discard() so `on_change(previous, value)`
+    can keep secondary indexes in step with the cache.
+    """
+
+    def __init__(self, loader, on_change=None):
+        super().__init__()
+        self.loader = loader
+        self.on_change = on_change
+
+    def put(self, key, value):
+        previous = dict.get(self, key)
+        dict.__setitem__(self, key, value)
+        if self.on_change:
+            self.on_change(previous, value)
+
+    def discard(self, key):
+        previous = dict.pop(self, key, None)
+        if previous is not None and self.on_change:
+            self.on_change(previous, None)
+
+    def _load(self, key):
+        value = self.loader(key)
+        if value is not None:
+            self.put(key, value)
+        return value
+
+    def __missing__(self, key):
+        value = self._load(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or self._load(key) is not None
+
+    def get(self, key, default=None):
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        value = self._load(key)
+        return default if value is None else value
+
+
+# Durable storage (SQLite by default); the dicts below are its hot cache.
+# Write through the put_*/save_* helpers so changes reach the repository.
+repository = create_repository()
+# Subject -> courses, episode -> answered questions, unanswered questions, user id -> email
+indexes = CatalogIndexes()
+# Full-text index over course and episode text, updated as documents enter the cache
+search_index = SearchIndex()
+
+
+def course_card(course: Course) -> dict:
+    return {
+        "id": course.id,
+        "title": course.title,
+        "subject": course.subject,
+        "description": course.description,
+        "episode_count": len(course.episode_ids)
+    }
+
+
+def _feed_rows() -> list:
+    rows = []
+    for subject in indexes.subjects():
+        cards = [course_card(c) for c in map(courses.get, indexes.course_ids_for_subject(subject)) if c is not None]
+        rows.append({"subject": subject, "courses": cards})
+    return rows
+
+
+# Subject rows for GET /feed, rebuilt after any course changes
+home_feed = FeedSnapshot(_feed_rows)
+
+
+def _on_course_change(previous: Course, course: Course):
+    indexes.on_course(previous, course)
+    home_feed.invalidate()
+    if course is not None:
+        search_index.add("course", course.id, document_fields("course", course))
+
+
+def _on_episode_change(previous: Episode, ep: Episode):
+    if ep is not None:
+        search_index.add("episode", ep.id, document_fields("episode", ep))
+
+
+courses: Dict[str, Course] = ReadThroughDict(repository.get_course, _on_course_change)
+episodes: Dict[str, Episode] = ReadThroughDict(repository.get_episode, _on_episode_change)
+questions: Dict[str, Question] = ReadThroughDict(repository.get_question, indexes.on_question)
 
 # Simple user storage (in production, use a database)
-users: Dict[str, User] = {}
+users: Dict[str, User] = ReadThroughDict(repository.get_user, indexes.on_user)
 # Default users for demo
-users["student@lectureflix.com"] = User(
+default_users = [User(
     id="student1",
     email="student@lectureflix.com",
     password="student123",  # In production, hash this
     role="student",
     name="Student User"
-)
-users["instructor@lectureflix.com"] = User(
+), User(
     id="instructor1",
     email="instructor@lectureflix.com",
     password="instructor123",  # In production, hash this
     role="instructor",
     name="Instructor User"
-)
+)]
 
 # Active sessions (token -> user_id mapping)
-sessions: Dict[str, str] = {}
+sessions: Dict[str, str] = ReadThroughDict(repository.get_session)
+
+# Progress tracking, per user id (anonymous requests use the "default" user)
+DEFAULT_USER_ID = "default"
+
+
+def _locate_episode(episode_id: str):
+    """(course_id, position in the course, course size) for an episode, or None if it is not in the catalog"""
+    ep = episodes.get(episode_id)
+    course = courses.get(ep.course_id) if ep else None
+    if not course or episode_id not in course.episode_ids:
+        return None
+    return ep.course_id, course.episode_ids.index(episode_id), len(course.episode_ids)
+
+
+achievement_engine = AchievementEngine()
+progress_store = ProgressStore(repository, _locate_episode, achievement_engine)
+
+
+# Position in the repository change log this process has caught up to
+_last_change = 0
+_sync_lock = threading.Lock()
+# Minimum seconds between change-log polls; requests in between use the caches as they are
+STORAGE_SYNC_INTERVAL = float(os.getenv("STORAGE_SYNC_INTERVAL", "0.1"))
+_next_sync = 0.0
+
+
+def sync_due() -> bool:
+    """Whether a request should run sync_storage(): cheap enough to check on the event loop"""
+    return repository.shared and time.monotonic() >= _next_sync
+
+
+def load_storage():
+    """Warm the hot caches from the repository"""
+    global _last_change
+    # Read the log position first so changes made while loading are replayed, not missed
+    _last_change = repository.last_change_seq()
+    # With a snapshot, warming below only indexes documents added since it was taken
+    search_index.load()
+    saved_courses, saved_episodes = repository.load_catalog()
+    for ep in saved_episodes:
+        episodes.put(ep.id, ep)
+    for course in saved_courses:
+        courses.put(course.id, course)
+    for q in repository.load_questions():
+        questions.put(q.id, q)
+    
+    missing_users = [u for u in default_users if u.email not in users]
+    if missing_users:
+        repository.save_users(missing_users)
+        for u in missing_users:
+            users.put(u.email, u)
+    
+    print(f"[STORAGE] Loaded {len(saved_courses)} courses, {len(saved_episodes)} episodes")
+    if search_index.dirty:
+        threading.Thread(target=search_index.save, name="search-snapshot", daemon=True).start()
+
+
+def sync_storage():
+    """Apply changes other worker processes wrote since the last sync.
+
+    Catalog entries, questions and users are reloaded (so listings see
+    them), sessions are evicted (so logouts take effect everywhere) and
+    changed progress records are dropped to be re-read on next use.
+    """
+    global _last_change, _next_sync
+    if not repository.shared:
+        return
+    # Another thread is already syncing (or reloading): don't queue up behind it
+    if not _sync_lock.acquire(blocking=False):
+        return
+    reloading = False
+    try:
+        _next_sync = time.monotonic() + STORAGE_SYNC_INTERVAL
+        changes = repository.changes_since(_last_change)
+        if not changes:
+            return
+        if changes[0][0] > _last_change + 1 and _last_change:
+            # Fell behind the retained change log - start over from the repository,
+            # in the background; the reload thread releases the lock when done
+            print("[STORAGE] Change log gap, reloading hot caches")
+            threading.Thread(target=_reload_after_gap, name="storage-reload", daemon=True).start()
+            reloading = True
+            return
+        for seq, kind, key, origin in changes:
+            if origin == repository.origin:
+                continue  # Our own write - the caches already have it
+            if kind == "progress":
+                progress_store.evict(key)
+                continue
+            cache = {"course": courses, "episode": episodes, "question": questions, "user": users, "session": sessions}.get(kind)
+            if cache is None:
+                continue
+            cache.discard(key)
+            if kind != "session":
+                cache._load(key)
+        _last_change = changes[-1][0]
+    finally:
+        if not reloading:
+            _sync_lock.release()
+
+
+def _reload_after_gap():
+    """Rebuild the hot caches from the repository; called with _sync_lock held, releases it"""
+    try:
+        for cache in (courses, episodes, questions, users, sessions):
+            for key in list(cache.keys()):
+                cache.discard(key)
+        progress_store.clear()
+        load_storage()
+    finally:
+        _sync_lock.release()
+
+
+def _next_version(previous, value) -> int:
+    """Version for a catalog write: unchanged content keeps its version, changed content gets a higher one.
+
+    Versions start from a microsecond clock rather than 1, so a wiped and
+    re-seeded database never reissues an ETag a browser has cached.
+    """
+    if previous is not None and previous.model_dump(exclude={"version"}) == value.model_dump(exclude={"version"}):
+        return previous.version
+    return max((previous.version if previous else 0) + 1, time.time_ns() // 1000)
+
+
+def _created_at(previous, value) -> float:
+    """Creation time is kept across rewrites so listing order (and cursors) stay stable"""
+    if previous is not None:
+        return previous.created_at
+    return value.created_at or time.time()
+
+
+def put_catalog(new_courses: List[Course], new_episodes: List[Episode]):
+    """Persist courses and their episodes in one batch, then publish them to the cache"""
+    for ep in new_episodes:
+        ep.version = _next_version(episodes.get(ep.id), ep)
+    for course in new_courses:
+        previous = courses.get(course.id)
+        course.created_at = _created_at(previous, course)
+        course.version = _next_version(previous, course)
+    repository.save_catalog(new_courses, new_episodes)
+    for ep in new_episodes:
+        episodes.put(ep.id, ep)
+        # Encode the response once at write time; reads then serve stored bytes
+        episode_payloads.put(ep.id, ep.version, episode_payload(ep))
+    for course in new_courses:
+        courses.put(course.id, course)
+    search_index.save_if_due()
+
+
+def put_question(question: Question):
+    question.created_at = _created_at(questions.get(question.id), question)
+    repository.save_question(question)
+    questions.put(question.id, question)
+
+
+def put_session(token: str, user_id: str):
+    repository.save_session(token, user_id)
+    sessions.put(token, user_id)
+
+
+def delete_session(token: str):
+    repository.delete_session(token)
+    sessions.discard(token)
+
+
+def user_by_id(user_id: str):
+    """User for an id via the id index, falling back to the repository"""
+    email = indexes.user_email(user_id)
+    if email is not None:
+        return users.get(email)
+    user = repository.get_user_by_id(user_id)
+    if user is not None:
+        users.put(user.email, user)
+    return user
 
-# Progress tracking (single user for MVP)
-user_progress: UserProgress = UserProgress()
 
 # Achievement definitions
 achievements: Dict[str, Achievement] = {
@@ -90,4 +359,14 @@ achievements: Dict[str, Achievement] = {
     ),
 }
 
-
+# Unlock rules for the achievements above, indexed by the event type that can trigger them
+achievement_engine.register([
+    Rule("director", WATCHED, lambda record, event: event.course_completed),
+    Rule("cinematographer", WATCHED, lambda record, event: event.course_completed),
+    Rule("binge_watcher", WATCHED, at_least(COMPLETED_TODAY, 2)),
+    Rule("binge_master", WATCHED, lambda record, event: record.binge_streak >= 7),
+    Rule("action_hero", QUIZ_SCORED, lambda record, event: event.score == 100),
+    Rule("critic", QUIZ_SCORED, at_least(QUIZ_SCORED, 3)),
+    Rule("screenwriter", QUESTION_ASKED, at_least(QUESTION_ASKED, 3)),
+    Rule("producer", LECTURE_UPLOADED, at_least(LECTURE_UPLOADED, 1)),
+])
@@ -2,7 +2,7 @@
 import requests
 
 # Test the upload endpoint
-files = {'file': ('test.txt', b'test content', 'text/plain')}
+files = {'file': ('test.mp3', b'test content', 'audio/mpeg')}
 data = {'title': 'Test Course', 'subject': 'Computer Science'}
 
 try:
@@ -1,6 +1,7 @@
 """Test upload with Gemini API"""
 import requests
 import os
+import time
 
 # Set Gemini API key (use your own key from .env file)
 # os.environ['GEMINI_API_KEY'] = 'your_key_here'
@@ -30,10 +31,27 @@ try:
     print(f"Response: {response.text[:500]}\n")
     
     if response.status_code == 200:
-        result = response.json()
-        print("✅ SUCCESS! Course created!")
-        print(f"Course ID: {result.get('course_id')}")
-        print(f"Episodes created: {result.get('episodes_created')}")
+        job_id = response.json().get('job_id')
+        print(f"Job queued: {job_id}")
+        
+        # Poll the job until the background pipeline finishes
+        while True:
+            job = requests.get(f'http://localhost:8000/jobs/{job_id}').json()
+            print(f"  status={job['status']} stage={job.get('stage')} progress={job['progress']}%")
+            if job['status'] in ('completed', 'failed'):
+                break
+            time.sleep(2)
+        
+        if job['status'] == 'completed':
+            result = job['result']
+            print("✅ SUCCESS! Course created!")
+            print(f"Course ID: {result.get('course_id')}")
+            print(f"Episodes created: {result.get('episodes_created')}")
+            for stage in job['stages']:
+                print(f"  {stage['name']}: {stage['duration']}s")
+        else:
+            print("❌ Job failed")
+            print(job.get('error'))
     else:
         print("❌ Error occurred")
         print(response.text)
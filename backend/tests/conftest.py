@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Configure the backend before any of its modules are imported: no database file,
+# no Gemini calls, no background pre-generation, and a throwaway cache directory
+_cache_dir = tempfile.mkdtemp(prefix="badgerflix-tests-")
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("PREGENERATE_STUDY_MATERIALS", "false")
+os.environ.setdefault("CACHE_DIR", _cache_dir)
+os.environ.setdefault("SEARCH_SNAPSHOT_INTERVAL", "3600")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def client():
+    """The app behind a TestClient, started up once (seeding the sample catalog)"""
+    from fastapi.testclient import TestClient
+    from main import app
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def subject(client):
+    """A new subject of five four-episode courses, created in order"""
+    import uuid
+    from models import Course, Episode
+    from storage import put_catalog
+    name = f"Subject {uuid.uuid4().hex[:8]}"
+    for i in range(5):
+        course_id = f"course-{uuid.uuid4()}"
+        course_episodes = [
+            Episode(id=f"{course_id}-ep{n}", course_id=course_id, title=f"Episode {n}", summary="", key_points=[], transcript="")
+            for n in range(4)
+        ]
+        course = Course(id=course_id, title=f"Course {i}", subject=name, description="", episode_ids=[ep.id for ep in course_episodes])
+        put_catalog([course], course_episodes)
+    return name
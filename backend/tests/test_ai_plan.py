@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+import ai
+from ai import plan_episodes
+from scheduler import FlightPriority, priority_override, current_priority_override, flight_scope, current_flight, INTERACTIVE
+
+
+SECTIONS = [{"title": f"Part {i}", "summary": f"Summary {i}.", "key_points": [f"Point {i}"]} for i in range(4)]
+
+
+@pytest.fixture
+def planned(monkeypatch):
+    """Make the model return the given plan"""
+    def respond(plan):
+        reply = plan if isinstance(plan, str) else json.dumps(plan)
+        monkeypatch.setattr(ai.client, "generate", lambda prompt, generation_config=None, task=None: reply)
+    return respond
+
+
+def episode(sections, title="Episode"):
+    return {"title": title, "summary": "", "key_points": [], "sections": sections}
+
+
+def is_fallback(plan) -> bool:
+    return [ep["sections"] for ep in plan] == [[0], [1], [2], [3]] and plan[0]["title"] == "Episode 1: Part 0"
+
+
+def test_valid_plan_is_used(planned):
+    planned([episode([0, 1]), episode([2]), episode([3])])
+    assert [ep["sections"] for ep in plan_episodes(SECTIONS, "Course", 4)] == [[0, 1], [2], [3]]
+
+
+def test_entries_without_sections_are_dropped(planned):
+    # A stray entry with no sections would otherwise become an empty episode
+    planned([episode([0, 1]), {"title": "Bonus", "summary": "", "key_points": []}, episode([]), episode([2, 3])])
+    plan = plan_episodes(SECTIONS, "Course", 4)
+    assert [ep["sections"] for ep in plan] == [[0, 1], [2, 3]]
+
+
+@pytest.mark.parametrize("plan", [
+    [episode([0, 1]), episode([3])],                    # a section is missing
+    [episode([0, 2]), episode([1, 3])],                 # out of order
+    [episode([0, 1]), episode([2, 3, 4])],              # out of range
+    [episode([0, 1]), episode([True, 3])],              # not an index
+    [episode([0, 1]), episode("2,3")],                  # not a list
+    [],
+    "not json at all",
+])
+def test_bad_plans_fall_back_to_even_split(planned, plan):
+    planned(plan)
+    assert is_fallback(plan_episodes(SECTIONS, "Course", 4))
+
+
+def test_model_error_falls_back(monkeypatch):
+    def fail(prompt, generation_config=None, task=None):
+        raise RuntimeError("model unavailable")
+    monkeypatch.setattr(ai.client, "generate", fail)
+    assert is_fallback(plan_episodes(SECTIONS, "Course", 4))
+
+
+def test_single_pass_sends_the_whole_transcript(monkeypatch):
+    prompts = []
+    monkeypatch.setattr(ai, "EPISODE_CHUNK_CHARS", 20000)
+    monkeypatch.setattr(ai.client, "generate", lambda prompt, generation_config=None, task=None: prompts.append(prompt) or "[]")
+    transcript = "Opening remarks. " * 700 + "The closing sentence."
+    ai.generate_episodes_from_transcript(transcript, "Course")
+    assert len(prompts) == 1
+    assert "The closing sentence." in prompts[0]
+
+
+def test_map_step_keeps_the_callers_priority_and_flight(monkeypatch):
+    seen = []
+
+    def generate(prompt, generation_config=None, task=None):
+        seen.append((task, current_priority_override(), current_flight()))
+        return "[]"
+
+    monkeypatch.setattr(ai, "EPISODE_CHUNK_CHARS", 200)
+    monkeypatch.setattr(ai.client, "generate", generate)
+    flight = FlightPriority()
+    with priority_override(INTERACTIVE), flight_scope(flight):
+        ai.generate_episodes_from_transcript("A sentence about one topic. " * 80, "Course")
+    chunk_calls = [call for call in seen if call[0] == "episode_sections"]
+    assert len(chunk_calls) > 1
+    assert all(call[1:] == (INTERACTIVE, flight) for call in seen)
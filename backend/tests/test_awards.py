@@ -0,0 +1,82 @@
+import time
+from datetime import datetime, timedelta
+
+from awards import AchievementEngine, Event, Rule, at_least, WATCHED, QUIZ_SCORED, COMPLETED_TODAY, COURSES_COMPLETED
+from progress import ProgressRecord
+from storage import achievement_engine
+
+
+def noon(days_ago: int) -> float:
+    day = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=days_ago)
+    return time.mktime(day.timetuple())
+
+
+def watched(at: float, course_completed: bool = False) -> Event:
+    return Event(WATCHED, at=at, newly_watched=True, course_completed=course_completed)
+
+
+def test_rules_only_run_for_their_event_type():
+    checked = []
+    engine = AchievementEngine()
+    engine.register([Rule("quizzer", QUIZ_SCORED, lambda record, event: checked.append(event.kind) or True)])
+    record = ProgressRecord()
+    assert engine.apply(record, watched(noon(0))) == ([], True)
+    assert checked == []
+    assert engine.apply(record, Event(QUIZ_SCORED, score=50)) == (["quizzer"], True)
+    # Already unlocked: the check is not evaluated again
+    assert engine.apply(record, Event(QUIZ_SCORED, score=50)) == ([], True)
+    assert checked == [QUIZ_SCORED]
+    assert record.counter(QUIZ_SCORED) == 2
+
+
+def test_streak_extends_on_consecutive_days_and_restarts_after_a_gap():
+    engine = AchievementEngine()
+    record = ProgressRecord()
+    for days_ago in (5, 4, 4, 3):
+        engine.apply(record, watched(noon(days_ago)))
+    assert record.binge_streak == 3
+    engine.apply(record, watched(noon(1)))  # skipped a day
+    assert record.binge_streak == 1
+
+
+def test_binge_master_after_seven_days_in_a_row():
+    record = ProgressRecord()
+    unlocked = []
+    for days_ago in range(6, -1, -1):
+        unlocked += achievement_engine.apply(record, watched(noon(days_ago)))[0]
+    assert record.binge_streak == 7
+    assert unlocked == ["binge_master"]
+
+
+def test_binge_watcher_needs_two_courses_on_the_same_day():
+    record = ProgressRecord()
+    assert achievement_engine.apply(record, watched(noon(1), course_completed=True))[0] == ["director", "cinematographer"]
+    # The next course is finished the following day: today's count starts over
+    assert achievement_engine.apply(record, watched(noon(0), course_completed=True))[0] == []
+    assert record.counter(COMPLETED_TODAY) == 1
+    assert achievement_engine.apply(record, watched(noon(0) + 60, course_completed=True))[0] == ["binge_watcher"]
+    assert record.counter(COURSES_COMPLETED) == 3
+
+
+def test_rewatch_counts_for_the_day_but_not_the_watch_total():
+    engine = AchievementEngine()
+    record = ProgressRecord()
+    assert engine.apply(record, Event(WATCHED, at=noon(1)))[1]  # first activity of the day
+    assert not engine.apply(record, Event(WATCHED, at=noon(1) + 60))[1]
+    assert record.counter(WATCHED) == 0
+    assert record.binge_streak == 1
+
+
+def test_quiz_rules():
+    record = ProgressRecord()
+    assert achievement_engine.apply(record, Event(QUIZ_SCORED, score=100))[0] == ["action_hero"]
+    achievement_engine.apply(record, Event(QUIZ_SCORED, score=40))
+    assert achievement_engine.apply(record, Event(QUIZ_SCORED, score=70))[0] == ["critic"]
+
+
+def test_at_least():
+    record = ProgressRecord()
+    check = at_least(QUIZ_SCORED, 2)
+    assert not check(record, None)
+    record.counters = {QUIZ_SCORED: 2}
+    assert check(record, None)
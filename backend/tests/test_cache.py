@@ -0,0 +1,129 @@
+import os
+import time
+
+import pytest
+
+from cache import TranscriptCache, ArtifactCache, TutorAnswerCache
+
+
+def test_transcript_cache_round_trip(tmp_path):
+    cache = TranscriptCache(str(tmp_path), max_bytes=1024)
+    assert cache.get("abc", "model") is None
+    cache.put("abc", "model", "hello world")
+    assert cache.get("abc", "model") == "hello world"
+    assert cache.get("abc", "other-model") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+
+def test_transcript_cache_adopts_other_workers_files(tmp_path):
+    # Two workers share the directory; each only indexed what was there when it started
+    first = TranscriptCache(str(tmp_path), max_bytes=1024)
+    second = TranscriptCache(str(tmp_path), max_bytes=1024)
+    first.put("abc", "model", "written by the first worker")
+
+    assert second.get("abc", "model") == "written by the first worker"
+    stats = second.stats()
+    assert stats["hits"] == 1
+    assert stats["entries"] == 1
+    assert stats["bytes"] == len("written by the first worker")
+
+
+def test_transcript_cache_evicts_least_recently_used(tmp_path):
+    cache = TranscriptCache(str(tmp_path), max_bytes=25)
+    cache.put("a", "m", "x" * 10)
+    time.sleep(0.01)
+    cache.put("b", "m", "y" * 10)
+    time.sleep(0.01)
+    assert cache.get("a", "m") == "x" * 10  # a is now more recent than b
+    time.sleep(0.01)
+    cache.put("c", "m", "z" * 10)
+
+    assert cache.get("b", "m") is None
+    assert cache.get("a", "m") == "x" * 10
+    assert cache.get("c", "m") == "z" * 10
+    assert cache.stats()["evictions"] == 1
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_artifact_cache_disk_tier_survives_restart(tmp_path):
+    cache = ArtifactCache(str(tmp_path), max_entries=10, ttl=60)
+    cache.put("quiz:1", {"questions": [1, 2]})
+    restarted = ArtifactCache(str(tmp_path), max_entries=10, ttl=60)
+    assert restarted.get("quiz:1") == {"questions": [1, 2]}
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.get("quiz:1") == {"questions": [1, 2]}
+    assert restarted.stats()["hits"] == 1
+
+
+def test_artifact_cache_expires_entries(tmp_path):
+    cache = ArtifactCache(str(tmp_path), max_entries=10, ttl=0)
+    cache.put("quiz:1", {"questions": []})
+    assert cache.get("quiz:1") is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_artifact_cache_bounds_disk_entries(tmp_path):
+    cache = ArtifactCache(str(tmp_path), max_entries=2, ttl=3600, max_disk_entries=10)
+    now = time.time()
+    for i in range(11):
+        cache.put(f"key:{i}", i)
+        os.utime(cache._path(f"key:{i}"), (now - 100 + i, now - 100 + i))
+
+    # Swept down to 90% of the limit, oldest first
+    assert len(os.listdir(tmp_path)) == 9
+    assert cache.stats()["disk_evictions"] == 2
+    assert cache.get("key:0") is None
+    assert cache.get("key:2") == 2
+    assert cache.get("key:10") == 10
+
+
+def test_artifact_cache_sweeps_expired_files_first(tmp_path):
+    cache = ArtifactCache(str(tmp_path), max_entries=2, ttl=3600, max_disk_entries=10)
+    for i in range(3):
+        cache.put(f"stale:{i}", i)
+        os.utime(cache._path(f"stale:{i}"), (1000, 1000))
+    for i in range(8):
+        cache.put(f"key:{i}", i)
+
+    # Expired files go even though the directory is under 90% without them
+    assert len(os.listdir(tmp_path)) == 8
+    assert cache.stats()["disk_evictions"] == 3
+
+
+@pytest.fixture
+def tutor_cache():
+    cache = TutorAnswerCache(per_episode=64, max_episodes=100, threshold=0.85)
+    cache.put("ep1", "hash1", "What is the chain rule?", "chain rule answer")
+    cache.put("ep1", "hash1", "How does gradient descent work?", "gradient descent answer")
+    return cache
+
+
+@pytest.mark.parametrize("question, answer", [
+    ("what is the chain rule", "chain rule answer"),
+    ("What is the Chain Rule??", "chain rule answer"),
+    ("What's the chain rule?", "chain rule answer"),
+    ("How do gradient descents work?", "gradient descent answer"),
+])
+def test_tutor_cache_matches_rephrased_questions(tutor_cache, question, answer):
+    assert tutor_cache.get("ep1", "hash1", question) == answer
+
+
+@pytest.mark.parametrize("question", [
+    "What is not the chain rule?",
+    "Why is the chain rule wrong?",
+    "When does the chain rule fail?",
+    "How does stochastic gradient descent work?",
+    "How does gradient descent not work?",
+    "Why doesn't gradient descent work?",
+    "What is the chain rule for partial derivatives?",
+    "How does quicksort partition?",
+])
+def test_tutor_cache_does_not_answer_a_different_question(tutor_cache, question):
+    assert tutor_cache.get("ep1", "hash1", question) is None
+
+
+def test_tutor_cache_drops_answers_when_the_episode_changes(tutor_cache):
+    assert tutor_cache.get("ep1", "hash2", "What is the chain rule?") is None
+    assert tutor_cache.get("ep1", "hash1", "What is the chain rule?") is None
+    assert tutor_cache.stats()["invalidations"] == 1
@@ -0,0 +1,22 @@
+def test_rewatch_moves_course_to_front_of_continue_watching(client, subject):
+    first, second = [c["id"] for c in client.get(f"/subject/{subject}/courses", params={"fields": "id"}).json()["courses"][:2]]
+    login = {"email": "student@lectureflix.com", "password": "student123", "role": "student"}
+    token = client.post("/auth/login", json=login).json()["token"]
+
+    def watch(episode_id):
+        response = client.post(f"/episode/{episode_id}/mark-watched", params={"token": token})
+        assert response.status_code == 200
+
+    def resume_points():
+        items = client.get("/continue-watching", params={"token": token}).json()["continue_watching"]
+        return [(item["course_id"], item["next_episode_id"]) for item in items]
+
+    watch(f"{first}-ep0")
+    watch(f"{first}-ep2")
+    watch(f"{second}-ep0")
+    assert resume_points()[:2] == [(second, f"{second}-ep1"), (first, f"{first}-ep3")]
+
+    # Rewatching moves the course to the front and resumes after the rewatched episode
+    watch(f"{first}-ep0")
+    assert resume_points()[:2] == [(first, f"{first}-ep1"), (second, f"{second}-ep1")]
+    assert client.get("/progress", params={"token": token}).json()["watched_episodes"].count(f"{first}-ep0") == 1
@@ -0,0 +1,21 @@
+def test_unchanged_listing_revalidates_with_304(client, subject):
+    first = client.get(f"/subject/{subject}/courses")
+    etag = first.headers["etag"]
+    again = client.get(f"/subject/{subject}/courses", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+
+
+def test_course_etag_changes_with_the_course(client, subject):
+    from storage import courses, put_catalog
+    course_id = client.get(f"/subject/{subject}/courses").json()["courses"][-1]["id"]
+    first = client.get(f"/course/{course_id}")
+    assert first.headers["cache-control"] == "public, no-cache"
+    assert client.get(f"/course/{course_id}", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    put_catalog([courses[course_id].model_copy(update={"description": "Updated"})], [])
+    changed = client.get(f"/course/{course_id}", headers={"If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200
+    assert changed.json()["description"] == "Updated"
+    assert changed.headers["etag"] != first.headers["etag"]
+
@@ -0,0 +1,38 @@
+from indexes import SortedIds, CatalogIndexes, subject_key
+from models import Course
+
+
+def test_sorted_ids_pages_resume_after_the_cursor_key():
+    ids = SortedIds()
+    for i in (3, 1, 2, 5, 4):
+        ids.add((float(i), f"id{i}"))
+    ids.add((1.0, "id1"))  # duplicates are ignored
+    assert len(ids) == 5
+
+    page, after = ids.page(None, 2)
+    assert page == ["id1", "id2"]
+    page, after = ids.page(after, 2)
+    assert page == ["id3", "id4"]
+    page, after = ids.page(after, 2)
+    assert page == ["id5"] and after is None
+
+
+def test_sorted_ids_cursor_survives_removal_of_its_item():
+    ids = SortedIds()
+    for i in range(4):
+        ids.add((float(i), f"id{i}"))
+    page, after = ids.page(None, 2)
+    ids.remove(after)
+    assert ids.page(after, 2)[0] == ["id2", "id3"]
+
+
+def test_subject_index_follows_course_changes():
+    indexes = CatalogIndexes()
+    course = Course(id="c1", title="Course", subject="Computer  Science", description="", episode_ids=[], created_at=1.0)
+    indexes.on_course(None, course)
+    assert indexes.course_ids_for_subject("computer science") == ["c1"]
+    moved = course.model_copy(update={"subject": "Math"})
+    indexes.on_course(course, moved)
+    assert indexes.course_ids_for_subject("Computer Science") == []
+    assert indexes.course_ids_for_subject("math") == ["c1"]
+    assert subject_key(" Computer  Science ") == "computer science"
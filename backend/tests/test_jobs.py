@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from jobs import create_job, submit_job, get_job
+
+
+def wait_for(job_id: str, timeout: float = 5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = get_job(job_id)
+        if job.status in ("completed", "failed"):
+            return job
+        time.sleep(0.01)
+    pytest.fail(f"job {job_id} did not finish")
+
+
+def test_job_completes_all_stages():
+    def run(ctx, value):
+        with ctx.stage("first"):
+            pass
+        with ctx.stage("second"):
+            pass
+        return {"value": value}
+
+    job = create_job("test", ["first", "second"])
+    assert job.status == "queued"
+    submit_job(job, run, 42)
+    job = wait_for(job.id)
+    assert job.status == "completed"
+    assert job.result == {"value": 42}
+    assert [s.status for s in job.stages] == ["completed", "completed"]
+    assert job.progress == 100
+
+
+def test_failed_stage_fails_the_job():
+    def run(ctx):
+        with ctx.stage("first"):
+            pass
+        with ctx.stage("second"):
+            raise RuntimeError("boom")
+
+    job = create_job("test", ["first", "second"])
+    submit_job(job, run)
+    job = wait_for(job.id)
+    assert job.status == "failed"
+    assert "boom" in job.error
+    assert [s.status for s in job.stages] == ["completed", "failed"]
+    assert job.progress == 50
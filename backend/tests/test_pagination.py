@@ -0,0 +1,32 @@
+import base64
+
+import pytest
+
+
+def test_cursor_pages_through_a_subject(client, subject):
+    titles = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        body = client.get(f"/subject/{subject}/courses", params=params).json()
+        titles += [course["title"] for course in body["courses"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert titles == [f"Course {i}" for i in range(5)]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor!",
+    base64.urlsafe_b64encode(b"[1, 2, 3]").decode(),
+    base64.urlsafe_b64encode(b"42").decode(),
+    base64.urlsafe_b64encode(b'["yesterday", "id"]').decode(),
+])
+def test_bad_cursor_is_rejected(client, subject, cursor):
+    response = client.get(f"/subject/{subject}/courses", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_bad_cursor_on_question_lists(client):
+    assert client.get("/instructor/questions", params={"cursor": "%%%"}).status_code == 400
@@ -0,0 +1,35 @@
+import orjson
+
+from payloads import PayloadCache, negotiate
+
+
+def test_negotiate_honours_q_values():
+    assert negotiate("") == "identity"
+    assert negotiate("gzip") == "gzip"
+    assert negotiate("gzip;q=0, identity") == "identity"
+    assert negotiate("deflate") == "identity"
+
+
+def test_payload_cache_rebuilds_on_a_newer_version():
+    cache = PayloadCache(max_bytes=1 << 20)
+    built = []
+
+    def build():
+        built.append(1)
+        return {"n": len(built)}
+
+    assert orjson.loads(cache.get("ep", 1, build).bodies["identity"]) == {"n": 1}
+    cache.get("ep", 1, build)
+    assert orjson.loads(cache.get("ep", 2, build).bodies["identity"]) == {"n": 2}
+    assert len(built) == 2
+
+
+def test_episode_is_served_gzipped_with_its_own_etag(client, subject):
+    course_id = client.get(f"/subject/{subject}/courses").json()["courses"][0]["id"]
+    episode_id = f"{course_id}-ep0"
+    plain = client.get(f"/episode/{episode_id}")
+    zipped = client.get(f"/episode/{episode_id}", headers={"Accept-Encoding": "gzip"})
+    assert plain.status_code == zipped.status_code == 200
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.headers["etag"] != plain.headers["etag"]
+    assert zipped.json() == plain.json()
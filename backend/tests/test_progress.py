@@ -0,0 +1,155 @@
+import threading
+import time
+
+import pytest
+
+from awards import AchievementEngine
+from progress import CourseProgress, ProgressStore, ids
+from repository import MemoryRepository, SQLiteRepository
+
+
+def test_course_progress_counts_each_episode_once():
+    course = CourseProgress()
+    assert course.watch(0, 3, at=1.0)
+    assert not course.watch(0, 3, at=2.0)
+    assert course.watch(2, 3, at=3.0)
+    assert course.count == 2
+    assert course.watched == 0b101
+    assert course.last_watched == 3.0
+
+
+def test_course_progress_next_pointer():
+    course = CourseProgress()
+    course.watch(0, 4, at=1.0)
+    assert course.next_position == 1
+    course.watch(2, 4, at=2.0)
+    assert course.next_position == 3
+    course.watch(3, 4, at=3.0)
+    assert course.next_position == 1  # wraps back to the skipped episode
+    course.watch(1, 4, at=4.0)
+    assert course.next_position is None
+
+
+@pytest.fixture
+def catalog():
+    """Two courses of three episodes each, laid out the way storage._locate_episode reports them"""
+    layout = {}
+    for course in ("course-a", "course-b"):
+        for position in range(3):
+            layout[f"{course}-ep{position}"] = (course, position, 3)
+    return layout
+
+
+@pytest.fixture
+def store(catalog):
+    return ProgressStore(MemoryRepository(), catalog.get, AchievementEngine())
+
+
+def test_mark_watched_completes_course(store):
+    assert store.mark_watched("user", "course-a-ep0") == (True, [])
+    assert store.mark_watched("user", "course-a-ep0") == (False, [])
+    store.mark_watched("user", "course-a-ep1")
+    assert not store.get("user").has_completed("course-a")
+    store.mark_watched("user", "course-a-ep2")
+    record = store.get("user")
+    assert record.has_completed("course-a")
+    assert record.watched_counts() == {"course-a": 3}
+
+
+def test_unknown_episode_is_ignored(store):
+    assert store.mark_watched("user", "no-such-episode") == (False, [])
+    assert store.get("user").courses is None
+
+
+def test_rewatch_updates_recency_and_next_pointer(store):
+    store.mark_watched("user", "course-a-ep0")
+    store.mark_watched("user", "course-a-ep1")
+    store.mark_watched("user", "course-b-ep0")
+    assert [course_id for course_id, _ in store.in_progress("user", 10)] == ["course-b", "course-a"]
+    before = store.get("user").courses[ids.lookup("course-a")].last_watched
+
+    time.sleep(0.01)
+    assert store.mark_watched("user", "course-a-ep0") == (False, [])
+
+    started = store.in_progress("user", 10)
+    assert [course_id for course_id, _ in started] == ["course-a", "course-b"]
+    course_a = started[0][1]
+    assert course_a.last_watched > before
+    assert course_a.next_position == 2
+    assert course_a.count == 2
+
+
+def test_in_progress_skips_finished_courses_and_respects_limit(store):
+    for position in range(3):
+        store.mark_watched("user", f"course-a-ep{position}")
+    store.mark_watched("user", "course-b-ep1")
+    assert [course_id for course_id, _ in store.in_progress("user", 10)] == ["course-b"]
+    store.mark_watched("user", "course-b-ep2")
+    assert len(store.in_progress("user", 1)) == 1
+
+
+def test_progress_reloads_from_repository(catalog):
+    repository = MemoryRepository()
+    store = ProgressStore(repository, catalog.get, AchievementEngine())
+    store.mark_watched("user", "course-a-ep0")
+    store.mark_watched("user", "course-b-ep2")
+    store.add_to_list("user", "course-a")
+
+    reloaded = ProgressStore(repository, catalog.get, AchievementEngine())
+    record = reloaded.get("user")
+    assert record.watched_counts() == {"course-a": 1, "course-b": 1}
+    assert record.in_my_list("course-a")
+    assert sorted(record.watched_ids(reloaded.slots)) == ["course-a-ep0", "course-b-ep2"]
+    assert [course_id for course_id, _ in reloaded.in_progress("user", 10)] == ["course-b", "course-a"]
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_rewatch_survives_a_reload(catalog, tmp_path, backend):
+    repository = MemoryRepository() if backend == "memory" else SQLiteRepository(str(tmp_path / "progress.db"))
+    store = ProgressStore(repository, catalog.get, AchievementEngine())
+    store.mark_watched("user", "course-a-ep0")
+    store.mark_watched("user", "course-a-ep1")
+    store.mark_watched("user", "course-b-ep0")
+    time.sleep(0.01)
+    store.mark_watched("user", "course-a-ep0")
+
+    # A restarted process (or another worker) sees the same order and resume point
+    reloaded = ProgressStore(repository, catalog.get, AchievementEngine())
+    started = reloaded.in_progress("user", 10)
+    assert [course_id for course_id, _ in started] == ["course-a", "course-b"]
+    assert started[0][1].next_position == 2
+    assert started[0][1].count == 2
+
+
+def test_my_list_add_and_remove(store):
+    store.add_to_list("user", "course-a")
+    store.add_to_list("user", "course-a")
+    assert store.get("user").my_list_ids() == ["course-a"]
+    store.remove_from_list("user", "course-a")
+    assert not store.get("user").in_my_list("course-a")
+
+
+def test_one_users_slow_write_does_not_block_another(catalog):
+    release = threading.Event()
+    blocked = threading.Event()
+
+    class SlowRepository(MemoryRepository):
+        def add_progress_item(self, user_id, kind, item):
+            if user_id == "slow":
+                blocked.set()
+                release.wait(5)
+            super().add_progress_item(user_id, kind, item)
+
+    store = ProgressStore(SlowRepository(), catalog.get, AchievementEngine())
+    slow = threading.Thread(target=store.mark_watched, args=("slow", "course-a-ep0"))
+    slow.start()
+    try:
+        assert blocked.wait(5)
+        finished = threading.Event()
+        fast = threading.Thread(target=lambda: (store.mark_watched("fast", "course-a-ep0"), finished.set()))
+        fast.start()
+        assert finished.wait(2), "another user's write held up this one"
+    finally:
+        release.set()
+        slow.join(5)
+    assert store.get("slow").watched_counts() == {"course-a": 1}
@@ -0,0 +1,20 @@
+from repository import SQLiteRepository
+
+
+def test_lease_is_exclusive_until_released(tmp_path):
+    first = SQLiteRepository(str(tmp_path / "shared.db"))
+    second = SQLiteRepository(str(tmp_path / "shared.db"))
+    assert first.try_acquire_lease("startup", "100", ttl=60)
+    assert not second.try_acquire_lease("startup", "200", ttl=60)
+
+    second.release_lease("startup", "200")  # not the holder: no effect
+    assert not second.try_acquire_lease("startup", "200", ttl=60)
+
+    first.release_lease("startup", "100")
+    assert second.try_acquire_lease("startup", "200", ttl=60)
+
+
+def test_expired_lease_can_be_taken_over(tmp_path):
+    repository = SQLiteRepository(str(tmp_path / "shared.db"))
+    assert repository.try_acquire_lease("startup", "100", ttl=-1)
+    assert repository.try_acquire_lease("startup", "200", ttl=60)
@@ -0,0 +1,39 @@
+import retrieval
+from retrieval import PassageIndex, select_context, split_sentences
+
+
+TRANSCRIPT = (
+    "Today we cover sorting. Merge sort splits the list in half. "
+    "Each half is sorted recursively. The halves are then merged. "
+    "Next we look at graphs. A graph has vertices and edges. "
+    "Breadth first search visits vertices level by level. Depth first search goes deep first."
+)
+
+
+def test_split_sentences_breaks_run_ons():
+    assert split_sentences("One. Two! Three?") == ["One.", "Two!", "Three?"]
+    assert split_sentences("word " * 10, max_len=12) == ["word word", "word word", "word word", "word word", "word word"]
+
+
+def test_top_passages_follow_the_query():
+    index = PassageIndex(TRANSCRIPT, window=2, stride=2)
+    assert any("Breadth first search" in p for p in index.top_passages("breadth first search", k=1))
+    assert any("Merge sort" in p for p in index.top_passages("merge sort", k=1))
+    # No match: the opening of the transcript
+    assert index.top_passages("quantum chromodynamics", k=1) == [index.passages[0]]
+
+
+def test_passage_indexes_are_bounded(monkeypatch):
+    monkeypatch.setattr(retrieval, "PASSAGE_INDEX_MAX_ENTRIES", 3)
+    monkeypatch.setattr(retrieval, "passage_indexes", retrieval.OrderedDict())
+    for i in range(5):
+        select_context(f"ep{i}", TRANSCRIPT, "graphs")
+    select_context("ep2", TRANSCRIPT, "graphs")  # most recently used
+    select_context("ep5", TRANSCRIPT, "graphs")
+    assert list(retrieval.passage_indexes) == ["ep4", "ep2", "ep5"]
+
+
+def test_changed_transcript_is_reindexed(monkeypatch):
+    monkeypatch.setattr(retrieval, "passage_indexes", retrieval.OrderedDict())
+    assert "Merge sort" in select_context("ep", TRANSCRIPT, "merge sort")
+    assert "Heap sort" in select_context("ep", "Heap sort builds a heap first. Then it pops the maximum.", "heap sort")
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+import scheduler as scheduler_module
+from scheduler import (
+    OutboundScheduler, TokenBucket, priority_override, current_flight, estimate_tokens,
+    INTERACTIVE, STANDARD, BACKGROUND,
+)
+from singleflight import SingleFlight
+
+
+def drained_scheduler(rpm: int = 300) -> OutboundScheduler:
+    """A scheduler with an empty request bucket, so callers queue until it refills"""
+    sched = OutboundScheduler(rpm=rpm, tpm=1000000, max_retries=2, backoff_base=0.001, backoff_max=0.001)
+    sched.requests.tokens = 0
+    return sched
+
+
+def start(target, *args) -> threading.Thread:
+    thread = threading.Thread(target=target, args=args)
+    thread.start()
+    time.sleep(0.02)  # let it reach the queue before the next caller
+    return thread
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(60)
+    assert bucket.wait_time(1) == 0
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+    # A request bigger than the bucket only waits for a full bucket
+    assert bucket.wait_time(1000) == pytest.approx(60.0, abs=0.5)
+
+
+def test_more_urgent_requests_are_admitted_first():
+    sched = drained_scheduler()
+    order = []
+    threads = [
+        start(sched.run, lambda: order.append("background"), BACKGROUND),
+        start(sched.run, lambda: order.append("standard"), STANDARD),
+        start(sched.run, lambda: order.append("interactive"), INTERACTIVE),
+    ]
+    for t in threads:
+        t.join(5)
+    assert order == ["interactive", "standard", "background"]
+
+
+def test_rate_limit_errors_are_retried():
+    sched = OutboundScheduler(rpm=600, tpm=1000000, max_retries=2, backoff_base=0.001, backoff_max=0.001)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("429 Resource has been exhausted")
+        return "ok"
+
+    assert sched.run(flaky) == "ok"
+    assert sched.stats()["by_priority"]["standard"]["retries"] == 2
+
+    with pytest.raises(ValueError):
+        sched.run(lambda: int("not a number"))
+
+
+def test_estimate_tokens_counts_prompt_and_output():
+    assert estimate_tokens("x" * 400, {"max_output_tokens": 100}) > estimate_tokens("x" * 400, {"max_output_tokens": 10})
+
+
+def test_joiner_boosts_a_queued_background_call(monkeypatch):
+    # FlightPriority.join re-ranks the module's shared scheduler
+    sched = drained_scheduler()
+    monkeypatch.setattr(scheduler_module, "scheduler", sched)
+    flight = SingleFlight()
+    order = []
+
+    def request(name, priority, default):
+        sched.run(lambda: order.append(name), priority=priority, default=default, flight=current_flight())
+
+    def pregenerate():
+        with priority_override(BACKGROUND):
+            flight.do("study_pack", "ep1", request, "pregenerate", BACKGROUND, STANDARD)
+
+    def student():
+        with priority_override(INTERACTIVE):
+            flight.do("study_pack", "ep1", lambda: None)
+
+    threads = [
+        start(pregenerate),
+        start(request, "standard", STANDARD, STANDARD),
+        start(student),
+    ]
+    for t in threads:
+        t.join(5)
+
+    assert order == ["pregenerate", "standard"]
+    assert sched.stats()["by_priority"]["background"]["boosted"] == 1
@@ -0,0 +1,97 @@
+from search import SearchIndex, highlight
+
+
+def add(index, doc_id, title, transcript=""):
+    return index.add("episode", doc_id, [("title", title), ("transcript", transcript)])
+
+
+def ids(results):
+    return [r["id"] for r in results]
+
+
+def test_title_matches_rank_first():
+    index = SearchIndex()
+    add(index, "e1", "Sorting algorithms", "we also mention graphs")
+    add(index, "e2", "Graph traversal", "breadth first search over graphs")
+    add(index, "e3", "Databases", "nothing relevant here")
+    assert ids(index.search("graph traversal ")) == ["e2"]
+    assert ids(index.search("sorting ")) == ["e1"]
+    assert index.search("quantum ") == []
+
+
+def test_readding_same_text_is_a_no_op():
+    index = SearchIndex()
+    assert add(index, "e1", "Sorting algorithms")
+    assert not add(index, "e1", "Sorting algorithms")
+    assert index.stats()["documents"] == 1
+
+
+def test_replaced_documents_leave_document_frequency():
+    index = SearchIndex()
+    add(index, "e1", "Recursion basics")
+    add(index, "e2", "Loops")
+    fresh = SearchIndex()
+    fresh.add("episode", "e1", [("title", "Recursion basics")])
+    fresh.add("episode", "e2", [("title", "Loops")])
+
+    # e2 is edited twice; its old versions are tombstoned and must not count toward df("loops")
+    add(index, "e2", "Loops and iteration")
+    add(index, "e2", "Loops")
+    score = index.search("loops ")[0]["score"]
+    assert ids(index.search("loops ")) == ["e2"]
+    assert score == fresh.search("loops ")[0]["score"]
+
+
+def test_last_word_matches_as_prefix():
+    index = SearchIndex()
+    add(index, "e1", "Binary trees")
+    add(index, "e2", "Binary search")
+    assert sorted(ids(index.search("bin"))) == ["e1", "e2"]
+    assert ids(index.search("binary tr")) == ["e1", "e2"]
+    # A trailing space means the word is complete
+    assert index.search("tr ") == []
+
+
+def test_exact_prefix_term_is_never_crowded_out(monkeypatch):
+    import search
+    monkeypatch.setattr(search, "SEARCH_PREFIX_EXPANSIONS", 2)
+    index = SearchIndex()
+    add(index, "exact", "sort")
+    for i, word in enumerate(["sorted", "sorting", "sorts"]):
+        for j in range(3):
+            add(index, f"{word}-{j}", word)
+    assert "exact" in ids(index.search("sort", limit=20))
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "index.npz")
+    index = SearchIndex()
+    add(index, "e1", "Binary trees", "a tree has nodes")
+    add(index, "e2", "Hash tables", "buckets and hashing")
+    add(index, "e2", "Hash maps", "buckets and hashing")
+    index.save(path)
+    assert not index.dirty
+
+    loaded = SearchIndex()
+    assert loaded.load(path)
+    assert loaded.stats()["documents"] == 2
+    assert loaded.search("hash maps ") == index.search("hash maps ")
+    assert ids(loaded.search("tables ")) == []
+    # Still incremental after loading
+    add(loaded, "e3", "Heaps")
+    assert ids(loaded.search("heaps ")) == ["e3"]
+
+
+def test_missing_snapshot_is_not_loaded(tmp_path):
+    assert not SearchIndex().load(str(tmp_path / "missing.npz"))
+
+
+def test_highlight_snippet():
+    fields = [("title", "Binary trees"), ("transcript", "A binary tree has at most two children per node.")]
+    index = SearchIndex()
+    index.add("episode", "e1", fields)
+    result = index.search("children ")[0]
+    snippet = highlight(fields, result["offsets"])
+    assert snippet["field"] == "transcript"
+    start, end = snippet["matches"][0]
+    assert snippet["snippet"][start:end] == "children"
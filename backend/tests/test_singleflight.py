@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow(value):
+        calls.append(value)
+        started.set()
+        release.wait(5)
+        return value * 2
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("quiz", "ep1", slow, 21)))
+    leader.start()
+    started.wait(5)
+    joiners = [threading.Thread(target=lambda: results.append(flight.do("quiz", "ep1", slow, 21))) for _ in range(3)]
+    for t in joiners:
+        t.start()
+    while flight._calls["quiz:ep1"].waiters < 3:
+        time.sleep(0.001)
+    release.set()
+    for t in [leader] + joiners:
+        t.join(5)
+
+    assert calls == [21]
+    assert results == [42] * 4
+    stats = flight.stats()
+    assert stats["in_flight"] == 0
+    assert stats["by_type"]["quiz"] == {"calls": 4, "executed": 1, "coalesced": 3, "errors": 0}
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("generation failed")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("slides", "ep1", failing)
+        except ValueError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    joiner = threading.Thread(target=call)
+    joiner.start()
+    while flight._calls["slides:ep1"].waiters < 1:
+        time.sleep(0.001)
+    release.set()
+    leader.join(5)
+    joiner.join(5)
+
+    assert errors == ["generation failed"] * 2
+    assert flight.stats()["by_type"]["slides"]["errors"] == 1
+
+
+def test_key_is_free_again_after_a_call():
+    flight = SingleFlight()
+    assert flight.do("quiz", "ep1", lambda: 1) == 1
+    assert flight.do("quiz", "ep1", lambda: 2) == 2
+    with pytest.raises(KeyError):
+        flight.do("quiz", "ep1", lambda: {}["missing"])
+    assert flight.do("quiz", "ep1", lambda: 3) == 3
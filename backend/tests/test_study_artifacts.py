@@ -0,0 +1,45 @@
+import threading
+import time
+import uuid
+
+from models import Episode
+
+
+def make_episode() -> Episode:
+    """An episode with unique content, so it shares no artifact cache entries with other tests"""
+    episode_id = str(uuid.uuid4())
+    return Episode(id=episode_id, course_id="course", title="Sorting", summary=f"Merge sort {episode_id}.",
+                   key_points=["Divide and conquer"], transcript="Merge sort splits the list in half.")
+
+
+def test_artifact_is_generated_once_then_cached():
+    from main import get_study_artifact
+    ep = make_episode()
+    calls = []
+    generate = lambda episode: calls.append(episode["title"]) or [{"front": "Q", "back": "A"}]
+    assert get_study_artifact(ep, "flashcards", generate) == [{"front": "Q", "back": "A"}]
+    assert get_study_artifact(ep, "flashcards", generate) == [{"front": "Q", "back": "A"}]
+    assert calls == ["Sorting"]
+
+
+def test_regenerate_does_not_join_an_ordinary_call():
+    from main import get_study_artifact, ai_flight
+    ep = make_episode()
+    release = threading.Event()
+
+    def slow_old(episode):
+        release.wait(5)
+        return ["old"]
+
+    results = {}
+    ordinary = threading.Thread(target=lambda: results.update(ordinary=get_study_artifact(ep, "flashcards", slow_old)))
+    ordinary.start()
+    deadline = time.time() + 5
+    while not ai_flight.stats()["in_flight"] and time.time() < deadline:
+        time.sleep(0.001)
+    try:
+        results["regenerated"] = get_study_artifact(ep, "flashcards", lambda episode: ["new"], regenerate=True)
+    finally:
+        release.set()
+        ordinary.join(5)
+    assert results == {"ordinary": ["old"], "regenerated": ["new"]}
@@ -0,0 +1,34 @@
+import json
+import uuid
+
+from models import Course, Episode
+from storage import put_catalog
+
+
+def events(body: str) -> list:
+    """(event name, data) for each Server-Sent Event in a response body"""
+    parsed = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        parsed.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return parsed
+
+
+def test_stream_ends_with_the_full_answer(client):
+    course_id = f"course-{uuid.uuid4()}"
+    episode = Episode(id=f"{course_id}-ep0", course_id=course_id, title="Hash tables", summary="Buckets.",
+                      key_points=[], transcript="A hash table maps keys to buckets. Collisions share a bucket.")
+    put_catalog([Course(id=course_id, title="Data structures", subject="Streams", description="", episode_ids=[episode.id])], [episode])
+
+    response = client.post(f"/episode/{episode.id}/ask-ai/stream", json={"question": "What is a collision?"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    received = events(response.text)
+    assert received[-1][0] == "done"
+    text = "".join(data["text"] for name, data in received if name == "message")
+    assert text.strip() == received[-1][1]["answer"]
+    assert text
+
+
+def test_stream_for_unknown_episode_is_404(client):
+    assert client.post("/episode/no-such-episode/ask-ai/stream", json={"question": "Hi?"}).status_code == 404
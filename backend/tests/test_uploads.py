@@ -0,0 +1,51 @@
+import os
+
+
+def test_upload_rejects_non_media_files(client):
+    response = client.post(
+        "/upload-lecture",
+        data={"title": "Notes", "subject": "Misc"},
+        files={"file": ("notes.pdf", b"%PDF-1.4", "application/pdf")},
+    )
+    assert response.status_code == 415
+
+
+def test_upload_requires_title_and_subject(client):
+    response = client.post("/upload-lecture", files={"file": ("lecture.mp3", b"ID3", "audio/mpeg")})
+    assert response.status_code == 422
+
+
+def test_upload_requires_multipart(client):
+    assert client.post("/upload-lecture", json={"title": "x"}).status_code == 400
+
+
+def test_upload_is_streamed_to_disk_and_queued(client, monkeypatch):
+    import main
+    submitted = []
+    monkeypatch.setattr(main, "submit_job", lambda job, fn, *args, **kwargs: submitted.append(args))
+    audio = b"ID3" + b"\x00" * 300000
+    response = client.post(
+        "/upload-lecture",
+        data={"title": "Lecture", "subject": "Misc"},
+        files={"file": ("lecture.mp3", audio, "audio/mpeg")},
+    )
+    assert response.status_code == 200
+    assert response.json()["job_id"]
+    temp_path, title, subject = submitted[0][:3]
+    try:
+        with open(temp_path, "rb") as f:
+            assert f.read() == audio
+        assert (title, subject) == ("Lecture", "Misc")
+    finally:
+        os.remove(temp_path)
+
+
+def test_declared_length_over_the_cap_is_rejected_before_reading(client, monkeypatch):
+    import ingest
+    monkeypatch.setattr(ingest, "MAX_UPLOAD_BYTES", 1000)
+    response = client.post(
+        "/upload-lecture",
+        data={"title": "Lecture", "subject": "Misc"},
+        files={"file": ("lecture.mp3", b"\x00" * 200000, "audio/mpeg")},
+    )
+    assert response.status_code == 413
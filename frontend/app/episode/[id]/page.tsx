@@ -1,9 +1,9 @@
 'use client';
 
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { useParams } from 'next/navigation';
 import Link from 'next/link';
-import { apiClient, Episode } from '@/lib/api';
+import { apiClient, Episode, StudyPack } from '@/lib/api';
 import { useRouter } from 'next/navigation';
 
 // Simple markdown renderer for AI responses
@@ -230,7 +230,10 @@ export default function EpisodePage() {
     setAiLoading(true);
     setAiAnswer(''); // Clear previous answer
     try {
-      const answer = await apiClient.askAI(episodeId, aiQuestion);
+      // Render tokens as they stream in instead of waiting for the full answer
+      const answer = await apiClient.askAIStream(episodeId, aiQuestion, (text) => {
+        setAiAnswer((prev) => prev + text);
+      });
       setAiAnswer(answer);
     } catch (error: any) {
       console.error('Error asking AI:', error);
@@ -243,10 +246,23 @@ export default function EpisodePage() {
 
 
   // WhisperChat Enhancement Handlers
+  // The first study tool opened fetches all three artifacts in one request; the others reuse it
+  const studyPackRef = useRef<{ episodeId: string; pack: Promise<StudyPack> } | null>(null);
+  const loadStudyPack = () => {
+    if (studyPackRef.current?.episodeId !== episodeId) {
+      const pack = apiClient.getStudyPack(episodeId).catch((error) => {
+        studyPackRef.current = null;
+        throw error;
+      });
+      studyPackRef.current = { episodeId, pack };
+    }
+    return studyPackRef.current!.pack;
+  };
+
   const handleGenerateFlashcards = async () => {
     setFlashcardsLoading(true);
     try {
-      const cards = await apiClient.getFlashcards(episodeId);
+      const cards = (await loadStudyPack()).flashcards;
       setFlashcards(cards);
     } catch (error) {
       console.error('Error generating flashcards:', error);
@@ -269,7 +285,7 @@ export default function EpisodePage() {
   const handleGenerateQuiz = async () => {
     setQuizLoading(true);
     try {
-      const quizData = await apiClient.getQuiz(episodeId);
+      const quizData = (await loadStudyPack()).quiz;
       setQuiz(quizData);
       setQuizAnswers({});
       setShowQuizResults(false);
@@ -326,7 +342,7 @@ export default function EpisodePage() {
   const handleGenerateSlides = async () => {
     setSlidesLoading(true);
     try {
-      const slidesData = await apiClient.getSlides(episodeId);
+      const slidesData = (await loadStudyPack()).slides;
       setSlides(slidesData);
       setCurrentSlideIndex(0);
     } catch (error) {
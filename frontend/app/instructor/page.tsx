@@ -6,6 +6,8 @@ import { apiClient, Question } from '@/lib/api';
 
 export default function InstructorPage() {
   const [questions, setQuestions] = useState<Question[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [answeringId, setAnsweringId] = useState<string | null>(null);
   const [answerText, setAnswerText] = useState('');
@@ -18,7 +20,8 @@ export default function InstructorPage() {
   async function loadQuestions() {
     try {
       const data = await apiClient.getUnansweredQuestions();
-      setQuestions(data);
+      setQuestions(data.questions);
+      setNextCursor(data.next_cursor);
     } catch (error) {
       console.error('Error loading questions:', error);
     } finally {
@@ -26,6 +29,20 @@ export default function InstructorPage() {
     }
   }
 
+  async function loadMoreQuestions() {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const data = await apiClient.getUnansweredQuestions({ cursor: nextCursor });
+      setQuestions([...questions, ...data.questions]);
+      setNextCursor(data.next_cursor);
+    } catch (error) {
+      console.error('Error loading more questions:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
   const handleAnswer = async (questionId: string) => {
     if (!answerText.trim()) return;
     setSubmitting(true);
@@ -144,6 +161,15 @@ export default function InstructorPage() {
                   )}
                 </div>
               ))}
+              {nextCursor && (
+                <button
+                  onClick={loadMoreQuestions}
+                  disabled={loadingMore}
+                  className="w-full px-6 py-3 bg-gray-700 text-white rounded-lg hover:bg-gray-600 transition-colors disabled:opacity-50"
+                >
+                  {loadingMore ? 'Loading...' : 'Load more questions'}
+                </button>
+              )}
             </div>
           )}
 
@@ -153,7 +179,7 @@ export default function InstructorPage() {
             <div className="grid grid-cols-2 gap-4">
               <div>
                 <p className="text-gray-400">Pending Questions</p>
-                <p className="text-3xl font-bold text-netflix-red">{questions.length}</p>
+                <p className="text-3xl font-bold text-netflix-red">{questions.length}{nextCursor ? '+' : ''}</p>
               </div>
               <div>
                 <p className="text-gray-400">Total Episodes</p>
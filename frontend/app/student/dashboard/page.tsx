@@ -3,16 +3,16 @@
 import { useEffect, useState } from 'react';
 import { useRouter } from 'next/navigation';
 import Link from 'next/link';
-import { apiClient, Course } from '@/lib/api';
+import { apiClient, CourseCard, ContinueWatchingItem } from '@/lib/api';
 
 export default function StudentDashboard() {
   const router = useRouter();
   const [subjects, setSubjects] = useState<string[]>([]);
-  const [coursesBySubject, setCoursesBySubject] = useState<Record<string, Course[]>>({});
+  const [coursesBySubject, setCoursesBySubject] = useState<Record<string, CourseCard[]>>({});
   const [loading, setLoading] = useState(true);
-  const [continueWatching, setContinueWatching] = useState<any[]>([]);
+  const [continueWatching, setContinueWatching] = useState<ContinueWatchingItem[]>([]);
   const [myList, setMyList] = useState<string[]>([]);
-  const [watchedEpisodes, setWatchedEpisodes] = useState<string[]>([]);
+  const [watchedCounts, setWatchedCounts] = useState<Record<string, number>>({});
   const [completedCourses, setCompletedCourses] = useState<string[]>([]);
   const [userName, setUserName] = useState('');
 
@@ -31,44 +31,20 @@ export default function StudentDashboard() {
 
     async function loadData() {
       try {
-        // Load subjects first
-        const subjectsList = await apiClient.getSubjects();
-        setSubjects(subjectsList);
+        // One request for everything on the page (subject rows, progress, continue watching)
+        const feed = await apiClient.getFeed();
+        setSubjects(feed.subjects.map(row => row.subject));
 
-        // Load all courses in parallel
-        const coursePromises = subjectsList.map(subject => 
-          apiClient.getCoursesBySubject(subject).catch(err => {
-            console.error(`Error loading courses for ${subject}:`, err);
-            return [];
-          })
-        );
-        
-        const coursesArrays = await Promise.all(coursePromises);
-        
-        const coursesData: Record<string, Course[]> = {};
-        subjectsList.forEach((subject, index) => {
-          coursesData[subject] = coursesArrays[index] || [];
+        const coursesData: Record<string, CourseCard[]> = {};
+        feed.subjects.forEach(row => {
+          coursesData[row.subject] = row.courses;
         });
-        
         setCoursesBySubject(coursesData);
 
-        // Load progress data
-        try {
-          const progress = await apiClient.getProgress();
-          setWatchedEpisodes(progress.watched_episodes || []);
-          setCompletedCourses(progress.completed_courses || []);
-          setMyList(progress.my_list || []);
-        } catch (err) {
-          console.error('Error loading progress:', err);
-        }
-
-        // Load continue watching
-        try {
-          const continueData = await apiClient.getContinueWatching();
-          setContinueWatching(continueData || []);
-        } catch (err) {
-          console.error('Error loading continue watching:', err);
-        }
+        setWatchedCounts(feed.progress.watched);
+        setCompletedCourses(feed.progress.completed_courses);
+        setMyList(feed.progress.my_list);
+        setContinueWatching(feed.continue_watching);
       } catch (error) {
         console.error('Error loading data:', error);
         setSubjects([]);
@@ -178,7 +154,7 @@ export default function StudentDashboard() {
               return (
                 <Link
                   key={course.course_id}
-                  href={`/course/${course.course_id}`}
+                  href={course.next_episode_id ? `/episode/${course.next_episode_id}` : `/course/${course.course_id}`}
                   className="flex-shrink-0 w-64 group cursor-pointer"
                 >
                   <div className="relative aspect-video bg-gradient-to-br from-netflix-red/20 to-blue-600/20 rounded-lg overflow-hidden border border-netflix-red/30">
@@ -227,8 +203,8 @@ export default function StudentDashboard() {
                 {courses.map((course, idx) => {
                   const isCompleted = completedCourses.includes(course.id);
                   const isInMyList = myList.includes(course.id);
-                  const watchedCount = course.episode_ids?.filter((eid: string) => watchedEpisodes.includes(eid)).length || 0;
-                  const progress = course.episode_ids ? (watchedCount / course.episode_ids.length * 100) : 0;
+                  const watchedCount = watchedCounts[course.id] || 0;
+                  const progress = course.episode_count ? (watchedCount / course.episode_count * 100) : 0;
 
                   return (
                     <div key={course.id} className="flex-shrink-0 w-64 group animate-fade-in relative">
@@ -21,6 +21,7 @@ export default function UploadPage() {
   const [subject, setSubject] = useState(SUBJECTS[0]);
   const [uploading, setUploading] = useState(false);
   const [error, setError] = useState('');
+  const [jobStage, setJobStage] = useState('');
 
   const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     if (e.target.files && e.target.files[0]) {
@@ -39,7 +40,17 @@ export default function UploadPage() {
     setError('');
 
     try {
-      const result = await apiClient.uploadLecture(file, title, subject);
+      const { job_id } = await apiClient.uploadLecture(file, title, subject);
+      // Episodes are generated in the background - poll the job until it finishes
+      let job = await apiClient.getJob(job_id);
+      while (job.status === 'queued' || job.status === 'running') {
+        setJobStage(job.stage || job.status);
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        job = await apiClient.getJob(job_id);
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Error processing lecture');
+      }
       // Redirect to homepage to see the new course
       router.push('/');
     } catch (err: any) {
@@ -79,6 +90,7 @@ export default function UploadPage() {
       setError(errorMessage);
     } finally {
       setUploading(false);
+      setJobStage('');
     }
   };
 
@@ -165,7 +177,9 @@ export default function UploadPage() {
               disabled={uploading || !file || !title.trim()}
               className="w-full px-6 py-4 bg-netflix-red text-white rounded-lg hover:bg-red-700 transition-colors disabled:opacity-50 disabled:cursor-not-allowed text-lg font-semibold"
             >
-              {uploading ? 'Processing... (This may take a minute)' : 'Generate Course'}
+              {uploading
+                ? `Processing${jobStage ? ` (${jobStage})` : ''}... (This may take a minute)`
+                : 'Generate Course'}
             </button>
           </form>
 
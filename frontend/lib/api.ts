@@ -15,9 +15,33 @@ api.interceptors.request.use((config) => {
   if (config.data instanceof FormData) {
     delete config.headers['Content-Type'];
   }
+  // Send the session token so progress is tracked per user
+  const token = typeof window !== 'undefined' ? localStorage.getItem('token') : null;
+  if (token) {
+    config.params = { token, ...config.params };
+  }
   return config;
 });
 
+function clearSession() {
+  localStorage.removeItem('token');
+  localStorage.removeItem('user_id');
+  localStorage.removeItem('role');
+  localStorage.removeItem('name');
+}
+
+// A stale token (expired session, or issued before a server restart) gets 401 from every
+// progress endpoint: forget it and retry the request once as the anonymous user
+api.interceptors.response.use(undefined, (error) => {
+  const config = error.config;
+  if (error.response?.status === 401 && config?.params?.token && !config.url?.startsWith('/auth/')) {
+    clearSession();
+    const { token, ...params } = config.params;
+    return api.request({ ...config, params });
+  }
+  return Promise.reject(error);
+});
+
 export interface Course {
   id: string;
   title: string;
@@ -45,6 +69,92 @@ export interface Question {
   answer_text?: string;
 }
 
+// A page of a list endpoint; pass next_cursor back as `cursor` for the next page (null at the end)
+export interface PageParams {
+  cursor?: string;
+  limit?: number;
+  fields?: string[];
+}
+
+function pageQuery(page: PageParams = {}) {
+  return { cursor: page.cursor, limit: page.limit, fields: page.fields?.join(',') };
+}
+
+export interface StudyPack {
+  flashcards: any[];
+  quiz: any[];
+  slides: any[];
+}
+
+export interface JobStage {
+  name: string;
+  status: 'pending' | 'running' | 'completed' | 'failed';
+  started_at?: number;
+  finished_at?: number;
+  duration?: number;
+}
+
+export interface Job {
+  id: string;
+  kind: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  stage?: string;
+  stages: JobStage[];
+  progress: number;
+  result?: { course_id: string; episodes_created: number };
+  error?: string;
+}
+
+export interface SearchHighlight {
+  field: string;
+  snippet: string;
+  matches: [number, number][];
+  truncated_start: boolean;
+  truncated_end: boolean;
+}
+
+export interface SearchResult {
+  type: 'course' | 'episode';
+  id: string;
+  title: string;
+  score: number;
+  subject?: string;
+  course_id?: string;
+  course_title?: string;
+  highlight?: SearchHighlight;
+}
+
+export interface CourseCard {
+  id: string;
+  title: string;
+  subject: string;
+  description: string;
+  episode_count: number;
+}
+
+export interface ContinueWatchingItem {
+  course_id: string;
+  title: string;
+  subject: string;
+  progress: number;
+  watched_episodes: number;
+  total_episodes: number;
+  last_watched: string;
+  next_episode_id: string | null;  // where to resume
+}
+
+export interface HomeFeed {
+  version: number;
+  subjects: { subject: string; courses: CourseCard[] }[];
+  my_list: CourseCard[];
+  continue_watching: ContinueWatchingItem[];
+  progress: {
+    watched: Record<string, number>;  // course id -> watched episode count
+    completed_courses: string[];
+    my_list: string[];
+  };
+}
+
 export const apiClient = {
   // Authentication
   login: async (email: string, password: string, role: string) => {
@@ -57,10 +167,7 @@ export const apiClient = {
     if (token) {
       await api.post('/auth/logout', {}, { params: { token } });
     }
-    localStorage.removeItem('token');
-    localStorage.removeItem('user_id');
-    localStorage.removeItem('role');
-    localStorage.removeItem('name');
+    clearSession();
   },
 
   getCurrentUser: async () => {
@@ -74,16 +181,28 @@ export const apiClient = {
     }
   },
 
+  // Home feed: subject rows, My List, continue watching and progress in one request
+  getFeed: async (): Promise<HomeFeed> => {
+    const response = await api.get('/feed');
+    return response.data;
+  },
+
   // Subjects
   getSubjects: async (): Promise<string[]> => {
     const response = await api.get('/subjects');
     return response.data.subjects;
   },
 
+  // Search
+  search: async (query: string, limit: number = 10): Promise<SearchResult[]> => {
+    const response = await api.get('/search', { params: { q: query, limit } });
+    return response.data.results;
+  },
+
   // Courses
-  getCoursesBySubject: async (subject: string): Promise<Course[]> => {
-    const response = await api.get(`/subject/${encodeURIComponent(subject)}/courses`);
-    return response.data.courses;
+  getCoursesBySubject: async (subject: string, page?: PageParams): Promise<{ courses: Course[]; next_cursor: string | null }> => {
+    const response = await api.get(`/subject/${encodeURIComponent(subject)}/courses`, { params: pageQuery(page) });
+    return response.data;
   },
 
   getCourse: async (courseId: string): Promise<Course> => {
@@ -91,6 +210,17 @@ export const apiClient = {
     return response.data;
   },
 
+  // Batch reads: one request for many ids, in order; `fields` limits what is returned (e.g. no transcript)
+  batchGetCourses: async (ids: string[], fields?: string[]): Promise<{ courses: Partial<Course>[]; not_found: string[] }> => {
+    const response = await api.post('/courses:batchGet', { ids, fields });
+    return response.data;
+  },
+
+  batchGetEpisodes: async (ids: string[], fields?: string[]): Promise<{ episodes: Partial<Episode>[]; not_found: string[] }> => {
+    const response = await api.post('/episodes:batchGet', { ids, fields });
+    return response.data;
+  },
+
   // Episodes
   getEpisode: async (episodeId: string): Promise<Episode> => {
     const response = await api.get(`/episode/${episodeId}`);
@@ -105,6 +235,54 @@ export const apiClient = {
     return response.data.answer;
   },
 
+  // Streams the tutor answer over Server-Sent Events; onToken receives each chunk as it arrives.
+  // Aborting the signal closes the connection, which stops generation on the server.
+  askAIStream: async (
+    episodeId: string,
+    question: string,
+    onToken: (text: string) => void,
+    signal?: AbortSignal
+  ): Promise<string> => {
+    const response = await fetch(`${API_BASE_URL}/episode/${episodeId}/ask-ai/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+      body: JSON.stringify({ question }),
+      signal,
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`AI tutor request failed (${response.status})`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let answer = '';
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      // Events are separated by a blank line
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        let event = 'message';
+        let data = '';
+        for (const line of rawEvent.split('\n')) {
+          if (line.startsWith('event: ')) event = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        }
+        if (!data) continue;
+        const payload = JSON.parse(data);
+        if (event === 'error') throw new Error(payload.detail);
+        if (event === 'done') return payload.answer;
+        answer += payload.text;
+        onToken(payload.text);
+      }
+    }
+    return answer;
+  },
+
   // Q&A
   askInstructor: async (episodeId: string, questionText: string, isAnonymous: boolean = true) => {
     const response = await api.post(`/episode/${episodeId}/ask-instructor`, {
@@ -114,15 +292,15 @@ export const apiClient = {
     return response.data;
   },
 
-  getEpisodeQuestions: async (episodeId: string): Promise<Question[]> => {
-    const response = await api.get(`/episode/${episodeId}/questions`);
-    return response.data.questions;
+  getEpisodeQuestions: async (episodeId: string, page?: PageParams): Promise<{ questions: Question[]; next_cursor: string | null }> => {
+    const response = await api.get(`/episode/${episodeId}/questions`, { params: pageQuery(page) });
+    return response.data;
   },
 
   // Instructor
-  getUnansweredQuestions: async (): Promise<Question[]> => {
-    const response = await api.get('/instructor/questions');
-    return response.data.questions;
+  getUnansweredQuestions: async (page?: PageParams): Promise<{ questions: Question[]; next_cursor: string | null }> => {
+    const response = await api.get('/instructor/questions', { params: pageQuery(page) });
+    return response.data;
   },
 
   answerQuestion: async (questionId: string, answerText: string) => {
@@ -133,27 +311,39 @@ export const apiClient = {
   },
 
   // WhisperChat Enhancements
-  getFlashcards: async (episodeId: string) => {
+  getFlashcards: async (episodeId: string, regenerate: boolean = false) => {
     const response = await api.post(`/episode/${episodeId}/flashcards`, {}, {
+      params: regenerate ? { regenerate: true } : undefined,
       timeout: 60000, // 60 seconds for AI generation
     });
     return response.data.flashcards;
   },
 
-  getQuiz: async (episodeId: string) => {
+  getQuiz: async (episodeId: string, regenerate: boolean = false) => {
     const response = await api.post(`/episode/${episodeId}/quiz`, {}, {
+      params: regenerate ? { regenerate: true } : undefined,
       timeout: 60000, // 60 seconds for AI generation
     });
     return response.data.quiz;
   },
 
-  getSlides: async (episodeId: string) => {
+  getSlides: async (episodeId: string, regenerate: boolean = false) => {
     const response = await api.post(`/episode/${episodeId}/slides`, {}, {
+      params: regenerate ? { regenerate: true } : undefined,
       timeout: 60000, // 60 seconds for AI generation
     });
     return response.data.slides;
   },
 
+  // Flashcards, quiz and slides from one combined generation
+  getStudyPack: async (episodeId: string, regenerate: boolean = false): Promise<StudyPack> => {
+    const response = await api.post(`/episode/${episodeId}/study-pack`, {}, {
+      params: regenerate ? { regenerate: true } : undefined,
+      timeout: 90000, // 90 seconds - one larger AI generation
+    });
+    return response.data;
+  },
+
   // Progress & Achievements
   markEpisodeWatched: async (episodeId: string) => {
     const response = await api.post(`/episode/${episodeId}/mark-watched`);
@@ -207,7 +397,10 @@ export const apiClient = {
         baseURL: API_BASE_URL,
       });
       
+      // This instance skips the interceptor, so pass the session token here to credit the uploader
+      const token = localStorage.getItem('token');
       const response = await uploadApi.post('/upload-lecture', formData, {
+        params: token ? { token } : undefined,
         headers: {
           // Explicitly set Content-Type to let browser add boundary
           // Actually, don't set it - let browser handle it
@@ -231,5 +424,11 @@ export const apiClient = {
       }
     }
   },
+
+  // Background jobs
+  getJob: async (jobId: string): Promise<Job> => {
+    const response = await api.get(`/jobs/${jobId}`);
+    return response.data;
+  },
 };
 